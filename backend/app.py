@@ -4,13 +4,24 @@ from flask import Flask
 from flask_cors import CORS
 
 from backend.config import DevelopmentConfig, ProductionConfig
-from backend.extensions import db, jwt, migrate
+from backend.extensions import db, jwt, migrate, response_cache
 from backend.jwt_loaders import register_jwt_loaders
+from backend.blocklist import token_blocklist
+from backend.token_epochs import token_epochs
+from backend.identity_cache import identity_cache
+from backend.password_hashing import password_hasher
+from backend.refresh_rotation import refresh_rotation
+from backend.last_seen import last_seen
+from backend.json_provider import OrjsonProvider
+from backend.catalog.snapshot import catalog_snapshots
+from backend.commands import register_commands, register_background_tasks
 from backend.errors import register_error_handlers
+from backend.fault_injection import register_fault_injection
 from backend.blueprints.admin.views import admin_bp
 from backend.blueprints.auth.views import auth_bp
 from backend.blueprints.account.views import account_bp
 from backend.blueprints.furnitures.views import furnitures_bp
+from backend.blueprints.orders.views import orders_bp
 
 
 def create_app(config_override=None) -> Flask:
@@ -27,6 +38,8 @@ def create_app(config_override=None) -> Flask:
 
     app = Flask(__name__)
     app.config.from_object(config)
+    # jsonify などで使う JSON のエンコーダーを orjson にする (backend/json_provider.py)
+    app.json = OrjsonProvider(app)
 
     level = logging.DEBUG if app.config.get("DEBUG", False) else logging.INFO
     app.logger.setLevel(level)
@@ -34,22 +47,36 @@ def create_app(config_override=None) -> Flask:
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    response_cache.init_app(app)
+    token_blocklist.init_app(app)
+    token_epochs.init_app(app)
+    identity_cache.init_app(app)
+    password_hasher.init_app(app)
+    refresh_rotation.init_app(app)
+    last_seen.init_app(app)
+    catalog_snapshots.init_app(app)
 
 
     register_error_handlers(app, db)
     register_jwt_loaders(jwt, db)
+    register_fault_injection(app)
+    register_commands(app)
 
     CORS(
         app,
         origins=app.config.get("CORS_ORIGINS", ["http://localhost:5173"]),
         supports_credentials=True,
+        # 管理画面が家具の ETag を読んで、更新・削除の If-Match に使えるようにする
+        expose_headers=['ETag'],
     )
 
     app.register_blueprint(admin_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(account_bp)
     app.register_blueprint(furnitures_bp)
+    app.register_blueprint(orders_bp)
 
+    register_background_tasks(app)
 
     return app
 
@@ -0,0 +1,58 @@
+"""
+ブロックリスト確認のベンチマーク
+
+保護されたエンドポイント (GET /api/v1/account) へのリクエスト1回あたりの SQL の数と処理時間を、
+Bloom フィルタあり / なし (JWT_BLOCKLIST_FILTER_ENABLED) で比較する。
+blocked_tokens にはログアウト済みのトークンを大量に入れておく。
+
+    python -m backend.benchmarks.bench_blocklist
+"""
+import argparse
+import uuid
+
+from flask_jwt_extended import create_access_token
+
+from backend.benchmarks.common import make_app, QueryCounter, timed
+from backend.blocklist import token_blocklist
+from backend.extensions import db
+from backend.models.blocked_token import BlockedToken
+from backend.models.user import User
+
+
+def run(filter_enabled, blocked_rows, requests):
+    app = make_app(JWT_BLOCKLIST_FILTER_ENABLED=filter_enabled)
+    with app.app_context():
+        db.create_all()
+        token_blocklist.clear()
+        user = User(username='bench', email='bench@example.com', password='x')
+        db.session.add(user)
+        db.session.add_all(BlockedToken(jti=str(uuid.uuid4())) for _ in range(blocked_rows))
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
+
+        client = app.test_client()
+        client.get('/api/v1/account', headers=headers)  # ウォームアップ（フィルタの構築を含む）
+
+        with QueryCounter(db.engine) as counter:
+            seconds = timed(lambda: client.get('/api/v1/account', headers=headers), requests)
+
+        db.session.remove()
+        db.drop_all()
+    return counter.count / requests, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--blocked-rows', type=int, default=10_000)
+    parser.add_argument('--requests', type=int, default=2_000)
+    args = parser.parse_args()
+
+    print(f'blocked_tokens rows: {args.blocked_rows}, requests: {args.requests}')
+    print(f'{"mode":<10} {"queries/request":>16} {"ms/request":>12}')
+    for label, enabled in [('db', False), ('bloom', True)]:
+        queries, seconds = run(enabled, args.blocked_rows, args.requests)
+        print(f'{label:<10} {queries:>16.2f} {seconds * 1000:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
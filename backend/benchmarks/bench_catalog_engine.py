@@ -0,0 +1,85 @@
+"""
+カタログエンジンのベンチマーク
+
+公開APIの家具一覧 (GET /api/v1/furnitures) を、CATALOG_ENGINE = 'sql' と 'memory' で比較する。
+レスポンスキャッシュは無効にして、毎回エンジンが結果を作るようにする。
+
+    python -m backend.benchmarks.bench_catalog_engine --rows 10000
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from backend.benchmarks.common import make_app, QueryCounter, timed
+from backend.catalog.snapshot import catalog_snapshots
+from backend.catalog.version import bump_catalog_version
+from backend.extensions import db
+from backend.models.furniture import Furniture
+
+COLORS = ('natural', 'brown', 'white', 'black', 'gray')
+WORDS = ('oak', 'walnut', 'linen', 'leather', 'compact', 'modern', 'classic', 'soft')
+
+SCENARIOS = [
+    ('default page 1', {}),
+    ('price asc, page 50', {'sort': 'price', 'order': 'asc', 'page': 50}),
+    ('created desc, cursor', {'sort': 'created', 'order': 'desc', 'cursor': ''}),
+    ('search "oak mod"', {'q': 'oak mod'}),
+    ('summary view', {'view': 'summary', 'sort': 'price', 'order': 'desc'}),
+]
+
+
+def seed(count):
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    db.session.add_all(Furniture(
+        name=f'{WORDS[i % len(WORDS)].title()} Chair {i:05d}',
+        description=f'A {WORDS[(i * 3) % len(WORDS)]} and {WORDS[(i * 5) % len(WORDS)]} chair. ' * 4,
+        color=COLORS[i % len(COLORS)], price=Decimal('10.00') + i % 500, featured=i % 7 == 0, stock=i % 20,
+        created_at=base + timedelta(minutes=i), updated_at=base + timedelta(minutes=i),
+    ) for i in range(count))
+    bump_catalog_version()
+    db.session.commit()
+
+
+def run(engine, rows, requests):
+    app = make_app(CATALOG_ENGINE=engine, RESPONSE_CACHE_ENABLED=False)
+    results = []
+    with app.app_context():
+        db.create_all()
+        seed(rows)
+        client = app.test_client()
+        client.get('/api/v1/furnitures')  # ウォームアップ（memory ではスナップショットの構築）
+        for label, params in SCENARIOS:
+            with QueryCounter(db.engine) as counter:
+                seconds = timed(lambda: client.get('/api/v1/furnitures', query_string=params), requests)
+            results.append((label, counter.count / requests, seconds))
+
+        # 1行だけ更新されたときの差分の取り込み
+        furniture = db.session.get(Furniture, 1)
+        furniture.price = Decimal('1.00')
+        bump_catalog_version()
+        db.session.commit()
+        rebuild = timed(lambda: client.get('/api/v1/furnitures'), 1)
+
+        catalog_snapshots.clear()
+        db.session.remove()
+        db.drop_all()
+    return results, rebuild
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f'furnitures rows: {args.rows}, requests per scenario: {args.requests}')
+    print(f'{"scenario":<24} {"engine":<8} {"queries/request":>16} {"ms/request":>12}')
+    for engine in ('sql', 'memory'):
+        results, rebuild = run(engine, args.rows, args.requests)
+        for label, queries, seconds in results:
+            print(f'{label:<24} {engine:<8} {queries:>16.2f} {seconds * 1000:>12.3f}')
+        print(f'{"first request after write":<24} {engine:<8} {"":>16} {rebuild * 1000:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
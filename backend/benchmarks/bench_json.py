@@ -0,0 +1,60 @@
+"""
+JSON エンコードのベンチマーク
+
+家具一覧の典型的なレスポンス（Decimal の価格・datetime・Enum を含む dict のリスト）を、
+標準の DefaultJSONProvider と backend/json_provider.py の OrjsonProvider でエンコードする時間を比較する。
+行数は 10 / 100 / 1000。両者の出力が同じであることも確認する。
+
+    python -m backend.benchmarks.bench_json
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from backend.benchmarks.common import make_app, timed
+from backend.json_provider import OrjsonProvider, orjson
+from backend.schemas.furniture import FurnitureColor
+
+
+def furnitures_payload(rows):
+    """GET /api/v1/admin/furnitures と同じ形のレスポンス"""
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    colors = list(FurnitureColor)
+    return {
+        'furnitures': [{
+            'id': i, 'name': f'Bench Chair {i:05d}', 'description': 'A chair used for benchmarking ' * 5,
+            'color': colors[i % len(colors)], 'price': Decimal('10.00') + i, 'featured': i % 3 == 0,
+            'stock': i, 'image_url': f'https://example.com/images/{i}.png' if i % 2 else None,
+            'created_at': base + timedelta(minutes=i), 'updated_at': base + timedelta(minutes=i),
+        } for i in range(rows)],
+        'total_items': rows, 'total_pages': 1, 'current_page': 1, 'has_next': False, 'has_prev': False,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print('orjson is not installed; OrjsonProvider falls back to the standard json module.')
+
+    app = make_app()
+    stdlib, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+    with app.test_request_context():
+        print(f'{"rows":>6} {"stdlib ms":>10} {"orjson ms":>10} {"speedup":>8} {"MB/s (orjson)":>14}')
+        for rows in args.rows:
+            payload = furnitures_payload(rows)
+            body = stdlib.response(payload).get_data()
+            assert fast.response(payload).get_data() == body, 'JSON output differs'
+            repeat = max(args.repeat * 10 // rows, 5)
+            slow = timed(lambda: stdlib.response(payload), repeat)
+            quick = timed(lambda: fast.response(payload), repeat)
+            print(f'{rows:>6} {slow * 1000:>10.3f} {quick * 1000:>10.3f} {slow / quick:>7.1f}x {len(body) / quick / 1e6:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
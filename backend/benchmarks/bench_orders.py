@@ -0,0 +1,95 @@
+"""
+注文確定のベンチマーク
+
+POST /api/v1/orders をスレッド数を変えて同時に実行し、1秒あたりの注文数を測る。
+  - spread : スレッドごとに別の家具を注文する（行ロックが競合しない）
+  - hot    : 全スレッドが同じ家具を注文する（1行のロックを奪い合う）
+最後に、在庫が負になっていないこと・売れた数と在庫の減り方が一致することを確かめる。
+
+インメモリの SQLite は1つの接続を全スレッドで共有するので、既定では一時ファイルの SQLite を使う。
+SQLite は書き込みをデータベース全体で直列にするので、スレッド数に応じて伸びるのを見るには
+TEST_DATABASE_URL に PostgreSQL を指定する。
+
+    python -m backend.benchmarks.bench_orders --orders 200
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select, func
+
+from backend.benchmarks.common import make_app
+from backend.extensions import db
+from backend.models.furniture import Furniture
+from backend.models.order import OrderItem
+from backend.models.user import User
+
+INITIAL_STOCK = 1_000_000
+
+
+def run(database_url, threads, orders_per_thread, mode):
+    app = make_app(SQLALCHEMY_DATABASE_URI=database_url)
+    with app.app_context():
+        db.create_all()
+        items = [
+            Furniture(name=f'Bench Item {i}', description='Benchmark', color='white', price=Decimal('10.00'),
+                      featured=False, stock=INITIAL_STOCK)
+            for i in range(threads)
+        ]
+        user = User(username='bench', email='bench@example.com', password='x')
+        db.session.add_all([*items, user])
+        db.session.commit()
+        ids = [item.id for item in items]
+        headers = {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
+
+    errors = []
+
+    def buy(furniture_id):
+        client = app.test_client()
+        payload = {'items': [{'furniture_id': furniture_id, 'quantity': 1}]}
+        for _ in range(orders_per_thread):
+            response = client.post('/api/v1/orders', headers=headers, json=payload)
+            if response.status_code != 201:
+                errors.append(response.status_code)
+
+    workers = [
+        threading.Thread(target=buy, args=(ids[i] if mode == 'spread' else ids[0],)) for i in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = time.perf_counter() - start
+
+    with app.app_context():
+        sold = db.session.scalar(select(func.coalesce(func.sum(OrderItem.quantity), 0)))
+        remaining = db.session.scalar(select(func.sum(Furniture.stock)))
+        consistent = sold + remaining == INITIAL_STOCK * threads and not errors
+        db.session.remove()
+        db.drop_all()
+    return threads * orders_per_thread / seconds, consistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=200, help='orders per thread')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = os.getenv('TEST_DATABASE_URL') or f'sqlite:///{os.path.join(directory, "orders.db")}'
+        print(f'database: {database_url.split("://")[0]}, orders per thread: {args.orders}')
+        print(f'{"mode":<8} {"threads":>8} {"orders/s":>12} {"consistent":>12}')
+        for mode in ('spread', 'hot'):
+            for threads in args.threads:
+                throughput, consistent = run(database_url, threads, args.orders, mode)
+                print(f'{mode:<8} {threads:>8} {throughput:>12.1f} {str(consistent):>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+ログインのスループットのベンチマーク
+
+POST /api/v1/auth/login を複数スレッド（gunicorn の --threads に相当）から同時に送り、
+PASSWORD_HASH_METHOD のコスト設定ごと、プロセスプールあり / なしで 1秒あたりのログイン数を測る。
+503 (受付上限による負荷制限) になったリクエストも数える。
+
+    python -m backend.benchmarks.bench_password_hashing --threads 8 --logins 64
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from backend.benchmarks.common import make_app
+from backend.extensions import db
+from backend.models.user import User
+
+METHODS = [
+    'pbkdf2:sha256:100000',
+    'pbkdf2:sha256:600000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+]
+
+
+def run(method, workers, threads, logins, max_pending):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(
+            SQLALCHEMY_DATABASE_URI=f'sqlite:///{os.path.join(tmp, "bench.db")}',
+            PASSWORD_HASH_METHOD=method,
+            PASSWORD_HASH_WORKERS=workers,
+            PASSWORD_HASH_MAX_PENDING=max_pending,
+        )
+        with app.app_context():
+            db.create_all()
+            user = User(username='bench', email='bench@example.com')
+            user.set_password_hash('Password123!')
+            db.session.add(user)
+            db.session.commit()
+            db.session.remove()
+
+        statuses = []
+        lock = threading.Lock()
+        per_thread = logins // threads
+
+        def worker():
+            client = app.test_client()
+            for _ in range(per_thread):
+                response = client.post('/api/v1/auth/login', json={'email': 'bench@example.com', 'password': 'Password123!'})
+                with lock:
+                    statuses.append(response.status_code)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    ok = statuses.count(200)
+    return ok / elapsed, ok, statuses.count(503)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='プロセスプールのプロセス数')
+    parser.add_argument('--max-pending', type=int, default=64)
+    args = parser.parse_args()
+
+    print(f'threads: {args.threads}, logins: {args.logins}, pool workers: {args.workers}')
+    print(f'{"method":<24} {"pool":>6} {"logins/s":>10} {"ok":>6} {"503":>6}')
+    for method in METHODS:
+        for workers in (0, args.workers):
+            rate, ok, shed = run(method, workers, args.threads, args.logins, args.max_pending)
+            print(f'{method:<24} {workers:>6} {rate:>10.1f} {ok:>6} {shed:>6}')
+
+
+if __name__ == '__main__':
+    main()
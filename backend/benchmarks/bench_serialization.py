@@ -0,0 +1,65 @@
+"""
+一覧レスポンスのシリアライズのベンチマーク
+
+DB から読んだ家具の一覧をレスポンス用の dict のリストにする時間を（JSON へのエンコードは含めない）、
+  - validated: Schema.model_validate(obj).model_dump() （従来の経路）
+  - trusted  : backend/serializers.py の dump_trusted()
+で比較する。行数は 10 / 100 / 1000。両者の JSON が同じであることも確認する。
+
+    python -m backend.benchmarks.bench_serialization
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from flask import current_app
+
+from backend.benchmarks.common import make_app, timed
+from backend.extensions import db
+from backend.models.furniture import Furniture
+from backend.schemas.furniture import PublicFurniture, ReadFurniture
+from backend.serializers import dump_trusted
+
+
+def seed(count):
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    db.session.add_all(Furniture(
+        name=f'Bench Chair {i:05d}', description='A chair used for benchmarking ' * 5,
+        color=('natural', 'brown', 'white', 'black', 'gray')[i % 5],
+        price=Decimal('10.00') + i, featured=i % 3 == 0, stock=i,
+        image_url=f'https://example.com/images/{i}.png' if i % 2 else None,
+        created_at=base + timedelta(minutes=i), updated_at=base + timedelta(minutes=i),
+    ) for i in range(count))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        seed(max(args.rows))
+        furnitures = Furniture.query.order_by(Furniture.id).all()
+        dumps = current_app.json.dumps
+
+        print(f'{"schema":<16} {"rows":>6} {"validated ms":>14} {"trusted ms":>12} {"speedup":>8}')
+        for schema in (PublicFurniture, ReadFurniture):
+            for rows in args.rows:
+                objects = furnitures[:rows]
+                validated = lambda: [schema.model_validate(f).model_dump() for f in objects]
+                trusted = lambda: dump_trusted(schema, objects)
+                assert dumps(validated()) == dumps(trusted()), 'JSON output differs'
+                repeat = max(args.repeat * 10 // rows, 5)
+                slow, fast = timed(validated, repeat), timed(trusted, repeat)
+                print(f'{schema.__name__:<16} {rows:>6} {slow * 1000:>14.3f} {fast * 1000:>12.3f} {slow / fast:>7.1f}x')
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
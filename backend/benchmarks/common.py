@@ -0,0 +1,59 @@
+# ベンチマーク共通の道具
+# 実行はリポジトリのルート（backend の親ディレクトリ）から:
+#   python -m backend.benchmarks.bench_blocklist
+# docker compose の場合:
+#   docker compose run --rm backend python -m backend.benchmarks.bench_blocklist
+# 何も指定しなければインメモリの SQLite を使う。TEST_DATABASE_URL を設定すれば PostgreSQL でも測定できる。
+
+import os
+import time
+
+from sqlalchemy import event
+
+from backend.app import create_app
+from backend.config import TestingConfig
+
+
+def make_app(**overrides):
+    """TestingConfig をベースに、設定を上書きしたアプリを作る"""
+    config = type('BenchmarkConfig', (TestingConfig,), {
+        'SECRET_KEY': os.getenv('SECRET_KEY', 'benchmark-secret'),
+        'JWT_SECRET_KEY': os.getenv('JWT_SECRET_KEY', 'benchmark-jwt-secret-key-of-sufficient-length'),
+        **overrides,
+    })
+    return create_app(config_override=config)
+
+
+class QueryCounter:
+    """
+    with ブロックの中で実行された SQL を記録して数える（テストからも使う）。
+    statements と parameters は実行順に対応する（executemany の parameters は行ごとのリスト）
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.parameters = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, *args):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+
+def timed(func, repeat):
+    """func を repeat 回実行し、1回あたりの秒数を返す"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
@@ -0,0 +1,145 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select, or_
+
+from backend.extensions import db
+from backend.models.blocked_token import BlockedToken
+from backend.response_cache import LRUCacheBackend
+
+
+# JWT ブロックリストのプロセス内フィルタ
+# 保護されたエンドポイントへのリクエストのたびに blocked_tokens を SELECT していたが、答えはほぼ常に「ブロックされていない」。
+# そこで、ブロック済み jti の Bloom フィルタをプロセス内に持ち、
+#   - フィルタに含まれない → 確実にブロックされていないので DB に問い合わせない
+#   - フィルタに含まれる   → 偽陽性の可能性があるので、陽性 LRU → DB の順に確認する
+# とする。
+#
+# gunicorn のワーカー間の整合性:
+#   blocked_tokens.id は単調増加なので、「前回見た id より大きい行」を読めば差分を取り込める（変更フィード）。
+#   ただし PostgreSQL のシーケンスは INSERT の時点で採番され、見えるようになるのはコミットの時点なので、
+#   id N+1 が N より先にコミットされると、N を読まないまま前回見た id が N を追い越してしまう。
+#   そこで毎回、前回見た id の手前 JWT_BLOCKLIST_SYNC_RESCAN_IDS 件分も読み直し、遅れてコミットされた行を拾う。
+#   この同期は JWT_BLOCKLIST_SYNC_INTERVAL 秒に一回だけ行う。他のワーカーでブロックされた jti は最大でその秒数だけ
+#   フィルタに反映されないので、リフレッシュトークン（このアプリでブロックされるのはリフレッシュトークン）は
+#   フィルタを使わず常に DB で確認する。アクセストークンは1分で失効するので、フィルタだけで判定する。
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        # 要素数 n, 偽陽性率 p に対して最適なビット数 m と ハッシュ関数の数 k
+        self.num_bits = max(int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))), 8)
+        self.num_hashes = max(int(round(self.num_bits / self.capacity * math.log(2))), 1)
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # ダブルハッシング: 1回の blake2b から k 個の位置を作る
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenBlocklist:
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self.clear()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('JWT_BLOCKLIST_FILTER_ENABLED', True)
+        self.capacity = app.config.get('JWT_BLOCKLIST_FILTER_CAPACITY', 100_000)
+        self.error_rate = app.config.get('JWT_BLOCKLIST_FILTER_ERROR_RATE', 0.001)
+        self.sync_interval = app.config.get('JWT_BLOCKLIST_SYNC_INTERVAL', 1.0)
+        self.rescan_ids = app.config.get('JWT_BLOCKLIST_SYNC_RESCAN_IDS', 256)
+        self._positives = LRUCacheBackend(
+            max_entries=app.config.get('JWT_BLOCKLIST_POSITIVE_CACHE_SIZE', 1024),
+            default_ttl=0,
+        )
+        app.extensions['token_blocklist'] = self
+
+    def clear(self):
+        """フィルタを捨てる。次の判定時に DB から作り直される"""
+        with self._lock:
+            self._filter = None
+            self._last_id = 0
+            self._synced_at = 0.0
+        if getattr(self, '_positives', None) is not None:
+            self._positives.clear()
+
+    def is_blocked(self, jti, token_type='access'):
+        if self.enabled and token_type != 'refresh':
+            self._sync_if_due()
+            if jti not in self._filter:
+                return False
+            if self._positives.get(jti):
+                return True
+
+        # 期限切れの行は prune-blocked-tokens で削除されるまで残っているが、判定には使わない
+        stmt = select(BlockedToken.id).where(
+            BlockedToken.jti == jti,
+            or_(BlockedToken.expires_at.is_(None), BlockedToken.expires_at > datetime.now(timezone.utc))
+        )
+        blocked = db.session.execute(stmt).scalar_one_or_none() is not None
+        if blocked and self.enabled:
+            self._positives.set(jti, True)
+        return blocked
+
+    def add(self, jti):
+        """このワーカーでブロックした jti を、同期を待たずにすぐフィルタへ反映する"""
+        if not self.enabled:
+            return
+        self._sync_if_due()
+        with self._lock:
+            self._filter.add(jti)
+        self._positives.set(jti, True)
+
+    def _sync_if_due(self):
+        now = time.monotonic()
+        if self._filter is not None and now - self._synced_at < self.sync_interval:
+            return
+        with self._lock:
+            if self._filter is not None and now - self._synced_at < self.sync_interval:
+                return
+            self._sync()
+            self._synced_at = now
+
+    def _sync(self):
+        if self._filter is None:
+            self._filter = BloomFilter(self.capacity, self.error_rate)
+            self._last_id = 0
+
+        since = max(self._last_id - self.rescan_ids, 0)
+        stmt = select(BlockedToken.id, BlockedToken.jti).where(BlockedToken.id > since).order_by(BlockedToken.id)
+        for row in db.session.execute(stmt):
+            # 読み直した行を数え直さないよう、既にフィルタに含まれる jti は追加しない
+            # （偽陽性で追加を飛ばしても、含まれると判定されることに変わりはない）
+            if row.jti not in self._filter:
+                self._filter.add(row.jti)
+            self._last_id = max(self._last_id, row.id)
+
+        if self._filter.count > self._filter.capacity:
+            # 想定より多く登録されて偽陽性率が上がったので、容量を倍にして全件から作り直す
+            self.capacity *= 2
+            self._filter = None
+            self._sync()
+
+
+# db = SQLAlchemy() などと同じく、モジュールレベルのインスタンスを create_app の中で init_app する
+token_blocklist = TokenBlocklist()
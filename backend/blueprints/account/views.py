@@ -7,8 +7,10 @@ from backend.decorators import json_required
 from backend.models.user import User
 from backend.extensions import db
 from backend.schemas.user import PublicUser, ChangeUsernameUser, ChangePasswordUser
+from backend.conditional import conditional_get, make_etag
+from backend.token_epochs import token_epochs
+from backend.identity_cache import identity_cache, load_current_user
 
-import time
 
 # ここでしている'/account'はあくまでデフォルトで、app.register_blueprint(account_bp, url_prefix='/api/v1/account')
 # により、完全に上書きされる。結合はされない。よってこの場合、'/account'は意味をなさない
@@ -18,11 +20,16 @@ account_bp = Blueprint('account', __name__, url_prefix='/api/v1/account')
 # 401 Unauthorized エラーを返してくれるため、関数本体に処理が到達した時点では
 # current_user には必ずユーザーオブジェクトが格納されている、と考えて問題ありません。
 
+# users テーブルには更新日時のカラムがないので、ETag だけを返す。
+# current_user は @jwt_required の時点でロード済みなので、追加のクエリは発生しない。
+def account_validators():
+    return make_etag('account', current_user.id, current_user.username, current_user.email, current_user.is_admin), None
+
+
 @account_bp.get('')
 @jwt_required()
+@conditional_get(account_validators, cache_control='private, no-cache', vary=['Authorization', 'Cookie'])
 def get_user():
-    time.sleep(0.5)
-
     output = PublicUser.model_validate(current_user).model_dump()
     return jsonify({'user': output}), 200
 
@@ -30,13 +37,16 @@ def get_user():
 @account_bp.delete('')
 @jwt_required()
 def delete_user():
-    time.sleep(0.5)
+    # Blocklistにrefresh_tokenを登録する必要はない。このワーカーでは下の invalidate() の後、
+    # User Lookup loaderがUserを見つけられずに弾く。他のワーカーではキャッシュが切れるまで (IDENTITY_CACHE_TTL 秒)
+    # アクセストークンが通りうるが、リフレッシュは refresh_tokens() が DB でユーザーを読み直して 401 にする。
 
-    # Blocklistにrefresh_tokenを登録する必要はない。つまりそもそもrefresh_tokenをいじる必要はない。
-    # なぜなら User Lookup loaderによって、Userを見つけられずにエラーになりそこで弾かれるので。
-
-    db.session.delete(current_user)
+    user = load_current_user()
+    user_id = user.id
+    db.session.delete(user)
     db.session.commit()
+    identity_cache.invalidate(user_id)
+    token_epochs.invalidate(user_id)
 
     response = jsonify({'message': 'Account deleted successfully.'})
     unset_jwt_cookies(response)
@@ -48,15 +58,15 @@ def delete_user():
 @jwt_required()
 @json_required
 def username_change(payload):
-    time.sleep(0.5)
-
     dto = ChangeUsernameUser.model_validate(payload)
 
     if User.get_user_by_username(payload['username']):
         raise Conflict('This username already exists.')
 
-    current_user.username = dto.username
+    user = load_current_user()
+    user.username = dto.username
     db.session.commit()
+    identity_cache.invalidate(user.id)
     return jsonify({}), 200
 
 
@@ -64,17 +74,20 @@ def username_change(payload):
 @jwt_required()
 @json_required
 def password_update(payload):
-    time.sleep(0.5)
-
     dto = ChangePasswordUser.model_validate(payload)
 
-    if not current_user.check_password_match(dto.old_password):
+    user = load_current_user()
+    if not user.check_password_match(dto.old_password):
         raise Unauthorized('Old password is not correct.')
 
-    current_user.set_password_hash(dto.new_password)
-    current_user.update_token_valid_after()
+    user.set_password_hash(dto.new_password)
+    user.update_token_valid_after()
+    # これまでに発行した全てのトークン（他の端末のものも含む）を失効させる
+    user.bump_token_epoch()
 
     db.session.commit()
+    token_epochs.invalidate(user.id)
+    identity_cache.invalidate(user.id)
 
     response = jsonify({})
     unset_jwt_cookies(response)
@@ -1,39 +1,107 @@
-from flask import Blueprint, jsonify, url_for, request
-from sqlalchemy import select, desc, or_, asc
+import io
+from flask import Blueprint, jsonify, url_for, request, current_app, Response, stream_with_context
+from sqlalchemy import select, or_, update, delete, false
 from uuid import UUID
 
 from backend.models.user import User
 from backend.schemas.user import ReadUser
 from backend.extensions import db
 from backend.decorators import admin_required
-from werkzeug.exceptions import NotFound
+from werkzeug.exceptions import NotFound, BadRequest, UnsupportedMediaType, PreconditionFailed
 
-from backend.schemas.furniture import CreateFurniture, ReadFurniture, UpdateFurniture
+from backend.schemas.furniture import CreateFurniture, ReadFurniture, UpdateFurniture, FurnitureSelection, BulkUpdateFurniture
 from backend.decorators import json_required
 from backend.models.furniture import Furniture
+from backend.catalog.listing import admin_furniture_statement
+from backend.catalog import export
+from backend.catalog.version import bump_catalog_version
+from backend.catalog.importer import read_records, import_furnitures
+from backend.token_epochs import token_epochs
+from backend.identity_cache import identity_cache
+from backend.last_seen import last_seen
+from backend.pagination import keyset_paginate
+from backend.serializers import dump_trusted, trusted_serializer
+from backend.conditional import version_etag, if_match_versions
 
-import time
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/v1/admin')
 
 
+USERS_PER_PAGE = 50
+USERS_MAX_PER_PAGE = 200
+# ページを指定しない（全件）場合に、1回の FETCH で読み込む行数
+USERS_STREAM_BATCH_SIZE = 500
+
+
 @admin_bp.get('/users')
 @admin_required
 def get_userlist():
-    time.sleep(0.5)
+    # このワーカーに溜まっている最終ログイン日時を先に書き込む（他のワーカーの分は最大 LAST_SEEN_FLUSH_INTERVAL 秒遅れる）
+    last_seen.flush()
 
-    stmt = select(User).order_by(User.last_login_at.desc())
-    users = db.session.execute(stmt).scalars().all()
-    output = [ ReadUser.model_validate(user).model_dump() for user in users]
+    # q: ユーザー名またはメールアドレスの前方一致, is_admin: true/false で絞り込む
+    query = request.args.get('q')
+    is_admin = request.args.get('is_admin')
+    cursor = request.args.get('cursor')
+    page = request.args.get('page', type=int)
+    per_page = min(max(request.args.get('per_page', USERS_PER_PAGE, type=int), 1), USERS_MAX_PER_PAGE)
 
-    return jsonify({'users': output}), 200
+    stmt = select(User)
+    if query:
+        stmt = stmt.where(or_(
+            User.username.startswith(query, autoescape=True),
+            User.email.startswith(query, autoescape=True),
+        ))
+    if is_admin is not None:
+        if is_admin.lower() not in ('true', 'false'):
+            raise BadRequest('is_admin must be true or false.')
+        stmt = stmt.where(User.is_admin.is_(is_admin.lower() == 'true'))
+
+    # 並び順は最終ログイン日時の新しい順（未ログインのユーザーは最後）。id はキーセット用のタイブレーカー
+    if cursor is not None:
+        users, next_cursor = keyset_paginate(
+            stmt, User.last_login_at, User.id, True, 'last_login', cursor, per_page
+        )
+        return jsonify({
+            'users': dump_trusted(ReadUser, users),
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None,
+        }), 200
+
+    stmt = stmt.order_by(User.last_login_at.desc().nulls_last(), User.id.desc())
+
+    if page is not None:
+        try:
+            pagination = db.paginate(stmt, page=page, per_page=per_page, error_out=True)
+        except:
+            return jsonify({'message': 'Page not found', 'error_code':'PAGE_NOT_FOUND'}), 404
+        return jsonify({
+            'users': dump_trusted(ReadUser, pagination.items),
+            'total_items': pagination.total,
+            'total_pages': pagination.pages,
+            'current_page': pagination.page,
+            'has_next': pagination.has_next,
+            'has_prev': pagination.has_prev,
+        }), 200
+
+    # ページを指定しない場合は従来通り全件を返すが、リストを作らずに少しずつ読みながらレスポンスに書き出す
+    return Response(stream_with_context(_stream_users(stmt)), mimetype='application/json')
+
+
+def _stream_users(stmt):
+    """{"users": [...]} を1ユーザーずつ書き出す。JSON の形式は jsonify と同じにする"""
+    dumps = current_app.json.dumps
+    serialize = trusted_serializer(ReadUser)
+    yield '{"users": ['
+    rows = db.session.execute(stmt.execution_options(yield_per=USERS_STREAM_BATCH_SIZE)).scalars()
+    for i, user in enumerate(rows):
+        yield (', ' if i else '') + dumps(serialize(user))
+    yield ']}'
 
 
 @admin_bp.get('/users/<string:user_id>')
 @admin_required
 def get_user(user_id):
-    time.sleep(0.5)
-
     user_id_uuid = UUID(user_id)
     user = db.session.get(User, user_id_uuid)
     output = ReadUser.model_validate(user).model_dump()
@@ -43,8 +111,6 @@ def get_user(user_id):
 @admin_bp.patch('/users/<string:user_id>/change-role')
 @admin_required
 def change_role(user_id):
-    time.sleep(0.5)
-
     try:
         user_id_uuid = UUID(user_id)
     except ValueError:
@@ -55,7 +121,11 @@ def change_role(user_id):
         raise NotFound('User with the specified ID was not found.')
 
     user.is_admin = not user.is_admin
+    # 古い権限のまま発行されたトークンを使い続けられないよう、対象ユーザーのトークンを全て失効させる
+    user.bump_token_epoch()
     db.session.commit()
+    token_epochs.invalidate(user.id)
+    identity_cache.invalidate(user.id)
     # クライアント側ではUIだけ変えておく。ページリロードはしなくて良いと考えられる
     # APIリクエストが失敗した際には、UIを操作前の状態に戻す（例: 削除しようとした行を再表示する、変更した役割の表示を元に戻す）エラーハンドリング処理をクライアント側で必ず実装する必要があります。
     return jsonify({}), 200
@@ -64,8 +134,6 @@ def change_role(user_id):
 @admin_bp.delete('/users/<string:user_id>/delete-user')
 @admin_required
 def delete_user(user_id):
-    time.sleep(0.5)
-
     try:
         user_id_uuid = UUID(user_id)
     except ValueError:
@@ -79,6 +147,8 @@ def delete_user(user_id):
         raise NotFound('User with the specified ID was not found.')
     db.session.delete(user)
     db.session.commit()
+    identity_cache.invalidate(user_id_uuid)
+    token_epochs.invalidate(user_id_uuid)
     # クライアント側ではUIだけ変えておく。ページリロードはしなくて良いと考えられる
     return jsonify({}), 204
 
@@ -90,8 +160,6 @@ def delete_user(user_id):
 @admin_required
 @json_required
 def create_furniture(payload):
-    time.sleep(0.5)
-
     dto = CreateFurniture.model_validate(payload)
 
     # Pydanticモデルを一度、辞書に変換する
@@ -105,6 +173,8 @@ def create_furniture(payload):
     # アスタリスクが一つの場合には、リストやタプルを展開して、位置引数として順番に渡す。
     furniture = Furniture(**furniture_data)
     db.session.add(furniture)
+    # 公開APIのレスポンスキャッシュを無効化する（同じトランザクションでコミットされる）
+    bump_catalog_version()
     db.session.commit()
     # `model_dump(mode='json')` を使うと、Pydanticは「これからこのデータをJSONにするんだな」と理解し、以下のような特殊な型を自動的にJSONが扱える形式に変換してくれます。`HttpUrl` → `str``EmailStr` → `str``datetime` → `str` (ISO 8601形式の文字列)`Decimal` → `float` または `str` (設定による)`UUID` → `str`
     output = ReadFurniture.model_validate(furniture).model_dump(mode='json')
@@ -113,67 +183,136 @@ def create_furniture(payload):
     return jsonify(output), 201, {'Location': location }
 
 
+# Content-Type からインポートする形式を決める
+IMPORT_MIMETYPES = {
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'text/csv': 'csv',
+}
+
+
+@admin_bp.post('/furnitures/import')
+@admin_required
+def import_furnitures_view():
+    """
+    NDJSON (1行に1つの家具の JSON) または CSV (ヘッダー行付き) のリクエストボディを読みながら一括で upsert する。
+    不正な行は飛ばし、行番号ごとのエラーをレスポンスで返す。
+    """
+    fmt = IMPORT_MIMETYPES.get(request.mimetype)
+    if fmt is None:
+        raise UnsupportedMediaType('Content-Type must be application/x-ndjson or text/csv.')
+
+    # request.stream はボディをメモリに読み込まずに少しずつ返す
+    result = import_furnitures(read_records(io.BufferedReader(request.stream), fmt))
+    return jsonify(result.to_dict()), 200
+
+
+def _selection_criteria(selection):
+    """一括更新・一括削除の WHERE 条件"""
+    if selection.ids is not None:
+        return [Furniture.id.in_(selection.ids)]
+    criteria = []
+    if selection.filter.color is not None:
+        criteria.append(Furniture.color == selection.filter.color)
+    if selection.filter.featured is not None:
+        criteria.append(Furniture.featured.is_(selection.filter.featured))
+    return criteria
+
+
+# 一括更新・一括削除は、対象の行を読み込まずに1つの UPDATE / DELETE ... RETURNING id で行う。
+# カタログのバージョン更新と合わせて1トランザクション・2文で済む（行数によらない）。
+@admin_bp.patch('/furnitures')
+@admin_required
+@json_required
+def bulk_update_furnitures(payload):
+    dto = BulkUpdateFurniture.model_validate(payload)
+    values = dto.patch.model_dump(exclude_unset=True)
+
+    stmt = (
+        update(Furniture)
+        .where(*_selection_criteria(dto))
+        .values(**values, version=Furniture.version + 1)
+        .returning(Furniture.id)
+        .execution_options(synchronize_session=False)
+    )
+    ids = db.session.execute(stmt).scalars().all()
+    if ids:
+        bump_catalog_version()
+    db.session.commit()
+    return jsonify({'updated': len(ids), 'ids': sorted(ids)}), 200
+
+
+@admin_bp.delete('/furnitures')
+@admin_required
+@json_required
+def bulk_delete_furnitures(payload):
+    dto = FurnitureSelection.model_validate(payload)
+
+    stmt = (
+        delete(Furniture)
+        .where(*_selection_criteria(dto))
+        .returning(Furniture.id)
+        .execution_options(synchronize_session=False)
+    )
+    ids = db.session.execute(stmt).scalars().all()
+    if ids:
+        bump_catalog_version()
+    db.session.commit()
+    return jsonify({'deleted': len(ids), 'ids': sorted(ids)}), 200
+
+
 @admin_bp.patch('/furnitures/<int:id>')
 @admin_required
 @json_required
 def update_furniture(payload, id):
-    time.sleep(0.5)
-
     # payload と id は、どちらもキーワード引数（kwargs）として渡されるため、引数の順番は問われません。(Furniture, id)でもok.
-    furniture = db.session.get(Furniture, id)
-    if furniture is None:
-        raise NotFound(f'Furniture with id {id} not found.')
-
+    # 読み込んだ時点の ETag を If-Match で送ってもらい、その間に他の管理者が更新していれば 412 にする（上書きしない）
+    versions = if_match_versions()
     updateData = UpdateFurniture.model_validate(payload).model_dump(exclude_unset=True)
-    for key, value in updateData.items():
-        setattr(furniture, key, value)
-    db.session.commit()
+
+    stmt = (
+        update(Furniture)
+        .where(Furniture.id == id, *_version_criteria(versions))
+        .values(**updateData, version=Furniture.version + 1)
+        .returning(Furniture)
+    )
+    furniture = db.session.execute(stmt).scalar_one_or_none()
+    if furniture is None:
+        _raise_not_found_or_precondition_failed(id)
+    # RETURNING で読んだ値で応答を作る（コミット後に属性を読むと、もう一度 SELECT が走る）
     output = ReadFurniture.model_validate(furniture).model_dump()
-    return jsonify(output), 200
+    etag = version_etag(furniture.version)
+    bump_catalog_version()
+    db.session.commit()
+    response = jsonify(output)
+    response.set_etag(etag)
+    return response, 200
+
+
+def _version_criteria(versions):
+    # If-Match: * なら条件なし。どのバージョンにも一致しない If-Match なら false() で何も更新しない
+    if versions is None:
+        return []
+    if not versions:
+        return [false()]
+    return [Furniture.version.in_(versions)]
+
+
+def _raise_not_found_or_precondition_failed(id):
+    # 条件付きの UPDATE/DELETE が0行だったときだけ、行が存在するかどうかを調べて 404 と 412 を区別する
+    if db.session.execute(select(Furniture.id).where(Furniture.id == id)).first() is None:
+        raise NotFound(f'Furniture with id {id} not found.')
+    raise PreconditionFailed('The furniture has been modified by someone else. Reload it and try again.')
 
 
 @admin_bp.get('/furnitures')
 @admin_required
 def get_furnitures():
-    time.sleep(0.5)
-
     PER_PAGE = 5
 
-    # q パラメータがURLに含まれていない場合、None を返す。
-    query = request.args.get('q')
-    sort = request.args.get('sort')
-    order = request.args.get('order')
     page = request.args.get('p', 1, type=int)
-
-
-    # もし、order_by を省略すると、データベースが、最も効率的だと判断した順序でデータを返します。
-    # データが物理的にディスクに保存されている順序かもしれませんし、何らかのインデックスを利用した結果かもしれません
-    stmt = select(Furniture)
-
-    if sort and order:
-        # クライアントからの sort パラメータをカラム名にマッピング
-        sort_map = {
-            'price': Furniture.price,
-            'stock': Furniture.stock,
-            'created': Furniture.created_at,
-            'updated': Furniture.updated_at
-        }
-        column = sort_map.get(sort)
-
-    if column:
-        if order.lower() in ['desc']:
-            stmt = stmt.order_by(desc(column))
-        else:
-            stmt = stmt.order_by(asc(column))
-    else:
-        stmt = stmt.order_by(desc(Furniture.updated_at))
-
-    if query:
-        stmt = stmt.where(or_(
-                Furniture.name.ilike(f'%{query}%'),
-                Furniture.description.ilike(f'%{query}%'),
-                Furniture.color.ilike(f'{query}%')
-            ))
+    # 絞り込みと並び順はエクスポートと共通 (backend/catalog/listing.py)
+    stmt = admin_furniture_statement(request.args)
 
     try:
         pagination = db.paginate(stmt, page=page, per_page=PER_PAGE, error_out=True)
@@ -182,7 +321,8 @@ def get_furnitures():
         return jsonify({'message': 'Page not found', 'error_code':'PAGE_NOT_FOUND'}), 404
 
     furnitures = pagination.items
-    output = [ReadFurniture.model_validate(furniture).model_dump() for furniture in furnitures]
+    # DB から読んだ値は書き込み時に検証済みなので、一覧では検証を省く (backend/serializers.py)
+    output = dump_trusted(ReadFurniture, furnitures)
 
     return jsonify({
         'furnitures': output,
@@ -202,11 +342,31 @@ def get_furnitures():
 
     return jsonify(output), 200
 
+@admin_bp.get('/furnitures/export')
+@admin_required
+def export_furnitures():
+    """
+    カタログ全体を NDJSON (既定) または CSV でストリーミングする。q / sort / order は一覧と同じ。
+    クライアントが gzip を受け付ける場合は、書き出しながら圧縮する。
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in export.FORMATS:
+        raise BadRequest('format must be ndjson or csv.')
+    compress = 'gzip' in request.accept_encodings
+
+    stmt = admin_furniture_statement(request.args)
+    body = export.encode_chunks(export.iter_export(stmt, fmt), compress=compress)
+    response = Response(stream_with_context(body), mimetype=export.MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=furnitures.{fmt}'
+    response.vary.add('Accept-Encoding')
+    if compress:
+        response.content_encoding = 'gzip'
+    return response
+
+
 @admin_bp.get('/furnitures/<int:id>')
 @admin_required
 def get_furniture(id):
-    time.sleep(0.5)
-
     # DB接続エラーなどの場合には、SQLAlchemyの例外が発生される。
     # IDに対応するレコードが見つからなかった場合にはNoneが返される
     furniture = db.session.get(Furniture, id)
@@ -215,20 +375,26 @@ def get_furniture(id):
         raise NotFound(f'Furniture with id {id} not found.')
     output = ReadFurniture.model_validate(furniture).model_dump()
 
-    return jsonify(output), 200
+    # 更新・削除のときに If-Match で送り返してもらう
+    response = jsonify(output)
+    response.set_etag(version_etag(furniture.version))
+    return response, 200
 
 
 @admin_bp.delete('/furnitures/<int:id>')
 @admin_required
 def delete_furniture(id):
-    time.sleep(0.5)
-
-    furniture = db.session.get(Furniture, id)
-    if furniture is None:
-        # Flaskに組み込まれた404エラーを発生させるのが最も一般的でクリーンな方法です
-        raise NotFound(f'Furniture with id {id} not found.')
-
-    db.session.delete(furniture)
+    versions = if_match_versions()
+    stmt = (
+        delete(Furniture)
+        .where(Furniture.id == id, *_version_criteria(versions))
+        .returning(Furniture.id)
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.execute(stmt).first() is None:
+        _raise_not_found_or_precondition_failed(id)
+
+    bump_catalog_version()
     db.session.commit()
     # jsonify({}) は空のJSONオブジェクト ({}) のボディと Content-Type: application/json ヘッダーを生成してしまう。
     # 204では、Flaskでボディを含まないレスポンスを返さないといけないので、以下のように '' とするのが一般的。
@@ -1,5 +1,5 @@
-from uuid import UUID
-from flask import Blueprint, jsonify, url_for, current_app
+from flask import Blueprint, jsonify, url_for, current_app, g
+from sqlalchemy.exc import IntegrityError
 from werkzeug.exceptions import Unauthorized, Conflict, BadRequest
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, set_refresh_cookies, unset_refresh_cookies, get_jwt_identity, get_jwt
 from backend.decorators import json_required
@@ -7,7 +7,11 @@ from backend.extensions import db
 from backend.models.user import User
 from backend.schemas.user import CreateUser, PublicUser
 from backend.models.blocked_token import BlockedToken
-import time
+from backend.blocklist import token_blocklist
+from backend.token_epochs import epoch_claims
+from backend.refresh_rotation import refresh_rotation, FAMILY_CLAIM
+from backend.last_seen import last_seen
+from backend.identity_cache import load_current_user
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/v1/auth')
 
@@ -15,8 +19,6 @@ auth_bp = Blueprint('auth', __name__, url_prefix='/api/v1/auth')
 @auth_bp.post('/registration')
 @json_required
 def create_user(payload):
-    time.sleep(0.5)
-
     dto = CreateUser.model_validate(payload).model_dump()
     user = User(**dto)
     existing_user = User.get_user_by_username(user.username)
@@ -40,16 +42,20 @@ def create_user(payload):
 @auth_bp.post('/login')
 @json_required
 def login(payload):
-    time.sleep(0.5)
-
     if 'email' not in payload or 'password' not in payload:
         raise BadRequest('Email and password are required')
     user = User.get_user_by_email(payload['email'])
     if user and user.check_password_match(payload['password']):
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
-        user.update_last_login_at()
-        db.session.commit()
+        # 古いアルゴリズムやコストで保存されたハッシュは、平文が手元にあるこのタイミングで作り直す
+        if user.password_needs_rehash():
+            user.set_password_hash(payload['password'])
+            db.session.commit()
+        # ログインごとに新しいトークンファミリーを作る（リフレッシュ後も同じファミリーを引き継ぐ）
+        claims = {**epoch_claims(user), **refresh_rotation.family_claims()}
+        access_token = create_access_token(identity=user.id, additional_claims=claims)
+        refresh_token = create_refresh_token(identity=user.id, additional_claims=claims)
+        # 最終ログイン日時はバッファに記録し、まとめて書き込む (backend/last_seen.py)
+        last_seen.record(user.id)
         output = PublicUser.model_validate(user).model_dump()
 
         response_body = jsonify({
@@ -66,12 +72,13 @@ def login(payload):
 @auth_bp.post('/logout')
 @jwt_required(refresh=True, locations=["cookies"])
 def logout():
-    time.sleep(0.5)
-
-    refresh_jti = get_jwt()['jti']
-    blocked_token = BlockedToken(jti=refresh_jti)
+    jwt_payload = get_jwt()
+    # このログインから発行された全てのトークン（同じファミリー）をまとめて失効させる。
+    # ファミリーのクレームがない古いトークンは、そのトークンだけをブロックする。
+    blocked_token = BlockedToken.from_jwt(jwt_payload, key=jwt_payload.get(FAMILY_CLAIM))
     db.session.add(blocked_token)
     db.session.commit()
+    token_blocklist.add(blocked_token.jti)
     response_body = jsonify({})
     unset_refresh_cookies(response_body)
     # クライアントサイドでアクセストークンの消去も忘れずに
@@ -84,23 +91,34 @@ def logout():
 # ちなみに、@jwt_required() (または jwt_required(refresh=False) と同等) は、アクセストークンのみを有効とみなす。
 @jwt_required(refresh=True, locations=["cookies"])
 def refresh_tokens():
-    time.sleep(0.5)
-
-    refresh_jti = get_jwt()['jti']
-    blocked_token = BlockedToken(jti=refresh_jti)
-    db.session.add(blocked_token)
-    db.session.commit()
-
+    jwt_payload = get_jwt()
     identity = get_jwt_identity()
-    access_token = create_access_token(identity)
-    refresh_token = create_refresh_token(identity)
 
-    user = db.session.get(User, UUID(identity))
-    user.update_last_login_at()
-    db.session.commit()
-    output = PublicUser.model_validate(user).model_dump()
-    print(f'ユーザー情報 {output}')
-    response_body = jsonify({ 'access_token': access_token, 'user': output })
-    set_refresh_cookies(response_body, refresh_token)
+    def issue():
+        # user_lookup は他のワーカーでキャッシュされたスナップショットで通りうるので、削除済みのユーザーはここで 401 にする
+        user = load_current_user()
+        # 他のワーカーで既にローテーション済みのトークン（猶予期間内）は、もうブロックリストに入っている
+        if not g.get('refresh_token_already_rotated'):
+            db.session.add(BlockedToken.from_jwt(jwt_payload))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # 他のワーカーが同じトークンをちょうど同時にローテーションした。猶予期間内の重複として扱う
+                db.session.rollback()
+        last_seen.record(user.id)
+
+        claims = {**epoch_claims(user), **refresh_rotation.family_claims(jwt_payload)}
+        return {
+            'access_token': create_access_token(identity, additional_claims=claims),
+            'refresh_token': create_refresh_token(identity, additional_claims=claims),
+            'user': PublicUser.model_validate(user).model_dump(),
+        }
+
+    # 同じリフレッシュトークンでの同時リクエストには、最初に発行したペアをそのまま返す
+    result, issued = refresh_rotation.rotate(jwt_payload, issue)
+    if issued:
+        token_blocklist.add(jwt_payload['jti'])
+
+    response_body = jsonify({ 'access_token': result['access_token'], 'user': result['user'] })
+    set_refresh_cookies(response_body, result['refresh_token'])
     return response_body, 200
-
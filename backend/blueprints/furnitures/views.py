@@ -1,17 +1,49 @@
-from flask import Blueprint, jsonify, url_for, request
-from werkzeug.exceptions import NotFound
-from sqlalchemy import select, desc, asc, or_
+from flask import Blueprint, jsonify, url_for, request, current_app
+from werkzeug.exceptions import NotFound, BadRequest
+from sqlalchemy import select, desc, asc
+from sqlalchemy.orm import load_only
 from backend.extensions import db
 from backend.models.furniture import Furniture
 from backend.schemas.furniture import PublicFurniture
-import time
+from backend.pagination import keyset_paginate
+from backend.catalog.search import apply_search
+from backend.catalog.version import get_catalog_version, get_catalog_stamp
+from backend.conditional import conditional_get, make_etag, normalized_args
+from backend.response_cache import cached_response
+from backend.serializers import dump_trusted, trusted_serializer
+from backend.catalog.snapshot import catalog_snapshots
+from backend.catalog.fields import requested_fields, load_only_columns
+from backend.catalog.facets import count_facets
+from backend.catalog.filters import parse_filters, apply_filters
 
 
 furnitures_bp = Blueprint('furnitures', __name__, url_prefix='/api/v1/furnitures')
 
+
+# 検証子はカタログのバージョン（version_stamps の1行）だけから作るので、304 を返すときは
+# furnitures テーブルには一切アクセスしない。Last-Modified はカタログが最後に変更された日時。
+def catalog_list_validators():
+    version, updated_at = get_catalog_stamp()
+    return make_etag('furnitures', version, normalized_args()), updated_at
+
+
+def catalog_facets_validators():
+    version, updated_at = get_catalog_stamp()
+    return make_etag('furniture-facets', version, normalized_args()), updated_at
+
+
+def catalog_detail_validators(id):
+    version, updated_at = get_catalog_stamp()
+    return make_etag('furniture', id, version), updated_at
+
+
 @furnitures_bp.get('')
+@conditional_get(catalog_list_validators)
+@cached_response(version=get_catalog_version)
 def get_furnitures():
-    time.sleep(0.5)
+    # ?ids=1,2,3 が指定されていれば、一覧ではなく指定された家具だけを返す
+    if 'ids' in request.args:
+        return get_furnitures_by_ids()
 
     query = request.args.get('q')
     sort = request.args.get('sort')
@@ -22,20 +54,74 @@ def get_furnitures():
     except (ValueError, TypeError):
         page = 1 # 整数に変換できない場合は1ページ目にする
 
+    # cursor パラメータが付いている場合（空文字でも可）はキーセット方式で返す。
+    # 付いていない場合は従来通り page 番号方式（古いクライアント向け）。
+    cursor = request.args.get('cursor')
+
     PER_PAGE = 2
 
     stmt = select(Furniture)
     column = None
 
+    sort_map = {
+        'price': Furniture.price,
+        'created': Furniture.created_at,
+        'updated': Furniture.updated_at
+    }
     if sort and order:
-        sort_map = {
-            'price': Furniture.price,
-            'created': Furniture.created_at,
-            'updated': Furniture.updated_at
-        }
         column = sort_map.get(sort)
 
-    if column:
+    # fields= / view=summary が指定されていれば、そのカラムだけを SELECT する (backend/catalog/fields.py)。
+    # キーセットのカーソルを作るのに並び替えのカラムの値も要るので、一緒に読み込む
+    fields = requested_fields(request.args, PublicFurniture)
+    # min_price / max_price / color / featured / in_stock の絞り込み (backend/catalog/filters.py)
+    filters = parse_filters(request.args)
+
+    # カーソルにはソートキーと並び順も埋め込み、別の並び順のカーソルが使い回されないようにする
+    sort_key = sort if column else 'updated'
+    descending = order.lower() == 'desc' if column else True
+
+    # インメモリのカタログエンジンが有効なら SQL を使わずに返す (backend/catalog/snapshot.py)。
+    # 関連度順は全文検索のスコアが必要なので、SQL でしか扱えない
+    if catalog_snapshots.enabled and sort != 'relevance':
+        if cursor is not None:
+            output = catalog_snapshots.list_cursor(
+                PublicFurniture, fields, query, sort_key, descending, cursor, PER_PAGE, filters
+            )
+            return jsonify(output), 200
+        output = catalog_snapshots.list_page(
+            PublicFurniture, fields, query, sort_key, descending, page, PER_PAGE, filters
+        )
+        if output is None:
+            return jsonify({'message': 'Page not found', 'error_code':'PAGE_NOT_FOUND'}), 404
+        return jsonify(output), 200
+
+    if fields:
+        stmt = stmt.options(load_only(*load_only_columns(fields, column or Furniture.updated_at)))
+
+    stmt = apply_filters(stmt, filters)
+    rank = None
+    if query:
+        stmt, rank = apply_search(stmt, query)
+
+    if cursor is not None:
+        if sort == 'relevance':
+            # 関連度はクエリごとに計算される値なので、キーセットのキーにはできない
+            raise BadRequest('sort=relevance is not supported in cursor mode.')
+        furnitures, next_cursor = keyset_paginate(
+            stmt, sort_map[sort_key], Furniture.id, descending, sort_key, cursor, PER_PAGE
+        )
+        output = dump_trusted(PublicFurniture, furnitures, fields)
+
+        return jsonify({
+            'furnitures': output,
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None,
+        }), 200
+
+    if sort == 'relevance' and rank is not None:
+        stmt = stmt.order_by(desc(rank), asc(Furniture.id))
+    elif column:
         if order.lower() in ['desc']:
             stmt = stmt.order_by(desc(column))
         else:
@@ -43,13 +129,6 @@ def get_furnitures():
     else:
         stmt = stmt.order_by(desc(Furniture.updated_at))
 
-    if query:
-        stmt = stmt.where(or_(
-            Furniture.name.ilike(f'%{query}%'),
-            Furniture.description.ilike(f'%{query}%'),
-            Furniture.color.ilike(f'{query}%')
-        ))
-
     try:
         pagination = db.paginate(stmt, page=page, per_page=PER_PAGE, error_out=True)
     except:
@@ -59,7 +138,8 @@ def get_furnitures():
     furnitures = pagination.items
 
     print(furnitures)
-    output = [PublicFurniture.model_validate(furniture).model_dump() for furniture in furnitures]
+    # DB から読んだ値は書き込み時に検証済みなので、一覧では検証を省く (backend/serializers.py)
+    output = dump_trusted(PublicFurniture, furnitures, fields)
 
     return jsonify({
         'furnitures': output,
@@ -71,9 +151,68 @@ def get_furnitures():
     }), 200
 
 
+def parse_ids(raw, limit):
+    """カンマ区切りの id を、重複を除いて指定された順に並べたリストにする。不正な値や上限を超える件数は 400"""
+    ids = []
+    for part in raw.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise BadRequest(f'Invalid id: {part}.')
+        ids.append(int(part))
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise BadRequest('ids must not be empty.')
+    if len(ids) > limit:
+        raise BadRequest(f'Too many ids (max {limit}).')
+    return ids
+
+
+def get_furnitures_by_ids():
+    """
+    カート・お気に入り・閲覧履歴の画面向けに、複数の家具を1回の WHERE id IN (...) でまとめて返す。
+    結果は指定された順に並べ、存在しない id は missing で知らせる。
+    """
+    ids = parse_ids(request.args['ids'], current_app.config['FURNITURE_BATCH_MAX_IDS'])
+    fields = requested_fields(request.args, PublicFurniture)
+
+    if catalog_snapshots.enabled:
+        snapshot = catalog_snapshots.current()
+        found = {id: row for id in ids if (row := snapshot.get(id)) is not None}
+    else:
+        stmt = select(Furniture).where(Furniture.id.in_(ids))
+        if fields:
+            stmt = stmt.options(load_only(*load_only_columns(fields)))
+        found = {furniture.id: furniture for furniture in db.session.execute(stmt).scalars()}
+
+    return jsonify({
+        'furnitures': dump_trusted(PublicFurniture, [found[id] for id in ids if id in found], fields),
+        'missing': [id for id in ids if id not in found],
+    }), 200
+
+
+# 一覧の横に出す絞り込みの件数（色・おすすめ・価格帯）。q を指定すると検索結果の中での件数になる。
+# すべての件数を1つの集約クエリで数え (backend/catalog/facets.py)、結果はカタログのバージョンごとにキャッシュする
+@furnitures_bp.get('/facets')
+@conditional_get(catalog_facets_validators)
+@cached_response(version=get_catalog_version)
+def get_furniture_facets():
+    query = request.args.get('q')
+    if catalog_snapshots.enabled:
+        return jsonify(catalog_snapshots.facets(query)), 200
+    return jsonify(count_facets(query)), 200
+
+
 @furnitures_bp.get('/<int:id>')
+@conditional_get(catalog_detail_validators)
+@cached_response(version=get_catalog_version)
 def get_furniture(id):
-    time.sleep(0.5)
+    if catalog_snapshots.enabled:
+        row = catalog_snapshots.current().get(id)
+        if row is None:
+            raise NotFound(f'Furniture with id {id} not found.')
+        return jsonify(trusted_serializer(PublicFurniture)(row)), 200
 
     # DB接続エラーなどの場合には、sal_alchemyの例外が排出される。
     # IDに対応するレコードが見つからなかった場合にはNoneが返される
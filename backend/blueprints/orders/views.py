@@ -0,0 +1,65 @@
+from flask import Blueprint, jsonify, current_app
+from flask_jwt_extended import current_user, jwt_required
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.exceptions import NotFound
+
+from backend.decorators import json_required
+from backend.extensions import db
+from backend.models.furniture import Furniture
+from backend.models.order import Order, OrderItem
+from backend.schemas.order import CreateOrder, ReadOrder
+from backend.catalog.version import bump_catalog_version
+
+
+orders_bp = Blueprint('orders', __name__, url_prefix='/api/v1/orders')
+
+
+# 注文の確定
+# 在庫の引き当て (Furniture.reserve_stock)・注文・明細の INSERT を1つのトランザクションで行い、
+# どれか1つの家具でも在庫が足りなければ全体をロールバックする。
+@orders_bp.post('')
+@jwt_required()
+@json_required
+def create_order(payload):
+    dto = CreateOrder.model_validate(payload)
+    quantities = dto.quantities()
+
+    reserved, shortage = Furniture.reserve_stock(quantities)
+    if shortage is not None:
+        db.session.rollback()
+        available = db.session.execute(select(Furniture.stock).where(Furniture.id == shortage)).scalar_one_or_none()
+        if available is None:
+            raise NotFound(f'Furniture with id {shortage} not found.')
+        return jsonify({
+            'message': 'Not enough stock.',
+            'error_code': 'OUT_OF_STOCK',
+            'items': [{'furniture_id': shortage, 'requested': quantities[shortage], 'available': available}],
+        }), 409
+
+    # 単価は在庫を減らした UPDATE の RETURNING で読んだもの（引き当てと同じ時点の価格）
+    total = sum(row.price * quantities[row.id] for row in reserved)
+    order = Order(user_id=current_user.id, total=total)
+    db.session.add(order)
+    db.session.flush()
+    items = [
+        {'order_id': order.id, 'furniture_id': row.id, 'name': row.name, 'unit_price': row.price, 'quantity': quantities[row.id]}
+        for row in reserved
+    ]
+    db.session.execute(insert(OrderItem), items)
+    db.session.commit()
+
+    # 在庫数は公開APIにも出るので、カタログのバージョンを進めてキャッシュを無効にする。
+    # 注文のトランザクションの中で進めると、全ての注文が version_stamps の1行のロックを待つことになり、
+    # 別々の家具の注文まで直列になってしまう。そこでコミットの後に短いトランザクションで進める。
+    try:
+        bump_catalog_version()
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        current_app.logger.warning('Failed to bump the catalog version after order %s.', order.id)
+
+    output = ReadOrder.model_validate({
+        'id': order.id, 'total': order.total, 'created_at': order.created_at, 'items': items,
+    }).model_dump()
+    return jsonify({'order': output}), 201
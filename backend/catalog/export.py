@@ -0,0 +1,83 @@
+import csv
+import io
+import zlib
+
+from flask import current_app
+
+from backend.extensions import db
+from backend.models.furniture import Furniture
+from backend.schemas.furniture import ReadFurniture
+from backend.serializers import trusted_serializer
+
+
+# カタログのエクスポート (GET /api/v1/admin/furnitures/export と flask export-furnitures)
+# 全件をリストに読み込んでから書き出すと、メモリ使用量がカタログの大きさに比例する。ここでは
+#   - yield_per で EXPORT_BATCH_SIZE 行ずつ読み込み（PostgreSQL ではサーバーサイドカーソルになる）
+#   - 1行ずつ NDJSON / CSV に変換し、ある程度溜まったら書き出す
+#   - 必要なら zlib で gzip 形式に逐次圧縮する
+# ので、カタログが何行あってもメモリ使用量はほぼ一定になる。
+
+FORMATS = ('ndjson', 'csv')
+MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_BATCH_SIZE = 1000
+# この大きさまで溜めてから書き出す（1行ごとに書き出すとチャンクが細かくなりすぎる）
+FLUSH_BYTES = 64 * 1024
+
+FIELDS = list(ReadFurniture.model_fields)
+
+
+def iter_furnitures(stmt, mode='python'):
+    """
+    stmt の結果を少しずつ読み込みながら、ReadFurniture の dict を1件ずつ返す。
+    mode='python' では検証を省いた高速な経路 (backend/serializers.py) を使う。
+    """
+    # 並び順が同じ値の行の順序を固定する
+    stmt = stmt.order_by(Furniture.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    furnitures = db.session.execute(stmt).scalars()
+    if mode == 'python':
+        serialize = trusted_serializer(ReadFurniture)
+        for furniture in furnitures:
+            yield serialize(furniture)
+        return
+    for furniture in furnitures:
+        yield ReadFurniture.model_validate(furniture).model_dump(mode=mode)
+
+
+def iter_export(stmt, fmt):
+    """エクスポートの本文を str のチャンクで返す"""
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        # CSV はすべて文字列になるので、JSON 互換の値（ISO 8601 の日時など）にしてから書く。インポートでそのまま読み戻せる
+        rows = iter_furnitures(stmt, mode='json')
+        writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        rows = iter_furnitures(stmt)
+        # API のレスポンスと同じ JSON の形式（Decimal や datetime の表し方）で書く
+        dumps = current_app.json.dumps
+        write = lambda row: buffer.write(dumps(row) + '\n')
+
+    for row in rows:
+        write(row)
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode_chunks(chunks, compress=False):
+    """str のチャンクを UTF-8 のバイト列に変換し、compress なら gzip 形式に逐次圧縮する"""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+    # wbits=31 で gzip のヘッダーとトレーラーが付く
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+from sqlalchemy import select, func
+
+from backend.extensions import db
+from backend.models.furniture import Furniture
+from backend.schemas.furniture import FurnitureColor
+from backend.catalog.search import apply_search
+
+
+# ファセットの件数 (GET /api/v1/furnitures/facets)
+# 色ごと・おすすめかどうか・価格帯ごとの件数を、条件ごとに一覧 API を呼んで COUNT するのではなく、
+# 検索条件 (q) に合う行を1回だけ走査する1つの SELECT で数える。各件数は COUNT(*) FILTER (WHERE ...) の集約で、
+# GROUP BY すら要らないので結果は常に1行になる（FILTER 句は PostgreSQL と SQLite 3.30 以降で使える）。
+
+# 価格帯の境界。[0, 50), [50, 100), ..., [1000, 上限なし) の6つの帯になる
+PRICE_BOUNDARIES = tuple(Decimal(value) for value in ('50', '100', '200', '500', '1000'))
+
+
+def price_buckets():
+    """(下限, 上限) のリスト。上限が None の帯は上限なし"""
+    lower = (Decimal('0'),) + PRICE_BOUNDARIES
+    upper = PRICE_BOUNDARIES + (None,)
+    return list(zip(lower, upper))
+
+
+def _in_bucket(column, lower, upper):
+    if upper is None:
+        return column >= lower
+    return (column >= lower) & (column < upper)
+
+
+def facet_statement(query=None):
+    """すべてのファセットの件数を1行で返す SELECT"""
+    count = func.count()
+    aggregates = [count.label('total')]
+    aggregates += [
+        count.filter(Furniture.color == color.value).label(f'color_{color.value}') for color in FurnitureColor
+    ]
+    aggregates += [
+        count.filter(Furniture.featured.is_(True)).label('featured_true'),
+        count.filter(Furniture.featured.is_(False)).label('featured_false'),
+    ]
+    aggregates += [
+        count.filter(_in_bucket(Furniture.price, lower, upper)).label(f'price_{i}')
+        for i, (lower, upper) in enumerate(price_buckets())
+    ]
+    stmt = select(*aggregates).select_from(Furniture)
+    if query:
+        stmt, _ = apply_search(stmt, query)
+    return stmt
+
+
+def build_facets(total, colors, featured, prices):
+    """件数をレスポンスの形にする。colors は色ごと、prices は price_buckets() の順の件数"""
+    return {
+        'total': total,
+        'colors': {color.value: colors.get(color.value, 0) for color in FurnitureColor},
+        'featured': {'true': featured[True], 'false': featured[False]},
+        'price': [
+            {'min': lower, 'max': upper, 'count': count}
+            for (lower, upper), count in zip(price_buckets(), prices)
+        ],
+    }
+
+
+def count_facets(query=None):
+    row = db.session.execute(facet_statement(query)).one()._mapping
+    return build_facets(
+        row['total'],
+        {color.value: row[f'color_{color.value}'] for color in FurnitureColor},
+        {True: row['featured_true'], False: row['featured_false']},
+        [row[f'price_{i}'] for i in range(len(price_buckets()))],
+    )
@@ -0,0 +1,48 @@
+from werkzeug.exceptions import BadRequest
+
+from backend.models.furniture import Furniture
+
+
+# 一覧で返すフィールドの指定 (?fields=name,price または ?view=summary)
+# 商品グリッドには id, name, price, color, image_url, featured しか要らないのに、最大1000文字の description まで
+# 読み込んで返していた。指定されたフィールドのカラムだけを SELECT し (load_only)、レスポンスにもそれだけを入れる。
+# id はキーセットページネーションや詳細ページへのリンクに必要なので、常に含める。
+
+VIEWS = {
+    'summary': ('id', 'name', 'price', 'color', 'image_url', 'featured'),
+}
+
+
+def requested_fields(args, schema):
+    """
+    fields= / view= から、出力するフィールド名のタプルを schema の順序で返す。
+    どちらも指定されていなければ None（全フィールド）。
+    """
+    view = args.get('view')
+    fields = args.get('fields')
+    if view and fields:
+        raise BadRequest('Specify either fields or view, not both.')
+
+    if view:
+        if view == 'full':
+            return None
+        if view not in VIEWS:
+            raise BadRequest(f'Unknown view: {view}.')
+        names = set(VIEWS[view])
+    elif fields:
+        names = {name.strip() for name in fields.split(',') if name.strip()}
+        unknown = names - set(schema.model_fields)
+        if unknown:
+            raise BadRequest(f'Unknown fields: {", ".join(sorted(unknown))}.')
+    else:
+        return None
+
+    names.add('id')
+    return tuple(name for name in schema.model_fields if name in names)
+
+
+def load_only_columns(fields, *extra):
+    """fields と、並び替えなどに必要な extra のカラムの属性 (load_only に渡す)"""
+    columns = [getattr(Furniture, name) for name in fields]
+    columns += [column for column in extra if column is not None and column.key not in fields]
+    return columns
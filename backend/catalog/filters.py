@@ -0,0 +1,70 @@
+from decimal import Decimal, InvalidOperation
+
+from werkzeug.exceptions import BadRequest
+
+from backend.models.furniture import Furniture
+from backend.schemas.furniture import FurnitureColor
+
+
+# 一覧の絞り込み (?min_price=&max_price=&color=&featured=&in_stock=)
+# 公開APIと管理画面の一覧（とエクスポート）で共通。クライアントがページを全部取ってきて価格帯や在庫で
+# 絞り込まなくて済むよう、条件は WHERE 句にする。color / featured の等値条件と並び替えのカラムを合わせた
+# (color, price, id) などの複合インデックス (models/furniture.py) により、絞り込んだうえで並んだページを
+# インデックスの範囲スキャンだけで取り出せる。
+
+FILTER_PARAMS = ('min_price', 'max_price', 'color', 'featured', 'in_stock')
+
+_COLORS = {color.value for color in FurnitureColor}
+
+
+def _parse_bool(name, raw):
+    if raw.lower() not in ('true', 'false'):
+        raise BadRequest(f'{name} must be true or false.')
+    return raw.lower() == 'true'
+
+
+def _parse_price(name, raw):
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise BadRequest(f'{name} must be a number.')
+    if not value.is_finite() or value < 0:
+        raise BadRequest(f'{name} must be a non-negative number.')
+    return value
+
+
+def parse_filters(args):
+    """
+    args (request.args などのマッピング) から絞り込み条件の dict を作る。指定のない条件は含めない。
+    値が不正なら 400。
+    """
+    filters = {}
+    for name in ('min_price', 'max_price'):
+        if args.get(name):
+            filters[name] = _parse_price(name, args[name])
+    if args.get('color'):
+        if args['color'] not in _COLORS:
+            raise BadRequest(f'Unknown color: {args["color"]}.')
+        filters['color'] = args['color']
+    for name in ('featured', 'in_stock'):
+        if args.get(name):
+            filters[name] = _parse_bool(name, args[name])
+
+    if 'min_price' in filters and 'max_price' in filters and filters['min_price'] > filters['max_price']:
+        raise BadRequest('min_price must not be greater than max_price.')
+    return filters
+
+
+def apply_filters(stmt, filters):
+    """parse_filters() の条件を stmt の WHERE 句に付ける"""
+    if 'min_price' in filters:
+        stmt = stmt.where(Furniture.price >= filters['min_price'])
+    if 'max_price' in filters:
+        stmt = stmt.where(Furniture.price <= filters['max_price'])
+    if 'color' in filters:
+        stmt = stmt.where(Furniture.color == filters['color'])
+    if 'featured' in filters:
+        stmt = stmt.where(Furniture.featured.is_(filters['featured']))
+    if 'in_stock' in filters:
+        stmt = stmt.where(Furniture.stock > 0 if filters['in_stock'] else Furniture.stock == 0)
+    return stmt
@@ -0,0 +1,131 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from backend.extensions import db
+from backend.models.furniture import Furniture
+from backend.schemas.furniture import CreateFurniture
+from backend.catalog.version import bump_catalog_version
+
+
+# 家具の一括インポート (POST /api/v1/admin/furnitures/import と flask import-furnitures)
+# 1件ずつ POST すると、行ごとにバリデーション・INSERT・コミット・HTTP の往復が発生する。ここでは
+#   - NDJSON / CSV を1行ずつ読み（ファイル全体をメモリに載せない）
+#   - CHUNK_SIZE 行ごとに TypeAdapter(list[CreateFurniture]) でまとめて検証し
+#   - 検証を通った行を1つの INSERT ... VALUES (...), (...) ... ON CONFLICT (name) DO UPDATE で書き込んでコミットする
+# 同じ名前の家具が既にあれば上書きする（upsert）。検証に失敗した行は飛ばして、行番号とエラーを報告する。
+
+FORMATS = ('ndjson', 'csv')
+CHUNK_SIZE = 1000
+# レスポンスに含めるエラーの最大件数（10万行すべてが不正でもレスポンスが膨らまないように）
+MAX_REPORTED_ERRORS = 1000
+
+_rows_adapter = TypeAdapter(list[CreateFurniture])
+
+# 既存の行を上書きするときに更新するカラム
+UPSERT_COLUMNS = ('description', 'color', 'price', 'featured', 'stock', 'image_url')
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def to_dict(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def read_records(binary_stream, fmt):
+    """バイト列のストリームから (行番号, dict または None, 読み取りエラー) を1行ずつ返す"""
+    text = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            # CSV では空欄を「値なし」として扱う（image_url は省略可）
+            if record.get('image_url') == '':
+                record['image_url'] = None
+            yield reader.line_num, record, None
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, {'root': [f'Invalid JSON: {e.msg}']}
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, {'root': ['Each line must be a JSON object.']}
+            continue
+        yield line_no, record, None
+
+
+def import_furnitures(records, chunk_size=CHUNK_SIZE):
+    """read_records() の結果を chunk_size 行ずつ検証して upsert する。チャンクごとにコミットする"""
+    result = ImportResult()
+    records = iter(records)
+    while chunk := list(islice(records, chunk_size)):
+        rows = []
+        for line_no, record, error in chunk:
+            if error:
+                result.add_error(line_no, error)
+            else:
+                rows.append((line_no, record))
+        valid = _validate(rows, result)
+        if valid:
+            _upsert(valid)
+            bump_catalog_version()
+            db.session.commit()
+            result.imported += len(valid)
+    return result
+
+
+def _validate(rows, result):
+    """まとめて検証し、通った行を INSERT 用の dict のリストで返す。失敗した行は result に記録する"""
+    try:
+        furnitures = _rows_adapter.validate_python([record for _, record in rows])
+    except ValidationError as e:
+        # 失敗した行を取り除いて、残りをもう一度まとめて検証する
+        errors_by_index = {}
+        for err in e.errors():
+            index, field = err['loc'][0], (err['loc'][1] if len(err['loc']) > 1 else 'root')
+            errors_by_index.setdefault(index, {}).setdefault(field, []).append(err['msg'])
+        for index, errors in errors_by_index.items():
+            result.add_error(rows[index][0], errors)
+        rows = [row for i, row in enumerate(rows) if i not in errors_by_index]
+        furnitures = _rows_adapter.validate_python([record for _, record in rows])
+
+    # 同じチャンクに同じ名前が複数あると1つの文で同じ行を2回更新することになるので、後の行を優先する
+    by_name = {}
+    for furniture in furnitures:
+        by_name[furniture.name] = furniture.model_dump()
+    return list(by_name.values())
+
+
+def _upsert(rows):
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    stmt = insert(Furniture).values(rows)
+    updates = {name: stmt.excluded[name] for name in UPSERT_COLUMNS}
+    # ON CONFLICT DO UPDATE では onupdate もバージョンの管理も働かないので、updated_at と version は明示的に更新する
+    updates['updated_at'] = func.now()
+    updates['version'] = Furniture.__table__.c.version + 1
+    db.session.execute(stmt.on_conflict_do_update(index_elements=[Furniture.name], set_=updates))
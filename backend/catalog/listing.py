@@ -0,0 +1,51 @@
+from sqlalchemy import select, desc, asc
+
+from backend.models.furniture import Furniture
+from backend.catalog.search import apply_search
+from backend.catalog.filters import parse_filters, apply_filters
+
+
+# 管理画面の家具一覧 (GET /api/v1/admin/furnitures) の絞り込みと並び順。
+# エクスポート (backend/catalog/export.py) も同じ条件で出力できるよう、クエリパラメータの解釈をここにまとめる。
+
+ADMIN_SORT_MAP = {
+    'price': Furniture.price,
+    'stock': Furniture.stock,
+    'created': Furniture.created_at,
+    'updated': Furniture.updated_at
+}
+
+
+def admin_furniture_statement(args):
+    """
+    args (request.args などのマッピング) の q / sort / order と絞り込み条件 (backend/catalog/filters.py) から、
+    並び順まで付けた select(Furniture) を作る
+    """
+    # q パラメータがURLに含まれていない場合、None を返す。
+    query = args.get('q')
+    sort = args.get('sort')
+    order = args.get('order')
+
+    # もし、order_by を省略すると、データベースが、最も効率的だと判断した順序でデータを返します。
+    # データが物理的にディスクに保存されている順序かもしれませんし、何らかのインデックスを利用した結果かもしれません
+    stmt = apply_filters(select(Furniture), parse_filters(args))
+    column = None
+
+    if sort and order:
+        # クライアントからの sort パラメータをカラム名にマッピング
+        column = ADMIN_SORT_MAP.get(sort)
+
+    rank = None
+    if query:
+        stmt, rank = apply_search(stmt, query)
+
+    if sort == 'relevance' and rank is not None:
+        stmt = stmt.order_by(desc(rank), asc(Furniture.id))
+    elif column:
+        if order.lower() in ['desc']:
+            stmt = stmt.order_by(desc(column))
+        else:
+            stmt = stmt.order_by(asc(column))
+    else:
+        stmt = stmt.order_by(desc(Furniture.updated_at))
+    return stmt
@@ -0,0 +1,58 @@
+import re
+
+from sqlalchemy import func, literal_column, or_, false, table, column
+
+from backend.extensions import db
+from backend.models.furniture import Furniture
+
+
+# 全文検索
+# ilike '%q%' は先頭がワイルドカードなので b-tree インデックスが使えず、description (最大1000文字) を含めた
+# シーケンシャルスキャンになる。そこで DB ごとに転置インデックスを使う検索に切り替える。
+#   - PostgreSQL: 生成列 furnitures.search_vector (tsvector) + GIN インデックス
+#   - SQLite    : FTS5 の外部コンテンツテーブル furnitures_fts (トリガーで同期。テストはこちらで動く)
+# どちらもスキーマは models/furniture.py の DDL とマイグレーションで作成される。
+# 入力は単語に分割し、各単語を前方一致で AND 検索する（"chai" で "chair" にもヒットする）。
+
+TS_CONFIG = 'english'
+
+_fts_table = table('furnitures_fts', column('rowid'))
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    return _TOKEN_PATTERN.findall(query.lower())
+
+
+def apply_search(stmt, query):
+    """
+    stmt に全文検索の条件を付ける。
+    戻り値は (stmt, rank)。rank は「大きいほど関連度が高い」SQL式で、sort=relevance に使う。
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        # 記号だけの検索語などは何にもヒットしない（以前の ilike と同じ挙動）
+        return stmt.where(false()), None
+
+    dialect = db.engine.dialect.name
+
+    if dialect == 'postgresql':
+        tsquery = func.to_tsquery(TS_CONFIG, ' & '.join(f'{token}:*' for token in tokens))
+        vector = literal_column('furnitures.search_vector')
+        stmt = stmt.where(vector.op('@@')(tsquery))
+        return stmt, func.ts_rank_cd(vector, tsquery)
+
+    if dialect == 'sqlite':
+        match = ' AND '.join(f'"{token}"*' for token in tokens)
+        fts = literal_column('furnitures_fts')
+        stmt = stmt.join(_fts_table, _fts_table.c.rowid == Furniture.id).where(fts.op('MATCH')(match))
+        # bm25() は小さいほど関連度が高いので符号を反転する
+        return stmt, -func.bm25(fts)
+
+    # 全文検索の仕組みがないDBでは従来の ilike にフォールバックする
+    return stmt.where(or_(
+        Furniture.name.ilike(f'%{query}%'),
+        Furniture.description.ilike(f'%{query}%'),
+        Furniture.color.ilike(f'{query}%')
+    )), None
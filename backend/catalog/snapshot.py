@@ -0,0 +1,269 @@
+import math
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from sqlalchemy import select
+
+from backend.extensions import db
+from backend.models.furniture import Furniture
+from backend.catalog.search import tokenize
+from backend.catalog.version import get_catalog_version
+from backend.catalog.facets import build_facets, price_buckets
+from backend.pagination import encode_cursor, decode_cursor
+from backend.serializers import trusted_serializer
+
+
+# インメモリのカタログエンジン (CATALOG_ENGINE = 'memory')
+# カタログは RAM に対して小さく、書き込みより読み取りがはるかに多い。そこで furnitures の全行をプロセス内に持ち、
+# 公開APIの一覧（絞り込み・並び替え・ページング）を SQL を使わずに返す。
+#   - 行: id の昇順に並べた namedtuple のリスト（位置 = 行番号）
+#   - 並び替え: price / created / updated ごとに、(値, id) の昇順に並べた行番号の配列 (array('l'))
+#   - 絞り込み: color / featured → 行番号の集合、価格の範囲 → 価格順の配列の二分探索、
+#               name / color / description の単語 → 行番号の集合（前方一致は単語の二分探索）
+# スナップショットはカタログのバージョン (backend/catalog/version.py) に紐付けて作り、管理者の書き込みでバージョンが
+# 進んだら作り直す。そのとき全行を読み直すのではなく、(id, version) だけを読んで差分の行だけを取得する。
+#
+# 既知の違い:
+#   - 検索は単語の前方一致の AND。SQL の全文検索のような語幹処理 (chairs → chair) はしない
+#   - sort=relevance は SQL でしか扱えないので、その場合は呼び出し側が SQL にフォールバックする
+#   - 並び順が同じ値の行は、常に id の順に並ぶ（SQL のページ番号方式では順序が決まっていない）
+
+SORT_KEYS = {
+    'price': 'price',
+    'created': 'created_at',
+    'updated': 'updated_at',
+}
+
+COLUMNS = tuple(column.key for column in Furniture.__table__.columns)
+FurnitureRow = namedtuple('FurnitureRow', COLUMNS)
+
+# 差分の行を id IN (...) で読むときの1回あたりの件数
+FETCH_CHUNK_SIZE = 500
+
+
+class CatalogSnapshot:
+    """ある時点のカタログ全体。作成後は変更しないので、ロックなしで複数のスレッドから読める"""
+
+    def __init__(self, version, rows, previous=None):
+        self.version = version
+        self.rows = sorted(rows, key=lambda row: row.id)
+        self.positions = {row.id: i for i, row in enumerate(self.rows)}
+
+        self.sorted = {}
+        for sort_key, attr in SORT_KEYS.items():
+            order = sorted(range(len(self.rows)), key=lambda i: (getattr(self.rows[i], attr), self.rows[i].id))
+            self.sorted[sort_key] = array('l', order)
+
+        # 行ごとの単語は、前回のスナップショットから変わっていない行ならそのまま使う（作り直しで重いのは分かち書き）
+        self.row_tokens = []
+        self.by_color = {}
+        self.by_featured = {True: set(), False: set()}
+        tokens = {}
+        for i, row in enumerate(self.rows):
+            self.by_color.setdefault(row.color, set()).add(i)
+            self.by_featured[bool(row.featured)].add(i)
+            position = previous.positions.get(row.id) if previous is not None else None
+            if position is not None and previous.rows[position] is row:
+                words = previous.row_tokens[position]
+            else:
+                words = frozenset(tokenize(f'{row.name} {row.color} {row.description}'))
+            self.row_tokens.append(words)
+            for token in words:
+                tokens.setdefault(token, set()).add(i)
+        self.tokens = tokens
+        self.token_list = sorted(tokens)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, id):
+        position = self.positions.get(id)
+        return None if position is None else self.rows[position]
+
+    def _sort_key(self, sort_key, position):
+        row = self.rows[position]
+        return getattr(row, SORT_KEYS[sort_key]), row.id
+
+    def search(self, query):
+        """単語ごとに前方一致する行の集合を求め、その積集合を返す"""
+        words = tokenize(query)
+        if not words:
+            return set()
+        result = None
+        for word in words:
+            matched = set()
+            start = bisect_left(self.token_list, word)
+            for token in self.token_list[start:]:
+                if not token.startswith(word):
+                    break
+                matched |= self.tokens[token]
+            result = matched if result is None else result & matched
+            if not result:
+                return set()
+        return result
+
+    def filter(self, query=None, color=None, featured=None, in_stock=None, min_price=None, max_price=None):
+        """条件 (backend/catalog/filters.py と同じ) に合う行番号の集合を返す。条件がなければ None（全行）"""
+        candidates = None
+
+        def narrow(matched):
+            return matched if candidates is None else candidates & matched
+
+        if query:
+            candidates = self.search(query)
+        if color is not None:
+            candidates = narrow(self.by_color.get(color, set()))
+        if featured is not None:
+            candidates = narrow(self.by_featured[featured])
+        if min_price is not None or max_price is not None:
+            # 価格の範囲は、価格順の配列を二分探索して切り出す
+            order = self.sorted['price']
+            key = lambda position: self.rows[position].price
+            start = 0 if min_price is None else bisect_left(order, min_price, key=key)
+            end = len(order) if max_price is None else bisect_right(order, max_price, key=key)
+            candidates = narrow(set(order[start:end]))
+        if in_stock is not None:
+            if candidates is None:
+                candidates = set(range(len(self.rows)))
+            candidates = {p for p in candidates if (self.rows[p].stock > 0) == in_stock}
+        return candidates
+
+    def ordered(self, sort_key, descending, candidates=None, after=None):
+        """
+        並び順に行番号を1つずつ返す。candidates が指定されていればその行だけを返す。
+        after = (値, id) を指定すると、その位置より後ろから返す（キーセット方式）。
+        """
+        order = self.sorted[sort_key]
+        key = lambda position: self._sort_key(sort_key, position)
+        if descending:
+            end = len(order) if after is None else bisect_left(order, after, key=key)
+            positions = (order[i] for i in range(end - 1, -1, -1))
+        else:
+            start = 0 if after is None else bisect_right(order, after, key=key)
+            positions = (order[i] for i in range(start, len(order)))
+        if candidates is None:
+            return positions
+        return (position for position in positions if position in candidates)
+
+
+class CatalogSnapshotEngine:
+
+    def __init__(self):
+        self.enabled = False
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('CATALOG_ENGINE', 'sql') == 'memory'
+        self._snapshot = None
+        app.extensions['catalog_snapshots'] = self
+
+    def clear(self):
+        self._snapshot = None
+
+    def current(self):
+        """現在のカタログのバージョンのスナップショット。バージョンが進んでいれば差分を取り込んで作り直す"""
+        version = get_catalog_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        # 作り直している間に来たリクエストは待たせる（古いスナップショットを新しいバージョンとしてキャッシュさせないため）
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._rebuild(snapshot, version)
+                self._snapshot = snapshot
+        return snapshot
+
+    def _rebuild(self, previous, version):
+        if previous is None:
+            rows = [FurnitureRow(*row) for row in db.session.execute(select(*Furniture.__table__.columns))]
+            return CatalogSnapshot(version, rows)
+
+        # (id, version) だけを読んで、追加・変更・削除された行を見つける。
+        # version は行を書き換えるすべての経路で1つずつ進む (models/furniture.py) ので、値が違えば変更されている
+        stamps = db.session.execute(select(Furniture.id, Furniture.version)).all()
+        changed = []
+        for id, row_version in stamps:
+            row = previous.get(id)
+            if row is None or row.version != row_version:
+                changed.append(id)
+
+        rows = {id: previous.get(id) for id, _ in stamps if previous.get(id) is not None}
+        for start in range(0, len(changed), FETCH_CHUNK_SIZE):
+            chunk = changed[start:start + FETCH_CHUNK_SIZE]
+            stmt = select(*Furniture.__table__.columns).where(Furniture.id.in_(chunk))
+            for row in db.session.execute(stmt):
+                rows[row.id] = FurnitureRow(*row)
+        return CatalogSnapshot(version, rows.values(), previous)
+
+    def list_page(self, schema, fields, query, sort_key, descending, page, per_page, filters=None):
+        """
+        ページ番号方式の一覧。db.paginate を使う SQL の経路と同じ形の dict を返す。
+        ページ番号が範囲外なら None。
+        """
+        snapshot = self.current()
+        candidates = snapshot.filter(query, **(filters or {}))
+        total = len(snapshot) if candidates is None else len(candidates)
+        pages = math.ceil(total / per_page) if total else 0
+        if page > 1 and page > pages:
+            return None
+
+        positions = snapshot.ordered(sort_key, descending, candidates)
+        offset = (page - 1) * per_page
+        selected = [snapshot.rows[p] for _, p in zip(range(offset + per_page), positions)][offset:]
+        serialize = trusted_serializer(schema, fields)
+        return {
+            'furnitures': [serialize(row) for row in selected],
+            'total_items': total,
+            'total_pages': pages,
+            'current_page': page,
+            'has_next': page < pages,
+            'has_prev': page > 1,
+        }
+
+    def list_cursor(self, schema, fields, query, sort_key, descending, cursor, per_page, filters=None):
+        """キーセット方式の一覧。カーソルは SQL の経路と同じ形式なので、途中で切り替えても続きから読める"""
+        snapshot = self.current()
+        candidates = snapshot.filter(query, **(filters or {}))
+        after = None
+        if cursor:
+            column = getattr(Furniture, SORT_KEYS[sort_key])
+            after = decode_cursor(cursor, sort_key, descending, column)
+
+        positions = snapshot.ordered(sort_key, descending, candidates, after)
+        selected = [snapshot.rows[p] for _, p in zip(range(per_page + 1), positions)]
+        items = selected[:per_page]
+
+        next_cursor = None
+        if len(selected) > per_page:
+            last = items[-1]
+            next_cursor = encode_cursor(sort_key, descending, getattr(last, SORT_KEYS[sort_key]), last.id)
+        serialize = trusted_serializer(schema, fields)
+        return {
+            'furnitures': [serialize(row) for row in items],
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None,
+        }
+
+    def facets(self, query=None):
+        """GET /api/v1/furnitures/facets と同じ件数を、条件に合う行を1回走査して数える"""
+        snapshot = self.current()
+        candidates = snapshot.filter(query)
+        positions = range(len(snapshot)) if candidates is None else candidates
+        buckets = price_buckets()
+        colors, featured, prices = {}, {True: 0, False: 0}, [0] * len(buckets)
+        for position in positions:
+            row = snapshot.rows[position]
+            colors[row.color] = colors.get(row.color, 0) + 1
+            featured[bool(row.featured)] += 1
+            for i, (lower, upper) in enumerate(buckets):
+                if row.price >= lower and (upper is None or row.price < upper):
+                    prices[i] += 1
+                    break
+        return build_facets(len(positions), colors, featured, prices)
+
+
+catalog_snapshots = CatalogSnapshotEngine()
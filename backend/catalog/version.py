@@ -0,0 +1,27 @@
+from flask import g
+
+from backend.models.version_stamp import VersionStamp
+
+
+# カタログ (furnitures テーブル) のバージョン番号。
+# 管理者が家具を作成・更新・削除するたびに同じトランザクションの中で bump_catalog_version() を呼ぶ。
+# 公開APIのレスポンスキャッシュはこの番号をキーに含めるので、書き込み後の最初のリクエストから新しいデータが返る。
+# ETag / Last-Modified (backend/conditional.py) もこの番号と更新日時から作る。
+
+CATALOG = 'catalog'
+
+
+def get_catalog_stamp():
+    """(バージョン, 最後に更新された日時)。1リクエストの中では一度だけDBに問い合わせる"""
+    if 'catalog_stamp' not in g:
+        g.catalog_stamp = VersionStamp.current_with_timestamp(CATALOG)
+    return g.catalog_stamp
+
+
+def get_catalog_version():
+    return get_catalog_stamp()[0]
+
+
+def bump_catalog_version():
+    VersionStamp.bump(CATALOG)
+    g.pop('catalog_stamp', None)
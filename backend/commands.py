@@ -0,0 +1,83 @@
+import threading
+
+import click
+
+from backend.models.blocked_token import BlockedToken
+from backend.catalog.importer import FORMATS, CHUNK_SIZE, read_records, import_furnitures
+from backend.catalog import export
+from backend.catalog.listing import admin_furniture_statement
+from backend.periodic import start_periodic_task
+from backend.last_seen import last_seen
+
+
+# flask コマンドとして実行できる管理用のコマンド
+#   flask --app app prune-blocked-tokens --batch-size 500
+# docker compose の場合は: docker compose run --rm backend flask prune-blocked-tokens
+
+
+def register_commands(app):
+
+    @app.cli.command('prune-blocked-tokens')
+    @click.option('--batch-size', default=1000, show_default=True, help='1トランザクションで削除する行数')
+    def prune_blocked_tokens(batch_size):
+        """期限切れのトークンを blocked_tokens から削除する"""
+        deleted = BlockedToken.prune_expired(batch_size=batch_size)
+        click.echo(f'Deleted {deleted} expired blocked tokens.')
+
+    @app.cli.command('import-furnitures')
+    @click.argument('file', type=click.File('rb'))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), help='省略時はファイルの拡張子から判断する')
+    @click.option('--chunk-size', default=CHUNK_SIZE, show_default=True, help='1トランザクションで upsert する行数')
+    def import_furnitures_command(file, fmt, chunk_size):
+        """NDJSON または CSV のファイルから家具を一括で upsert する（- で標準入力）"""
+        fmt = fmt or ('csv' if file.name.endswith('.csv') else 'ndjson')
+        result = import_furnitures(read_records(file, fmt), chunk_size=chunk_size)
+        for error in result.errors:
+            click.echo(f"line {error['line']}: {error['errors']}", err=True)
+        click.echo(f'Imported {result.imported} furnitures, {result.failed} failed.')
+
+    @app.cli.command('export-furnitures')
+    @click.argument('output', type=click.File('wb'), default='-')
+    @click.option('--format', 'fmt', type=click.Choice(export.FORMATS), default='ndjson', show_default=True)
+    @click.option('--gzip', 'compress', is_flag=True, help='gzip で圧縮して書き出す')
+    @click.option('--q', help='管理画面の一覧と同じ検索キーワード')
+    @click.option('--sort', help='price / stock / created / updated / relevance')
+    @click.option('--order', help='asc / desc')
+    def export_furnitures_command(output, fmt, compress, q, sort, order):
+        """家具を NDJSON または CSV で書き出す（省略時は標準出力）"""
+        stmt = admin_furniture_statement({'q': q, 'sort': sort, 'order': order})
+        for chunk in export.encode_chunks(export.iter_export(stmt, fmt), compress=compress):
+            output.write(chunk)
+
+
+def register_background_tasks(app):
+    # flask db upgrade などの CLI コマンドでも create_app は呼ばれるので、create_app の中ではスレッドを起動せず、
+    # 最初のリクエストを受けたとき（= gunicorn のワーカーや flask run でリクエストを処理しているとき）に起動する。
+    tasks = []
+
+    # BLOCKLIST_PRUNE_INTERVAL (秒) が設定されていれば、cron の代わりにプロセス内で定期的に削除する
+    interval = app.config.get('BLOCKLIST_PRUNE_INTERVAL')
+    if interval:
+        batch_size = app.config.get('BLOCKLIST_PRUNE_BATCH_SIZE', 1000)
+        tasks.append(('prune-blocked-tokens', interval, lambda: BlockedToken.prune_expired(batch_size=batch_size)))
+
+    # 最終ログイン日時のバッファは、リクエストが来なくても LAST_SEEN_FLUSH_INTERVAL 秒ごとに書き込む
+    flush_interval = app.config.get('LAST_SEEN_FLUSH_INTERVAL')
+    if flush_interval:
+        tasks.append(('flush-last-seen', flush_interval, last_seen.flush))
+
+    if not tasks:
+        return
+    started = threading.Event()
+    lock = threading.Lock()
+
+    @app.before_request
+    def start_background_tasks():
+        if started.is_set():
+            return
+        with lock:
+            if started.is_set():
+                return
+            for name, task_interval, func in tasks:
+                start_periodic_task(app, name, task_interval, func)
+            started.set()
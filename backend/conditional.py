@@ -0,0 +1,89 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import current_app, request
+from werkzeug.exceptions import PreconditionRequired
+from werkzeug.http import is_resource_modified
+
+
+# 条件付き GET (ETag / Last-Modified / 304 Not Modified)
+# view 関数を実行する前に、安いクエリ（バージョン番号の取得など）だけで検証子を計算し、
+# クライアントの If-None-Match / If-Modified-Since と一致すれば、行の読み込みもシリアライズもせずに 304 を返す。
+
+
+def make_etag(*parts):
+    """検証子の材料から ETag の値を作る。材料が同じなら必ず同じ値になる"""
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()[:32]
+
+
+def normalized_args():
+    """クエリパラメータをキー順に並べたもの（ETag の材料用）。?cursor= のように空の値にも意味があるので除かない"""
+    return sorted(request.args.items(multi=True))
+
+
+def conditional_get(validators, cache_control='no-cache', vary=None):
+    """
+    validators は view と同じ引数を受け取り、(etag, last_modified) を返す関数。
+    last_modified が分からない場合は None を返してよい。
+    cache_control は、CDN やブラウザに「キャッシュしてよいが、使う前に必ず再検証すること」を伝えるために付ける。
+    vary には、ユーザーごとに内容が変わるレスポンスで Authorization などのヘッダー名を指定する。
+    """
+    def decorator(view):
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = validators(*args, **kwargs)
+            if last_modified is not None and last_modified.tzinfo is None:
+                # SQLite はタイムゾーンなしの datetime を返すので UTC として扱う
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            # 同じ内容でも Content-Encoding などでバイト列が変わりうるので弱い ETag にする
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = cache_control
+            if vary:
+                response.vary.update(vary)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+# 条件付きの更新・削除 (If-Match)
+# 管理画面の家具の ETag は行のバージョン番号 (Furniture.version) そのもの。更新・削除のリクエストでは
+# If-Match で送られてきたバージョンを UPDATE/DELETE ... WHERE version IN (...) の条件にするので、
+# 事前に SELECT して比べる必要がない（比べてから書くまでの間に他の更新が割り込むこともない）。
+
+
+def version_etag(version):
+    """行のバージョン番号から強い ETag の値を作る"""
+    return f'v{version}'
+
+
+def if_match_versions():
+    """
+    If-Match のバージョン番号の集合。If-Match: * なら None（存在さえすればよい）。
+    If-Match がなければ 428。バージョンの形でない ETag は、どの行にも一致しないものとして無視する。
+    """
+    if not request.headers.get('If-Match'):
+        raise PreconditionRequired('This request requires an If-Match header.')
+    if_match = request.if_match
+    if if_match.star_tag:
+        return None
+    versions = set()
+    # If-Match は強い比較なので、弱い ETag (W/"...") は一致しない
+    for tag in if_match.as_set():
+        if tag.startswith('v') and tag[1:].isdigit():
+            versions.add(int(tag[1:]))
+    return versions
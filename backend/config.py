@@ -28,6 +28,66 @@ class BaseConfig():
 
     JWT_REFRESH_COOKIE_NAME = 'refresh_token_furniture_site'
     JWT_REFRESH_COOKIE_SAMESITE = 'Lax'
+
+    # ブロックリストのプロセス内 Bloom フィルタ (backend/blocklist.py)
+    # SYNC_INTERVAL 秒ごとに blocked_tokens の差分を取り込む。他のワーカーでブロックされたトークンは、
+    # 最大でこの秒数だけフィルタに反映されない（リフレッシュトークンは常に DB で確認する）。
+    # SYNC_RESCAN_IDS は、id の順とコミットの順が入れ替わった行を拾うために毎回読み直す直前の件数。
+    JWT_BLOCKLIST_FILTER_ENABLED = True
+    JWT_BLOCKLIST_FILTER_CAPACITY = 100_000
+    JWT_BLOCKLIST_FILTER_ERROR_RATE = 0.001
+    JWT_BLOCKLIST_SYNC_INTERVAL = 1.0
+    JWT_BLOCKLIST_SYNC_RESCAN_IDS = 256
+    JWT_BLOCKLIST_POSITIVE_CACHE_SIZE = 1024
+
+    # リフレッシュトークンの再利用の猶予期間 (backend/refresh_rotation.py)
+    # この秒数以内に同じリフレッシュトークンが再び使われた場合は、複数タブからの同時リフレッシュとみなす。
+    # それより後の再利用は盗まれたトークンの再利用とみなし、トークンファミリーごと失効させる。
+    JWT_REFRESH_REUSE_GRACE_SECONDS = 10
+    JWT_REFRESH_RESULT_CACHE_SIZE = 10_000
+
+    # トークンの世代番号のキャッシュ (backend/token_epochs.py)。他のワーカーでの世代変更は最大 TTL 秒遅れて反映される。
+    JWT_TOKEN_EPOCH_CACHE_TTL = 30
+    JWT_TOKEN_EPOCH_CACHE_SIZE = 10_000
+
+    # user_lookup_loader が返すユーザーのスナップショットのキャッシュ (backend/identity_cache.py)
+    IDENTITY_CACHE_TTL = 30
+    IDENTITY_CACHE_SIZE = 10_000
+
+    # パスワードのハッシュ化 (backend/password_hashing.py)
+    # METHOD を変更すると、既存ユーザーのハッシュは次回ログイン時に新しい設定で作り直される。
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # gunicorn のワーカー1つあたりのハッシュ計算用プロセス数と、同時に受け付ける計算の上限
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '8'))
+    PASSWORD_HASH_TIMEOUT = 10
+    PASSWORD_HASH_RETRY_AFTER = 1
+
+    # 公開APIの家具一覧・詳細を返すエンジン (backend/catalog/snapshot.py)
+    # 'sql' は毎回 DB に問い合わせる。'memory' はカタログ全体をプロセス内に持ち、カタログのバージョンが進んだら差分を取り込む。
+    CATALOG_ENGINE = os.getenv('CATALOG_ENGINE', 'sql')
+    # GET /api/v1/furnitures?ids=1,2,3 で一度に取得できる件数の上限
+    FURNITURE_BATCH_MAX_IDS = 100
+
+    # 最終ログイン日時のライトビハインドバッファ (backend/last_seen.py)
+    # 件数か経過秒数のどちらかがしきい値に達したらまとめて書き込む。INTERVAL を None にすると件数でのみ書き込む。
+    LAST_SEEN_FLUSH_SIZE = 500
+    LAST_SEEN_FLUSH_INTERVAL = 5
+
+    # 期限切れのブロック済みトークンの定期削除 (秒)。None なら flask prune-blocked-tokens を cron などで実行する。
+    BLOCKLIST_PRUNE_INTERVAL = None
+    BLOCKLIST_PRUNE_BATCH_SIZE = 1000
+
+    # 公開カタログAPIのレスポンスキャッシュ (backend/response_cache.py)
+    # キーにカタログのバージョンを含めるので、TTL は書き込みとは関係なくメモリを解放するためだけのもの。
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_MAX_ENTRIES = 1024
+    RESPONSE_CACHE_TTL = 300
+
+    # 遅延・障害の注入 (backend/fault_injection.py)。本番では必ず無効。
+    FAULT_INJECTION_ENABLED = False
+    FAULT_INJECTION_DEFAULT = {}
+    FAULT_INJECTION_RULES = {}
 # .envなどを使い、環境変数にFLASK_DEBUG=1を設定すると、Flaskはアプリケーションを「デバッグモード」で起動します。
 # これには、インタラクティブデバッガの有効化や、コード変更時の自動リローダーの起動が含まれます。
 # そして、さらに同時に、Flaskが内部的にapp.config['DEBUG']をTrueに設定する(ここでの設定を上書きする)
@@ -39,6 +99,15 @@ class DevelopmentConfig(BaseConfig):
     JWT_REFRESH_COOKIE_SECURE = False
     PROPAGATE_EXCEPTIONS = True
 
+    # フロントエンドのローディング表示などを確認するため、開発中は遅いネットワークを再現する。
+    # FAULT_INJECTION_DELAY=0 とすれば開発中でも遅延なしになる。
+    FAULT_INJECTION_ENABLED = os.getenv('FAULT_INJECTION_ENABLED', '1') in ('1', 'true', 'True')
+    FAULT_INJECTION_DEFAULT = {
+        'delay': float(os.getenv('FAULT_INJECTION_DELAY', '0.5')),
+        'jitter': float(os.getenv('FAULT_INJECTION_JITTER', '0')),
+        'error_rate': float(os.getenv('FAULT_INJECTION_ERROR_RATE', '0')),
+    }
+
 class ProductionConfig(BaseConfig):
     # Trueに設定すると、クッキーはHTTPS経由でのみ送信されるようになります。
     JWT_REFRESH_COOKIE_SECURE = True
@@ -60,6 +129,13 @@ class TestingConfig(BaseConfig):
     # テスト中は、リフレッシュトークンのクッキーに対するCSRF保護を無効にする
     JWT_COOKIE_CSRF_PROTECT = False
 
+    # テストではプロセスプールを使わず、軽いコストでハッシュを計算する
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 0
+    # テストではログインのたびにすぐ書き込む
+    LAST_SEEN_FLUSH_SIZE = 1
+    LAST_SEEN_FLUSH_INTERVAL = None
+
 
     # Pythonの標準ライブラリに最初から組み込まれている sqlite3 モジュールが使われる。
     # で、このモジュールはpythonをダウンロードした時にバンドルされているsqliteを必ず使う。
@@ -1,6 +1,7 @@
 import traceback
 from flask import jsonify
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from pydantic import ValidationError
 from werkzeug.exceptions import (
     HTTPException,
@@ -10,6 +11,7 @@ from werkzeug.exceptions import (
     NotFound,
     MethodNotAllowed,
     Conflict,
+    ServiceUnavailable,
 )
 
 
@@ -82,6 +84,18 @@ def register_error_handlers(app, db):
         return jsonify(response), 409
 
 
+    @app.errorhandler(ServiceUnavailable)
+    def handle_service_unavailable(error):
+        """
+        503 Service Unavailable: 一時的な過負荷 (例: パスワードのハッシュ計算の受付上限)
+        いつ再試行すればよいかを Retry-After ヘッダーで伝える
+        """
+        app.logger.warning(f"ServiceUnavailable: {error.description}")
+        response = {"error_code": "SERVICE_UNAVAILABLE", "message": error.description}
+        headers = {"Retry-After": str(error.retry_after)} if error.retry_after else {}
+        return jsonify(response), 503, headers
+
+
     # --------------------------------------------------------------------------
     # アプリケーション固有のエラーハンドラ
     # --------------------------------------------------------------------------
@@ -125,6 +139,21 @@ def register_error_handlers(app, db):
         return jsonify(response), 409
 
 
+    @app.errorhandler(StaleDataError)
+    def handle_stale_data_error(error):
+        """
+        412 Precondition Failed: 楽観的排他制御 (Furniture.version など) で、読み込んだ後に他のリクエストが行を更新していた場合
+        If-Match のバージョンが一致しないとき (admin の update_furniture など) と同じ状況なので、同じステータスとコードにする
+        """
+        db.session.rollback()
+        app.logger.info(f"StaleDataError: {error}")
+        response = {
+            "error_code": "PRECONDITION_FAILED",
+            "message": "The resource was modified by another request. Please reload it and try again.",
+        }
+        return jsonify(response), 412
+
+
     # --------------------------------------------------------------------------
     # サーバーサイドのエラーハンドラ (5xx系)
     # --------------------------------------------------------------------------
@@ -1,7 +1,20 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import functions
+from backend.response_cache import ResponseCache
 
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
+response_cache = ResponseCache()
+
+
+# SQLite には日時の型がなく、日時は文字列として比較される。SQLAlchemy は Python の datetime を
+# 'YYYY-MM-DD HH:MM:SS.ffffff' の形で書き込むが、func.now() (CURRENT_TIMESTAMP) の既定値は 'YYYY-MM-DD HH:MM:SS' になる。
+# 形が混ざると、キーセットページネーションの WHERE (created_at, id) < (:value, :id) で同じ時刻の値が
+# 等しいと判定されず、前のページの行がまた返ってくる。そこで SQLite では now() も同じ形で書き込む。
+@compiles(functions.now, 'sqlite')
+def _sqlite_now(element, compiler, **kw):
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
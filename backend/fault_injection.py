@@ -0,0 +1,68 @@
+import random
+import time
+
+from flask import request
+from werkzeug.exceptions import ServiceUnavailable
+
+
+# 遅延・障害の注入
+# フロントエンドの開発中に、遅いネットワークやサーバーエラーを再現するための仕組み。
+# 以前は各 view 関数の先頭に time.sleep(0.5) を書いていたが、それでは本番でも gunicorn のスレッドが
+# 0.5秒ずつ占有されてしまうので、設定で ON/OFF できる before_request フックに集約した。
+#
+# 設定例 (config.py):
+#   FAULT_INJECTION_ENABLED = True
+#   FAULT_INJECTION_DEFAULT = {'delay': 0.5, 'jitter': 0.2, 'error_rate': 0.0}
+#   FAULT_INJECTION_RULES = {
+#       'auth': {'delay': 1.0},                  # blueprint 単位
+#       'auth.login': {'error_rate': 0.1},      # endpoint 単位（blueprint の設定より優先）
+#   }
+# delay と jitter は秒。実際の遅延は delay ± jitter の一様乱数。error_rate は 0〜1 の確率で 503 を返す。
+
+FAULT_KEYS = ('delay', 'jitter', 'error_rate')
+
+
+def resolve_fault_settings(config, endpoint):
+    """デフォルト → blueprint → endpoint の順に設定を重ねて、この endpoint の設定を求める"""
+    settings = {'delay': 0.0, 'jitter': 0.0, 'error_rate': 0.0}
+    settings.update(config.get('FAULT_INJECTION_DEFAULT', {}))
+
+    rules = config.get('FAULT_INJECTION_RULES', {})
+    blueprint = endpoint.rsplit('.', 1)[0] if '.' in endpoint else None
+    if blueprint in rules:
+        settings.update(rules[blueprint])
+    if endpoint in rules:
+        settings.update(rules[endpoint])
+
+    unknown = set(settings) - set(FAULT_KEYS)
+    if unknown:
+        raise ValueError(f'Unknown fault injection settings for {endpoint}: {sorted(unknown)}')
+    return settings
+
+
+def register_fault_injection(app):
+
+    if not app.config.get('FAULT_INJECTION_ENABLED', False):
+        # 本番ではフック自体を登録しないので、リクエストごとのコストはゼロ
+        return
+
+    app.logger.warning('Fault injection is enabled. Do not use this setting in production.')
+
+    @app.before_request
+    def inject_fault():
+        # CORS のプリフライトや静的ファイル、存在しないURLには注入しない
+        if request.method == 'OPTIONS' or request.endpoint in (None, 'static'):
+            return None
+
+        settings = resolve_fault_settings(app.config, request.endpoint)
+
+        delay = settings['delay']
+        if settings['jitter']:
+            delay += random.uniform(-settings['jitter'], settings['jitter'])
+        if delay > 0:
+            time.sleep(delay)
+
+        if settings['error_rate'] and random.random() < settings['error_rate']:
+            raise ServiceUnavailable('Injected fault for development.')
+
+        return None
@@ -0,0 +1,81 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
+from uuid import UUID
+
+from flask_jwt_extended import current_user
+from werkzeug.exceptions import Unauthorized
+
+from backend.extensions import db
+from backend.models.user import User
+from backend.response_cache import LRUCacheBackend
+
+
+# user_lookup_loader 用のユーザー情報キャッシュ
+# @jwt_required() のたびに db.session.get(User, id) を実行していたが、ほとんどの view は is_admin や
+# PublicUser の項目を読むだけなので、ユーザーIDごとに読み取り専用のスナップショットを TTL 付きでキャッシュする。
+#   - current_user は UserSnapshot (frozen dataclass) になる。セッションに属さないので変更も lazy load もできない。
+#   - ユーザーを変更する view は load_current_user() でセッションに属する User を取得すること。
+#   - 変更した view は identity_cache.invalidate(user_id) を呼ぶ。他のワーカーには最大 TTL 秒遅れて反映される。
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: UUID
+    username: str
+    email: str
+    is_admin: bool
+    token_valid_after: datetime | None
+    created_at: datetime
+    last_login_at: datetime | None
+    token_epoch: int
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(**{field.name: getattr(user, field.name) for field in fields(cls)})
+
+
+class IdentityCache:
+
+    def __init__(self):
+        self._cache = LRUCacheBackend()
+
+    def init_app(self, app):
+        self._cache = LRUCacheBackend(
+            max_entries=app.config.get('IDENTITY_CACHE_SIZE', 10_000),
+            default_ttl=app.config.get('IDENTITY_CACHE_TTL', 30),
+        )
+        app.extensions['identity_cache'] = self
+
+    def clear(self):
+        self._cache.clear()
+
+    def invalidate(self, user_id):
+        self._cache.delete(str(user_id))
+
+    def get(self, user_id):
+        """ユーザーのスナップショット。ユーザーが存在しなければ None（存在しないことはキャッシュしない）"""
+        key = str(user_id)
+        snapshot = self._cache.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        user = db.session.get(User, UUID(key))
+        if user is None:
+            return None
+        snapshot = UserSnapshot.from_user(user)
+        self._cache.set(key, snapshot)
+        return snapshot
+
+
+def load_current_user():
+    """
+    ログイン中のユーザーを、変更可能な（セッションに属する）User として取得する。
+    キャッシュが古く、ユーザーが既に削除されていた場合は 401 にする。
+    """
+    user = db.session.get(User, current_user.id)
+    if user is None:
+        raise Unauthorized('User associated with this token was not found.')
+    return user
+
+
+identity_cache = IdentityCache()
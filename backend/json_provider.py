@@ -0,0 +1,86 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# orjson を使う JSON プロバイダー
+# 標準の DefaultJSONProvider は、Decimal の価格・datetime・UUID を Python の default() 関数で1つずつ変換し、
+# 一覧のレスポンスも純粋な Python でエンコードしている。orjson は C (Rust) 実装で、UUID・Enum・dataclass を直接扱える。
+#
+# レスポンスの形式は DefaultJSONProvider と揃える:
+#   - Decimal は文字列 ("19.99")、datetime は HTTP 日付 ("Wed, 01 Jan 2025 00:00:00 GMT")
+#     → datetime は OPT_PASSTHROUGH_DATETIME で orjson に変換させず、DefaultJSONProvider.default に渡す
+#   - キーはソートする、デバッグモードではインデントを付ける、レスポンスの末尾に改行を付ける
+# 違いは、ASCII 以外の文字を \uXXXX にエスケープせず UTF-8 のまま出力することだけ（JSON としては同じ値）。
+# orjson がインストールされていない環境や、orjson が扱えない値（64ビットを超える整数など）では標準の json にフォールバックする。
+
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def http_date(dt):
+    """werkzeug.http.http_date と同じ文字列を作る（タイムゾーンなしは UTC とみなす）。一覧では1行に2回呼ばれるので手書きで速くする"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return (
+        f'{_DAYS[dt.weekday()]}, {dt.day:02d} {_MONTHS[dt.month - 1]} {dt.year:04d} '
+        f'{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d} GMT'
+    )
+
+
+def default(o):
+    # よく出てくる型を先に、型の完全一致で判定する。それ以外は DefaultJSONProvider と同じ変換
+    cls = type(o)
+    if cls is Decimal:
+        return str(o)
+    if cls is datetime:
+        return http_date(o)
+    return DefaultJSONProvider.default(o)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+
+    default = staticmethod(default)
+
+    def _options(self, indent=False):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _encode(self, obj, indent=False):
+        return orjson.dumps(obj, default=self.default, option=self._options(indent))
+
+    def dumps(self, obj, **kwargs):
+        # json.dumps の引数（indent など）が指定された場合は、標準の json に任せる
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._encode(obj).decode()
+        except orjson.JSONEncodeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = self._encode(obj, indent=indent)
+        except orjson.JSONEncodeError:
+            return super().response(obj)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
@@ -1,8 +1,7 @@
 from flask import jsonify
-from sqlalchemy import select
-from backend.models.user import User
-from backend.models.blocked_token import BlockedToken
-from uuid import UUID
+from backend.refresh_rotation import refresh_rotation
+from backend.token_epochs import token_epochs
+from backend.identity_cache import identity_cache
 
 def register_jwt_loaders(jwt, db):
     # 保護されたエンドポイントにアクセスしようとしたが、有効なJWTが提供されなかった場合に呼び出されます
@@ -36,14 +35,14 @@ def register_jwt_loaders(jwt, db):
 
     # トークンが有効で期限切れでもないが、ブラックリストに登録され失効済みである場合に呼び出されます。
     # このローダーがTrueを返すと、必ずrevoked_token_loaderが呼び出されます。
+    # DB への問い合わせは、プロセス内の Bloom フィルタが「ブロックされているかもしれない」と判定した場合だけ行う。
+    # jti だけでなくトークンファミリーの失効と、リフレッシュの猶予期間も backend/refresh_rotation.py で判定する。
+    # 個別にブロックされていなくても、パスワード変更などでユーザーのトークンの世代が進んでいれば失効扱いにする。
     @jwt.token_in_blocklist_loader
     def check_if_token_in_blocklist(jwt_header, jwt_payload):
-        jti = jwt_payload['jti']
-        stmt = select(BlockedToken).where(BlockedToken.jti == jti)
-        blocked_token = db.session.execute(stmt).scalar_one_or_none()
-        if blocked_token:
+        if refresh_rotation.is_revoked(jwt_payload):
             return True
-        return False
+        return token_epochs.is_stale(jwt_payload)
 
 
     # トークンがブロックリストに含まれている場合に呼び出されます。（token_in_blocklist_loaderがTrueを返した場合）
@@ -57,11 +56,10 @@ def register_jwt_loaders(jwt, db):
 
     # JWTのサブジェクト（通常はユーザーID）からユーザーオブジェクトをロードするために使用されます。
     # ユーザーが存在しない場合や無効な場合はNoneを返す必要があります。
+    # 返すのは読み取り専用のスナップショット (backend/identity_cache.py)。変更する view は load_current_user() を使う。
     @jwt.user_lookup_loader
     def user_lookup_callback(jwt_header, jwt_payload):
-        user_id_str = jwt_payload['sub']
-        user_id_uuid = UUID(user_id_str)
-        return db.session.get(User, user_id_uuid)
+        return identity_cache.get(jwt_payload['sub'])
 
 
     # user_lookup_loaderがNoneを返した場合に呼び出されます。
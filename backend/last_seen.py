@@ -0,0 +1,95 @@
+import atexit
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from backend.extensions import db
+from backend.models.user import User
+
+
+# 最終ログイン日時のライトビハインドバッファ
+# ログインとリフレッシュ（タブごとに毎分）のたびに users の行を UPDATE してコミットしていたため、
+# 読み取り中心のリクエストが毎回同期的な書き込みになっていた。そこで、
+#   - record() はプロセス内の {user_id: 日時} に記録するだけ（同じユーザーは最新の値で上書き）
+#   - 件数が LAST_SEEN_FLUSH_SIZE に達したとき、前回から LAST_SEEN_FLUSH_INTERVAL 秒経ったとき、
+#     ワーカーの終了時に、User.bulk_update_last_login_at() で1つの文にまとめて書き込む
+# とする。LAST_SEEN_FLUSH_INTERVAL が設定されていれば、リクエストが来なくてもバックグラウンドで定期的に書き込むので
+# （backend/commands.py の register_background_tasks）、管理画面のユーザー一覧に出る値は最大でその秒数だけ古い。
+# record() の中での書き込みが失敗しても、ログに出して次回に回すだけで、リクエスト自体は失敗させない。
+
+
+class LastSeenBuffer:
+
+    def __init__(self):
+        self.flush_size = 500
+        self.flush_interval = 5
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._app = None
+        self._atexit_registered = False
+
+    def init_app(self, app):
+        self.flush_size = app.config.get('LAST_SEEN_FLUSH_SIZE', 500)
+        self.flush_interval = app.config.get('LAST_SEEN_FLUSH_INTERVAL', 5)
+        self._app = app
+        if not self._atexit_registered:
+            atexit.register(self._flush_at_exit)
+            self._atexit_registered = True
+        app.extensions['last_seen'] = self
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+
+    def record(self, user_id, seen_at=None):
+        """最終ログイン日時を記録する。しきい値を超えていれば、このリクエストの中で書き込む"""
+        seen_at = seen_at or datetime.now(timezone.utc)
+        with self._lock:
+            self._pending[user_id] = max(seen_at, self._pending.get(user_id, seen_at))
+            due = len(self._pending) >= self.flush_size or (
+                self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            # 他のユーザーの分も含めた書き込みの失敗で、このリクエスト（ログインなど）まで 500 にはしない。
+            # 失敗した値は flush() がバッファに戻すので、次回の書き込みでまとめて再試行される
+            try:
+                self.flush()
+            except Exception:
+                current_app.logger.exception('Failed to flush last_login_at; will retry on the next flush.')
+
+    def flush(self):
+        """
+        溜まっている値を書き込んでコミットする。書き込んだユーザー数を返す。
+        失敗したら値をバッファに戻して例外を送出する（CLI や定期実行から呼ばれたときに失敗が分かるように）。
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            User.bulk_update_last_login_at(pending)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # 失敗した分は戻して次回に回す（その間に記録された新しい値は残す）
+            with self._lock:
+                for user_id, seen_at in pending.items():
+                    self._pending[user_id] = max(seen_at, self._pending.get(user_id, seen_at))
+            raise
+        return len(pending)
+
+    def _flush_at_exit(self):
+        if self._app is None or not self._pending:
+            return
+        with self._app.app_context():
+            try:
+                self.flush()
+            except Exception:
+                self._app.logger.exception('Failed to flush last_login_at on shutdown.')
+
+
+last_seen = LastSeenBuffer()
@@ -0,0 +1,30 @@
+"""add keyset pagination indexes
+
+Revision ID: 3f1c9a7d2b4e
+Revises: abe43bca7bfc
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7d2b4e'
+down_revision = 'abe43bca7bfc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('furnitures', schema=None) as batch_op:
+        batch_op.create_index('ix_furnitures_price_id', ['price', 'id'], unique=False)
+        batch_op.create_index('ix_furnitures_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_furnitures_updated_at_id', ['updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('furnitures', schema=None) as batch_op:
+        batch_op.drop_index('ix_furnitures_updated_at_id')
+        batch_op.drop_index('ix_furnitures_created_at_id')
+        batch_op.drop_index('ix_furnitures_price_id')
@@ -0,0 +1,32 @@
+"""add furniture filter indexes
+
+Revision ID: 4d8b2f6a9e1c
+Revises: 7c3e9b1d5a2f
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8b2f6a9e1c'
+down_revision = '7c3e9b1d5a2f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('furnitures', schema=None) as batch_op:
+        batch_op.create_index('ix_furnitures_color_price_id', ['color', 'price', 'id'], unique=False)
+        batch_op.create_index('ix_furnitures_color_updated_at_id', ['color', 'updated_at', 'id'], unique=False)
+        batch_op.create_index('ix_furnitures_featured_price_id', ['featured', 'price', 'id'], unique=False)
+        batch_op.create_index('ix_furnitures_featured_updated_at_id', ['featured', 'updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('furnitures', schema=None) as batch_op:
+        batch_op.drop_index('ix_furnitures_featured_updated_at_id')
+        batch_op.drop_index('ix_furnitures_featured_price_id')
+        batch_op.drop_index('ix_furnitures_color_updated_at_id')
+        batch_op.drop_index('ix_furnitures_color_price_id')
@@ -0,0 +1,31 @@
+"""create version stamps
+
+Revision ID: 5b7e3c1a9d2f
+Revises: 8a4d2e6f1c3b
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e3c1a9d2f'
+down_revision = '8a4d2e6f1c3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    version_stamps = op.create_table('version_stamps',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # 最初の bump() が同時に走っても INSERT が競合しないよう、あらかじめ行を作っておく
+    op.bulk_insert(version_stamps, [{'name': 'catalog', 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('version_stamps')
@@ -0,0 +1,57 @@
+"""add admin user list indexes
+
+Revision ID: 7c3e9b1d5a2f
+Revises: d9e1a3c5f7b2
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e9b1d5a2f'
+down_revision = 'd9e1a3c5f7b2'
+branch_labels = None
+depends_on = None
+
+
+# PostgreSQL: NULLS LAST を含めた並び順のインデックス + 前方一致検索用の *_pattern_ops インデックス
+POSTGRES_UPGRADE = [
+    "CREATE INDEX ix_users_last_login_at_id ON users (last_login_at DESC NULLS LAST, id DESC)",
+    "CREATE INDEX ix_users_is_admin_last_login_at_id ON users (is_admin, last_login_at DESC NULLS LAST, id DESC)",
+    "CREATE INDEX ix_users_username_pattern ON users (username varchar_pattern_ops)",
+    "CREATE INDEX ix_users_email_pattern ON users (email varchar_pattern_ops)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_users_email_pattern",
+    "DROP INDEX IF EXISTS ix_users_username_pattern",
+    "DROP INDEX IF EXISTS ix_users_is_admin_last_login_at_id",
+    "DROP INDEX IF EXISTS ix_users_last_login_at_id",
+]
+
+# SQLite: NULL は最小値として扱われるので、昇順のインデックスを逆順に読めば NULLS LAST の降順になる
+SQLITE_UPGRADE = [
+    "CREATE INDEX ix_users_last_login_at_id ON users (last_login_at, id)",
+    "CREATE INDEX ix_users_is_admin_last_login_at_id ON users (is_admin, last_login_at, id)",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_users_is_admin_last_login_at_id",
+    "DROP INDEX IF EXISTS ix_users_last_login_at_id",
+]
+
+
+def _run(statements_by_dialect):
+    dialect = op.get_bind().dialect.name
+    for statement in statements_by_dialect.get(dialect, []):
+        op.execute(sa.text(statement))
+
+
+def upgrade():
+    _run({'postgresql': POSTGRES_UPGRADE, 'sqlite': SQLITE_UPGRADE})
+
+
+def downgrade():
+    _run({'postgresql': POSTGRES_DOWNGRADE, 'sqlite': SQLITE_DOWNGRADE})
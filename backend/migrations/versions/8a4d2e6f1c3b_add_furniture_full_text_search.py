@@ -0,0 +1,77 @@
+"""add furniture full text search
+
+Revision ID: 8a4d2e6f1c3b
+Revises: 3f1c9a7d2b4e
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d2e6f1c3b'
+down_revision = '3f1c9a7d2b4e'
+branch_labels = None
+depends_on = None
+
+
+# PostgreSQL: tsvector の生成列 + GIN インデックス
+POSTGRES_UPGRADE = [
+    """ALTER TABLE furnitures ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(color, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX ix_furnitures_search_vector ON furnitures USING gin (search_vector)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_furnitures_search_vector",
+    "ALTER TABLE furnitures DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite: FTS5 の外部コンテンツテーブル + 同期用トリガー
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS furnitures_fts USING fts5(
+        name, color, description,
+        content='furnitures', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER furnitures_fts_ai AFTER INSERT ON furnitures BEGIN
+        INSERT INTO furnitures_fts(rowid, name, color, description)
+        VALUES (new.id, new.name, new.color, new.description);
+    END""",
+    """CREATE TRIGGER furnitures_fts_ad AFTER DELETE ON furnitures BEGIN
+        INSERT INTO furnitures_fts(furnitures_fts, rowid, name, color, description)
+        VALUES ('delete', old.id, old.name, old.color, old.description);
+    END""",
+    """CREATE TRIGGER furnitures_fts_au AFTER UPDATE ON furnitures BEGIN
+        INSERT INTO furnitures_fts(furnitures_fts, rowid, name, color, description)
+        VALUES ('delete', old.id, old.name, old.color, old.description);
+        INSERT INTO furnitures_fts(rowid, name, color, description)
+        VALUES (new.id, new.name, new.color, new.description);
+    END""",
+    # 既存の行をインデックスに取り込む
+    "INSERT INTO furnitures_fts(furnitures_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS furnitures_fts_au",
+    "DROP TRIGGER IF EXISTS furnitures_fts_ad",
+    "DROP TRIGGER IF EXISTS furnitures_fts_ai",
+    "DROP TABLE IF EXISTS furnitures_fts",
+]
+
+
+def _run(statements_by_dialect):
+    dialect = op.get_bind().dialect.name
+    for statement in statements_by_dialect.get(dialect, []):
+        op.execute(sa.text(statement))
+
+
+def upgrade():
+    _run({'postgresql': POSTGRES_UPGRADE, 'sqlite': SQLITE_UPGRADE})
+
+
+def downgrade():
+    _run({'postgresql': POSTGRES_DOWNGRADE, 'sqlite': SQLITE_DOWNGRADE})
@@ -0,0 +1,27 @@
+"""add version to furnitures
+
+Revision ID: b6f2d8a4c1e7
+Revises: 9e5a1c7b3d2f
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f2d8a4c1e7'
+down_revision = '9e5a1c7b3d2f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 既存の行はバージョン1から始める
+    with op.batch_alter_table('furnitures', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('furnitures', schema=None) as batch_op:
+        batch_op.drop_column('version')
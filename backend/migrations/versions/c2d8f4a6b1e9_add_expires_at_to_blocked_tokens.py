@@ -0,0 +1,28 @@
+"""add expires_at to blocked tokens
+
+Revision ID: c2d8f4a6b1e9
+Revises: 5b7e3c1a9d2f
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d8f4a6b1e9'
+down_revision = '5b7e3c1a9d2f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('blocked_tokens', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_index(batch_op.f('ix_blocked_tokens_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('blocked_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_blocked_tokens_expires_at'))
+        batch_op.drop_column('expires_at')
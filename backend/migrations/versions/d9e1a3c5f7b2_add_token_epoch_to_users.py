@@ -0,0 +1,26 @@
+"""add token epoch to users
+
+Revision ID: d9e1a3c5f7b2
+Revises: c2d8f4a6b1e9
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9e1a3c5f7b2'
+down_revision = 'c2d8f4a6b1e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_epoch', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_epoch')
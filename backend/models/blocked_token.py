@@ -1,7 +1,7 @@
 from backend.extensions import db
 from sqlalchemy.orm import Mapped, mapped_column
-from datetime import datetime
-from sqlalchemy import func
+from datetime import datetime, timezone
+from sqlalchemy import func, select, delete
 
 
 class BlockedToken(db.Model):
@@ -13,6 +13,36 @@ class BlockedToken(db.Model):
         db.DateTime(timezone=True),
         server_default=func.now()
     )
+    # ブロックしたトークン自体の有効期限 (JWT の exp)。これを過ぎたトークンはそもそも検証で弾かれるので、
+    # 行を残しておく意味がない。prune_expired() で定期的に削除する。
+    # マイグレーション以前の行は NULL のまま（期限不明なので削除しない）。
+    expires_at: Mapped[datetime|None] = mapped_column(db.DateTime(timezone=True), index=True)
 
     def __repr__(self):
-        return f'<BlockedToken id:{self.id} created_at:{self.created_at} jti:{self.jti} >'
\ No newline at end of file
+        return f'<BlockedToken id:{self.id} created_at:{self.created_at} expires_at:{self.expires_at} jti:{self.jti} >'
+
+    @classmethod
+    def from_jwt(cls, jwt_payload, key=None):
+        """
+        デコード済みの JWT から、exp 付きの行を作る。
+        key を指定すると jti の代わりにその値（トークンファミリーのIDなど）をブロックする。
+        """
+        expires_at = datetime.fromtimestamp(jwt_payload['exp'], timezone.utc)
+        return cls(jti=key or jwt_payload['jti'], expires_at=expires_at)
+
+    @classmethod
+    def prune_expired(cls, batch_size=1000, now=None):
+        """
+        期限切れの行を batch_size 件ずつ削除してコミットする。
+        一度に大量に DELETE すると長時間ロックを持ち続けるので、小さなトランザクションに分ける。
+        削除した件数の合計を返す。
+        """
+        now = now or datetime.now(timezone.utc)
+        total = 0
+        while True:
+            batch = select(cls.id).where(cls.expires_at < now).limit(batch_size)
+            result = db.session.execute(delete(cls).where(cls.id.in_(batch.scalar_subquery())))
+            db.session.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
@@ -2,11 +2,24 @@ from backend.extensions import db
 from sqlalchemy.orm import Mapped, mapped_column
 from decimal import Decimal
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import func, event, DDL, update
 
 
 class Furniture(db.Model):
     __tablename__ = 'furnitures'
+    # キーセットページネーション用に (ソートキー, id) の複合インデックスを張る。
+    # WHERE (price, id) > (:price, :id) ORDER BY price, id がインデックスの範囲スキャンだけで済む。
+    __table_args__ = (
+        db.Index('ix_furnitures_price_id', 'price', 'id'),
+        db.Index('ix_furnitures_created_at_id', 'created_at', 'id'),
+        db.Index('ix_furnitures_updated_at_id', 'updated_at', 'id'),
+        # color / featured で絞り込んだうえでの並び替え用。等値条件のカラムを先頭に置くと、
+        # WHERE color = :color ORDER BY price, id もインデックスの範囲スキャンだけで済む
+        db.Index('ix_furnitures_color_price_id', 'color', 'price', 'id'),
+        db.Index('ix_furnitures_color_updated_at_id', 'color', 'updated_at', 'id'),
+        db.Index('ix_furnitures_featured_price_id', 'featured', 'price', 'id'),
+        db.Index('ix_furnitures_featured_updated_at_id', 'featured', 'updated_at', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(db.Integer(), primary_key=True)
     name: Mapped[str] = mapped_column(db.String(50), index=True, unique=True)
@@ -27,7 +40,88 @@ class Furniture(db.Model):
         server_default=func.now(),
         onupdate=func.now()
     )
+    # 楽観的排他制御のバージョン番号。ORM の flush での UPDATE には WHERE version = :前の値 が自動で付き、
+    # 他の誰かが先に更新していれば StaleDataError になる。管理画面の ETag / If-Match にも使う。
+    # update() / insert() を直接発行する経路 (一括更新・インポート・在庫の引き当て) では version + 1 を自分で設定する。
+    version: Mapped[int] = mapped_column(db.Integer(), default=1, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version}
 
     def __repr__(self):
         return f'<Furniture name:"{self.name}" color:{self.color} price:{self.price} image_url:{self.image_url}>'
 
+    @classmethod
+    def reserve_stock(cls, quantities):
+        """
+        {id: 数量} の在庫をまとめて引き当てる。コミットは呼び出し側で行う。
+        読んでから書き戻すと同時に売れたときに更新が失われるので、1行ずつ
+        UPDATE ... SET stock = stock - :n WHERE id = :id AND stock >= :n RETURNING ... で条件付きで減らす。
+        行ロックを取る順番を id の昇順にそろえて、同じ家具を含む注文どうしがデッドロックしないようにする。
+        戻り値は (引き当てた行のリスト, 引き当てられなかった id)。途中で足りなくなったらそこで止め、
+        呼び出し側がロールバックする。
+        """
+        reserved = []
+        for id in sorted(quantities):
+            quantity = quantities[id]
+            stmt = (
+                update(cls)
+                .where(cls.id == id, cls.stock >= quantity)
+                .values(stock=cls.stock - quantity, version=cls.version + 1)
+                .returning(cls.id, cls.name, cls.price, cls.stock)
+                .execution_options(synchronize_session=False)
+            )
+            row = db.session.execute(stmt).one_or_none()
+            if row is None:
+                return reserved, id
+            reserved.append(row)
+        return reserved, None
+
+
+# --------------------------------------------------------------------------
+# 全文検索用のスキーマ (backend/catalog/search.py から使う)
+# --------------------------------------------------------------------------
+# tsvector 型や FTS5 は方言ごとに全く異なるのでモデルのカラムにはせず、テーブル作成時の DDL として登録する。
+# db.create_all() (テスト) ではここで作成され、既存のDBにはマイグレーションで同じものを作成する。
+
+FURNITURE_SEARCH_DDL = {
+    'postgresql': [
+        # 生成列なので、INSERT/UPDATE のたびに PostgreSQL が自動で再計算してくれる
+        """ALTER TABLE furnitures ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(color, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        ) STORED""",
+        "CREATE INDEX ix_furnitures_search_vector ON furnitures USING gin (search_vector)",
+    ],
+    'sqlite': [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS furnitures_fts USING fts5(
+            name, color, description,
+            content='furnitures', content_rowid='id', tokenize='porter unicode61'
+        )""",
+        """CREATE TRIGGER furnitures_fts_ai AFTER INSERT ON furnitures BEGIN
+            INSERT INTO furnitures_fts(rowid, name, color, description)
+            VALUES (new.id, new.name, new.color, new.description);
+        END""",
+        """CREATE TRIGGER furnitures_fts_ad AFTER DELETE ON furnitures BEGIN
+            INSERT INTO furnitures_fts(furnitures_fts, rowid, name, color, description)
+            VALUES ('delete', old.id, old.name, old.color, old.description);
+        END""",
+        """CREATE TRIGGER furnitures_fts_au AFTER UPDATE ON furnitures BEGIN
+            INSERT INTO furnitures_fts(furnitures_fts, rowid, name, color, description)
+            VALUES ('delete', old.id, old.name, old.color, old.description);
+            INSERT INTO furnitures_fts(rowid, name, color, description)
+            VALUES (new.id, new.name, new.color, new.description);
+        END""",
+    ],
+}
+
+for _dialect, _statements in FURNITURE_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Furniture.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+
+# 外部コンテンツの FTS5 テーブルは furnitures を DROP しても残るので、一緒に削除する
+event.listen(
+    Furniture.__table__,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS furnitures_fts').execute_if(dialect='sqlite')
+)
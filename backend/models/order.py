@@ -0,0 +1,39 @@
+from uuid import UUID
+from decimal import Decimal
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import func
+
+from backend.extensions import db
+
+
+class Order(db.Model):
+    __tablename__ = 'orders'
+
+    id: Mapped[int] = mapped_column(db.Integer(), primary_key=True)
+    # ユーザーが退会しても注文の記録は残す
+    user_id: Mapped[UUID|None] = mapped_column(db.Uuid(), db.ForeignKey('users.id', ondelete='SET NULL'), index=True)
+    total: Mapped[Decimal] = mapped_column(db.Numeric(precision=12, scale=2))
+    created_at: Mapped[datetime] = mapped_column(
+        db.DateTime(timezone=True),
+        server_default=func.now()
+    )
+
+    def __repr__(self):
+        return f'<Order id:{self.id} user_id:{self.user_id} total:{self.total} created_at:{self.created_at}>'
+
+
+class OrderItem(db.Model):
+    __tablename__ = 'order_items'
+
+    id: Mapped[int] = mapped_column(db.Integer(), primary_key=True)
+    order_id: Mapped[int] = mapped_column(db.Integer(), db.ForeignKey('orders.id', ondelete='CASCADE'), index=True)
+    # 家具が削除されても明細は残すので、注文時点の名前と単価を明細にも持つ
+    furniture_id: Mapped[int|None] = mapped_column(db.Integer(), db.ForeignKey('furnitures.id', ondelete='SET NULL'))
+    name: Mapped[str] = mapped_column(db.String(50))
+    unit_price: Mapped[Decimal] = mapped_column(db.Numeric(precision=10, scale=2))
+    quantity: Mapped[int] = mapped_column(db.Integer())
+
+    def __repr__(self):
+        return f'<OrderItem id:{self.id} order_id:{self.order_id} furniture_id:{self.furniture_id} quantity:{self.quantity}>'
@@ -1,15 +1,26 @@
 from uuid import UUID, uuid4
 from datetime import datetime
 
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update, bindparam, text, or_
 
 from backend.extensions import db
+from backend.password_hashing import password_hasher
 
 
 class User(db.Model):
     __tablename__ = 'users'
+    # 管理画面のユーザー一覧 (last_login_at DESC NULLS LAST, id DESC) のキーセットページネーション用。
+    # SQLite は NULL を最小値として扱うので、昇順の (last_login_at, id) を逆順に読むだけでこの並びになる。
+    # PostgreSQL では NULLS LAST の指定をインデックスにも付けておく必要があるので、下の方で方言ごとに定義する。
+    __table_args__ = (
+        db.Index('ix_users_last_login_at_id', 'last_login_at', 'id').ddl_if(dialect='sqlite'),
+        db.Index('ix_users_is_admin_last_login_at_id', 'is_admin', 'last_login_at', 'id').ddl_if(dialect='sqlite'),
+        # ユーザー名・メールアドレスの前方一致検索 (LIKE 'abc%') 用。
+        # PostgreSQL の既定の照合順序の B-tree は LIKE に使えないので、*_pattern_ops のインデックスを別に張る
+        db.Index('ix_users_username_pattern', 'username', postgresql_ops={'username': 'varchar_pattern_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_users_email_pattern', 'email', postgresql_ops={'email': 'varchar_pattern_ops'}).ddl_if(dialect='postgresql'),
+    )
 
     id: Mapped[UUID] = mapped_column(db.Uuid(), primary_key=True, default=lambda: uuid4())
     username: Mapped[str] = mapped_column(db.String(50), unique=True)
@@ -17,6 +28,8 @@ class User(db.Model):
     password: Mapped[str] = mapped_column(db.String(256))
     is_admin: Mapped[bool] = mapped_column(db.Boolean(), default=False)
     token_valid_after: Mapped[datetime|None] = mapped_column(db.DateTime(timezone=True))
+    # トークンの世代番号。JWT の 'epoch' クレームに埋め込み、これより古い世代のトークンは失効扱いにする。
+    token_epoch: Mapped[int] = mapped_column(db.Integer(), default=0, server_default='0')
     created_at: Mapped[datetime] = mapped_column(
         db.DateTime(timezone=True),
         server_default=func.now()
@@ -26,11 +39,15 @@ class User(db.Model):
     def __repr__(self):
         return f'<User id:{self.id} username:"{self.username}" email:{self.email} is_admin:{self.is_admin} token_valid_after:{self.token_valid_after} created_at:{self.created_at} last_login_at:{self.last_login_at} >'
 
+    # ハッシュの計算は backend/password_hashing.py のプロセスプールで行う
     def set_password_hash(self, raw_password):
-        self.password = generate_password_hash(raw_password)
+        self.password = password_hasher.hash(raw_password)
 
     def check_password_match(self, raw_password):
-        return check_password_hash(self.password, raw_password)
+        return password_hasher.verify(self.password, raw_password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password)
 
 
     # scalar_one_or_none() を使うべき場面「結果は、存在しないか、
@@ -53,6 +70,55 @@ class User(db.Model):
         # Pythonのdatetimeではなく、DBのNOW()関数を使うようSQLAlchemyに指示する
         self.token_valid_after = func.now()
 
-    def update_last_login_at(self):
-        self.last_login_at = func.now()
+    def bump_token_epoch(self):
+        """
+        トークンの世代を1つ進め、これまでに発行した全てのトークンを失効させる。
+        同時に実行されても取りこぼさないよう、SQL の token_epoch + 1 として更新する。
+        """
+        self.token_epoch = User.token_epoch + 1
+
+    @classmethod
+    def bulk_update_last_login_at(cls, last_seen):
+        """
+        {user_id: 最終ログイン日時} をまとめて1つの文で書き込む（コミットは呼び出し側で行う）。
+        既に新しい値が入っている行は上書きしない。
+        """
+        if not last_seen:
+            return
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # UPDATE ... FROM (VALUES ...) で1往復にまとめる。psycopg2 は型なしで送るので CAST を付ける
+            rows, params = [], {}
+            for i, (user_id, seen_at) in enumerate(last_seen.items()):
+                rows.append(f'(CAST(:id_{i} AS UUID), CAST(:ts_{i} AS TIMESTAMPTZ))')
+                params[f'id_{i}'] = str(user_id)
+                params[f'ts_{i}'] = seen_at
+            stmt = text(
+                'UPDATE users SET last_login_at = v.last_login_at '
+                f'FROM (VALUES {", ".join(rows)}) AS v(id, last_login_at) '
+                'WHERE users.id = v.id '
+                'AND (users.last_login_at IS NULL OR users.last_login_at < v.last_login_at)'
+            )
+            db.session.execute(stmt, params)
+        else:
+            # SQLite は UPDATE ... FROM (VALUES) の型推論が弱いので executemany にする
+            table = cls.__table__
+            stmt = (
+                update(table)
+                .where(table.c.id == bindparam('user_id'))
+                .where(or_(table.c.last_login_at.is_(None), table.c.last_login_at < bindparam('seen_at')))
+                .values(last_login_at=bindparam('seen_at'))
+            )
+            db.session.execute(stmt, [
+                {'user_id': user_id, 'seen_at': seen_at} for user_id, seen_at in last_seen.items()
+            ])
+
 
+# PostgreSQL 用の (last_login_at DESC NULLS LAST, id DESC) インデックス。カラムの式が必要なのでクラスの外で定義する
+db.Index(
+    'ix_users_last_login_at_id',
+    User.last_login_at.desc().nulls_last(), User.id.desc(),
+).ddl_if(dialect='postgresql')
+db.Index(
+    'ix_users_is_admin_last_login_at_id',
+    User.is_admin, User.last_login_at.desc().nulls_last(), User.id.desc(),
+).ddl_if(dialect='postgresql')
@@ -0,0 +1,48 @@
+from backend.extensions import db
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from sqlalchemy import func, select, update
+
+
+class VersionStamp(db.Model):
+    """
+    名前付きの単調増加カウンタ（例: 'catalog'）。
+    書き込み側が同じトランザクションの中で bump() し、読み取り側はキャッシュのキーや ETag に使う。
+    DBに置いているので、gunicorn の全ワーカーで同じ値が見える。
+    """
+    __tablename__ = 'version_stamps'
+
+    name: Mapped[str] = mapped_column(db.String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(db.BigInteger(), default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        db.DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now()
+    )
+
+    def __repr__(self):
+        return f'<VersionStamp name:{self.name} version:{self.version} updated_at:{self.updated_at}>'
+
+    @classmethod
+    def current(cls, name):
+        """現在のバージョンを返す。まだ一度も bump されていなければ 0"""
+        return cls.current_with_timestamp(name)[0]
+
+    @classmethod
+    def current_with_timestamp(cls, name):
+        """(バージョン, 最後に bump された日時) を1回のクエリで返す。まだ行がなければ (0, None)"""
+        stmt = select(cls.version, cls.updated_at).where(cls.name == name)
+        row = db.session.execute(stmt).one_or_none()
+        if row is None:
+            return 0, None
+        return row.version, row.updated_at
+
+    @classmethod
+    def bump(cls, name):
+        """
+        バージョンを1つ進める。コミットは呼び出し側で行うので、
+        データの変更とバージョンの更新は同じトランザクションで確定する。
+        """
+        stmt = update(cls).where(cls.name == name).values(version=cls.version + 1)
+        if db.session.execute(stmt).rowcount == 0:
+            db.session.add(cls(name=name, version=1))
@@ -0,0 +1,107 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from uuid import UUID
+
+from sqlalchemy import tuple_, and_, or_
+from werkzeug.exceptions import BadRequest
+
+from backend.extensions import db
+
+
+# キーセット（カーソル）ページネーション
+# db.paginate() は COUNT(*) と OFFSET を発行するため、深いページほど読み飛ばす行が増えて遅くなる。
+# キーセット方式では「前のページの最後の行のソートキー + id」より後ろの行だけを
+# WHERE (col, id) < (:value, :id) で取り出すので、(col, id) の複合インデックスを使って
+# 何ページ目であっても1ページ目と同じコストで取得できる。
+# カーソルはクライアントにとって不透明な文字列（base64url でエンコードしたJSON）として返す。
+
+
+def encode_cursor(sort_key, descending, value, last_id):
+    """最後の行のソートキーとidから、次ページ用の不透明なカーソル文字列を作る"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    if isinstance(last_id, UUID):
+        last_id = str(last_id)
+    payload = {'s': sort_key, 'd': descending, 'v': value, 'id': last_id}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_key, descending, column, id_column=None):
+    """
+    カーソル文字列を (ソートキーの値, id) に戻す。
+    改ざんされている、または別の sort/order で発行されたカーソルは 400 にする。
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload['s'] != sort_key or payload['d'] != descending:
+            raise ValueError('cursor was issued for a different ordering')
+        last_id = _parse_value(id_column, payload['id']) if id_column is not None else int(payload['id'])
+        value = _parse_value(column, payload['v'])
+    except (ValueError, TypeError, KeyError, InvalidOperation, json.JSONDecodeError):
+        raise BadRequest('Invalid cursor.')
+    return value, last_id
+
+
+def _parse_value(column, raw):
+    # カラムの型 (Numeric -> Decimal, DateTime -> datetime) に合わせて値を復元する
+    if raw is None and column.nullable:
+        return None
+    python_type = column.type.python_type
+    if python_type is Decimal:
+        return Decimal(raw)
+    if python_type is datetime:
+        return datetime.fromisoformat(raw)
+    if python_type is UUID:
+        return UUID(raw)
+    return python_type(raw)
+
+
+def keyset_paginate(stmt, column, id_column, descending, sort_key, cursor, per_page):
+    """
+    stmt にキーセット条件と ORDER BY を付けて1ページ分を取得する。
+    per_page + 1 件取得して、次のページがあるかどうかを COUNT なしで判定する。
+    戻り値は (items, next_cursor)。次のページがない場合 next_cursor は None。
+    NULL を許すカラムでは、並び順にかかわらず NULL の行を最後に返す (NULLS LAST)。
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_key, descending, column, id_column)
+        stmt = stmt.where(_after(column, id_column, descending, value, last_id))
+
+    if descending:
+        order = [column.desc(), id_column.desc()]
+    else:
+        order = [column.asc(), id_column.asc()]
+    if column.nullable:
+        # SQLite と PostgreSQL では NULL の既定の位置が逆なので、明示する
+        order[0] = order[0].nulls_last()
+    stmt = stmt.order_by(*order)
+
+    rows = db.session.execute(stmt.limit(per_page + 1)).scalars().all()
+    items = rows[:per_page]
+
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(
+            sort_key, descending, getattr(last, column.key), getattr(last, id_column.key)
+        )
+    return items, next_cursor
+
+
+def _after(column, id_column, descending, value, last_id):
+    # (column, id) がカーソルより後ろにある行の条件。NULL は比較できないので、NULLS LAST の順序を条件で表す
+    id_after = id_column < last_id if descending else id_column > last_id
+    if value is None:
+        return and_(column.is_(None), id_after)
+    key = tuple_(column, id_column)
+    bound = tuple_(value, last_id)
+    after = key < bound if descending else key > bound
+    if column.nullable:
+        return or_(after, column.is_(None))
+    return after
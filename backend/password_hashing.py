@@ -0,0 +1,85 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+# パスワードのハッシュ化サービス
+# scrypt / pbkdf2 は意図的に重い CPU 処理なので、リクエストのスレッドで直接実行すると、ログインが集中したときに
+# gunicorn の全スレッドが埋まり、軽いカタログの読み取りまで待たされてしまう。そこで、
+#   - 計算はワーカープロセスごとの小さなプロセスプール (PASSWORD_HASH_WORKERS) で行う
+#   - 同時に受け付ける計算の数を PASSWORD_HASH_MAX_PENDING で制限し、溢れたら 503 + Retry-After で断る
+#   - アルゴリズムとコストは PASSWORD_HASH_METHOD で設定し、古い設定で保存されたハッシュはログイン時に作り直す
+# PASSWORD_HASH_WORKERS = 0 の場合はプールを使わず、リクエストのスレッドで計算する（テスト用）。
+
+
+class PasswordHasher:
+
+    def __init__(self):
+        self.method = 'scrypt:32768:8:1'
+        self.workers = 0
+        self.max_pending = 8
+        self.timeout = 10
+        self.retry_after = 1
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', self.max_pending)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self.retry_after = app.config.get('PASSWORD_HASH_RETRY_AFTER', self.retry_after)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        # 'scrypt' のような省略形も、実際に保存される 'scrypt:32768:8:1' の形に揃えて比較できるようにする
+        self.method = generate_password_hash('', self.method).split('$', 1)[0]
+        app.extensions['password_hasher'] = self
+
+    def hash(self, raw_password):
+        return self._run(generate_password_hash, raw_password, self.method)
+
+    def verify(self, password_hash, raw_password):
+        return self._run(check_password_hash, password_hash, raw_password)
+
+    def needs_rehash(self, password_hash):
+        """保存されているハッシュが、現在の設定とは別のアルゴリズムやコストで作られていれば True"""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def _run(self, func, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise ServiceUnavailable('Too many sign-in requests are being processed. Please retry shortly.', retry_after=self.retry_after)
+        if not self.workers:
+            try:
+                return func(*args)
+            finally:
+                slots.release()
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # タイムアウトしてもプールの中では計算が続いているので、枠はリクエストが諦めたときではなく、
+        # 計算が終わったときに返す。そうしないと、タイムアウトが続くとプールに溜まる計算が上限を超えてしまう
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise ServiceUnavailable('Password processing timed out. Please retry shortly.', retry_after=self.retry_after)
+
+    def _get_executor(self):
+        # gunicorn は create_app の後に fork するので、プールは最初に使うときにワーカープロセスの中で作る
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+
+password_hasher = PasswordHasher()
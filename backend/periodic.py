@@ -0,0 +1,26 @@
+import threading
+
+
+# プロセス内の定期実行タスク
+# gunicorn の各ワーカーの中でデーモンスレッドとして動く。ワーカーの数だけ同時に動くので、
+# 何度実行されても問題のない（冪等な）処理だけを登録すること。
+
+
+def start_periodic_task(app, name, interval, func):
+    """
+    interval 秒ごとに、アプリケーションコンテキストの中で func() を実行するスレッドを起動する。
+    例外はログに出して次の周期に進む。戻り値の Event を set() するとスレッドが止まる。
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            with app.app_context():
+                try:
+                    func()
+                except Exception:
+                    app.logger.exception(f'Periodic task {name} failed.')
+
+    thread = threading.Thread(target=run, name=f'periodic-{name}', daemon=True)
+    thread.start()
+    return stop
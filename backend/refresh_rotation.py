@@ -0,0 +1,111 @@
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from flask import g
+from sqlalchemy import select
+
+from backend.blocklist import token_blocklist
+from backend.extensions import db
+from backend.models.blocked_token import BlockedToken
+from backend.response_cache import LRUCacheBackend
+
+
+# リフレッシュトークンのローテーション（トークンファミリー + 再利用の猶予期間）
+# アクセストークンの有効期限が1分なので、開いているタブごとに毎分 /auth/refresh-tokens が呼ばれる。
+# 複数のタブが同じリフレッシュトークンで同時にリフレッシュすると、先に処理された方がトークンをブロックし、
+# 後の方は TOKEN_REVOKED になってログアウトされてしまっていた。そこで、
+#   - ログイン時に発行したトークンに 'fam' クレーム（ファミリーID）を付け、ローテーション後も引き継ぐ
+#   - 同じ jti のリフレッシュが猶予期間 (JWT_REFRESH_REUSE_GRACE_SECONDS) 内に重なった場合は、
+#     同じワーカーなら最初の結果（同じトークンのペア）をキャッシュから返し、DB には書き込まない
+#     他のワーカーで既にローテーション済みなら、同じファミリーの新しいペアを発行する
+#   - 猶予期間を過ぎてから古いリフレッシュトークンが使われたら、盗まれたトークンの再利用とみなしてファミリーごと失効させる
+# ファミリーの失効は、ファミリーIDを jti の代わりに blocked_tokens に登録することで表す。
+
+FAMILY_CLAIM = 'fam'
+
+# 同じ jti の同時リフレッシュを直列化するためのロック。jti ごとに作ると後片付けが必要なので、固定数のロックに振り分ける
+LOCK_STRIPES = 64
+
+
+class RefreshRotation:
+
+    def __init__(self):
+        self.grace_seconds = 10
+        self._results = LRUCacheBackend(default_ttl=self.grace_seconds)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def init_app(self, app):
+        self.grace_seconds = app.config.get('JWT_REFRESH_REUSE_GRACE_SECONDS', 10)
+        self._results = LRUCacheBackend(
+            max_entries=app.config.get('JWT_REFRESH_RESULT_CACHE_SIZE', 10_000),
+            default_ttl=self.grace_seconds,
+        )
+        app.extensions['refresh_rotation'] = self
+
+    def clear(self):
+        self._results.clear()
+
+    @staticmethod
+    def family_claims(jwt_payload=None):
+        """新しいファミリー、またはローテーション元のトークンと同じファミリーのクレーム"""
+        family = (jwt_payload or {}).get(FAMILY_CLAIM) or str(uuid4())
+        return {FAMILY_CLAIM: family}
+
+    def is_revoked(self, jwt_payload):
+        """token_in_blocklist_loader から呼ばれる。トークンが失効していれば True"""
+        jti, token_type = jwt_payload['jti'], jwt_payload.get('type')
+        family = jwt_payload.get(FAMILY_CLAIM)
+
+        if family and token_blocklist.is_blocked(family, token_type):
+            return True
+        if not token_blocklist.is_blocked(jti, token_type):
+            return False
+        if token_type != 'refresh':
+            return True
+
+        # ローテーション済みのリフレッシュトークンが再び使われた
+        if self._results.get(jti) is not None or self._rotated_within_grace(jti):
+            g.refresh_token_already_rotated = True
+            return False
+        if family:
+            self.revoke_family(jwt_payload)
+        return True
+
+    def rotate(self, jwt_payload, issue):
+        """
+        リフレッシュトークンをローテーションする。issue() は新しいトークンのペアなどを dict で返す関数。
+        同じ jti について猶予期間内に2回目以降の呼び出しがあれば、issue() を呼ばずに最初の結果を返す。
+        戻り値は (結果, 新しく発行したかどうか)。
+        """
+        jti = jwt_payload['jti']
+        with self._locks[zlib.crc32(jti.encode()) % LOCK_STRIPES]:
+            result = self._results.get(jti)
+            if result is not None:
+                return result, False
+            result = issue()
+            self._results.set(jti, result)
+            return result, True
+
+    def revoke_family(self, jwt_payload):
+        family = jwt_payload[FAMILY_CLAIM]
+        if not token_blocklist.is_blocked(family, 'refresh'):
+            # ファミリーのトークンはどれもリフレッシュトークンの有効期限より長くは生きないので、その時刻まで残せばよい
+            expires_at = datetime.fromtimestamp(jwt_payload['exp'], timezone.utc) + timedelta(seconds=self.grace_seconds)
+            db.session.add(BlockedToken(jti=family, expires_at=expires_at))
+            db.session.commit()
+        token_blocklist.add(family)
+
+    def _rotated_within_grace(self, jti):
+        stmt = select(BlockedToken.created_at).where(BlockedToken.jti == jti)
+        blocked_at = db.session.execute(stmt).scalar_one_or_none()
+        if blocked_at is None:
+            return False
+        if blocked_at.tzinfo is None:
+            # SQLite はタイムゾーンなしで返す（値は UTC）
+            blocked_at = blocked_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - blocked_at <= timedelta(seconds=self.grace_seconds)
+
+
+refresh_rotation = RefreshRotation()
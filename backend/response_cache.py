@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+
+
+# レスポンスキャッシュ
+# 匿名ユーザーの一覧・詳細リクエストはほとんどが同じ (q, sort, order, page) の繰り返しなので、
+# jsonify 済みのレスポンスボディをそのまま保存しておき、DBクエリ・Pydanticのバリデーション・JSONエンコードを省く。
+# キーにはデータのバージョン番号（例: カタログのバージョン）を含めるので、書き込みがあれば
+# 古いエントリは二度と参照されず、LRU と TTL によって自然に追い出される。
+
+
+class LRUCacheBackend:
+    """プロセス内の LRU キャッシュ。エントリ数の上限と TTL を持つ。gunicorn のスレッド間で共有するのでロックを取る"""
+
+    def __init__(self, max_entries=1024, default_ttl=60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ResponseCache:
+    """
+    backend には get(key) / set(key, value, ttl=None) / delete(key) / clear() を持つオブジェクトを渡す
+    （省略時は LRUCacheBackend）。Redis などの共有キャッシュを使う場合も、同じメソッドを持つクラスを作って渡せばよい。
+    get() はエントリがなければ None を返すこと。
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.enabled = False
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', False)
+        if self.backend is None:
+            self.backend = LRUCacheBackend(
+                max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1024),
+                default_ttl=app.config.get('RESPONSE_CACHE_TTL', 60),
+            )
+        app.extensions['response_cache'] = self
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    @staticmethod
+    def make_key(endpoint, view_args, args, version):
+        # クエリパラメータはキー順に並べ、?sort=price&q=a と ?q=a&sort=price を同じキーにする。
+        # ?cursor= のように値が空でも付いているかどうかで形が変わるパラメータがあるので、空の値も除かない
+        normalized_args = sorted(args.items(multi=True))
+        normalized_view_args = sorted(view_args.items())
+        return f'{endpoint}|v{version}|{normalized_view_args}|{normalized_args}'
+
+
+def cached_response(version):
+    """
+    GET の view 関数の 200 レスポンスをキャッシュするデコレーター。
+    version には、データのバージョン番号を返す関数（例: get_catalog_version）を渡す。
+    """
+    def decorator(view):
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions['response_cache']
+            if not cache.enabled:
+                return view(*args, **kwargs)
+
+            key = cache.make_key(request.endpoint, kwargs, request.args, version())
+            hit = cache.backend.get(key)
+            if hit is not None:
+                body, status = hit
+                response = current_app.response_class(body, status=status, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                cache.backend.set(key, (response.get_data(), response.status_code))
+            response.headers['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+
+    return decorator
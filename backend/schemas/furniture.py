@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, ConfigDict, HttpUrl, field_serializer
+from pydantic import BaseModel, Field, ConfigDict, HttpUrl, field_serializer, model_validator
 from typing import Annotated
 from decimal import Decimal
 from datetime import datetime
@@ -52,6 +52,48 @@ class UpdateFurniture(BaseModel):
         return str(image_url)
 
 
+# 一括更新・一括削除 (PATCH/DELETE /api/v1/admin/furnitures) の対象の指定。
+# ids か filter のどちらか一方だけを指定する。filter は全件を対象にしないよう、少なくとも1つの条件を必須にする。
+MAX_BULK_IDS = 1000
+
+
+class FurnitureFilter(BaseModel):
+    color: FurnitureColor|None = None
+    featured: bool|None = None
+
+    model_config = ConfigDict(extra='forbid')
+
+    @model_validator(mode='after')
+    def require_condition(self):
+        if self.color is None and self.featured is None:
+            raise ValueError('filter needs at least one condition.')
+        return self
+
+
+class FurnitureSelection(BaseModel):
+    ids: Annotated[list[Annotated[int, Field(ge=0)]]|None, Field(min_length=1, max_length=MAX_BULK_IDS)] = None
+    filter: FurnitureFilter|None = None
+
+    @model_validator(mode='after')
+    def require_exactly_one(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError('Specify either ids or filter.')
+        return self
+
+
+class BulkUpdateFurniture(FurnitureSelection):
+    # name は一意なので、複数の行に同じ値を設定することはできない
+    patch: UpdateFurniture
+
+    @model_validator(mode='after')
+    def reject_name(self):
+        if 'name' in self.patch.model_fields_set:
+            raise ValueError('name cannot be updated in bulk.')
+        if not self.patch.model_fields_set:
+            raise ValueError('patch must contain at least one field.')
+        return self
+
+
 class ReadFurniture(BaseModel):
     id: Annotated[int, Field(ge=0)]
     name: Annotated[str, Field(min_length=3, max_length=50)]
@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import Annotated
+from decimal import Decimal
+from datetime import datetime
+
+
+# 1回の注文に含められる明細の数と、1明細あたりの数量の上限
+MAX_ORDER_ITEMS = 50
+MAX_ORDER_QUANTITY = 100
+
+
+class CreateOrderItem(BaseModel):
+    furniture_id: Annotated[int, Field(ge=1)]
+    quantity: Annotated[int, Field(ge=1, le=MAX_ORDER_QUANTITY)]
+
+    model_config = ConfigDict(extra='forbid')
+
+
+class CreateOrder(BaseModel):
+    items: Annotated[list[CreateOrderItem], Field(min_length=1, max_length=MAX_ORDER_ITEMS)]
+
+    model_config = ConfigDict(extra='forbid')
+
+    @model_validator(mode='after')
+    def reject_duplicates(self):
+        ids = [item.furniture_id for item in self.items]
+        if len(ids) != len(set(ids)):
+            raise ValueError('Each furniture_id may appear only once.')
+        return self
+
+    def quantities(self):
+        """{furniture_id: 数量}"""
+        return {item.furniture_id: item.quantity for item in self.items}
+
+
+class ReadOrderItem(BaseModel):
+    furniture_id: int|None
+    name: str
+    unit_price: Decimal
+    quantity: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ReadOrder(BaseModel):
+    id: int
+    total: Decimal
+    created_at: datetime
+    items: list[ReadOrderItem]
+
+    model_config = ConfigDict(from_attributes=True)
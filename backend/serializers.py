@@ -0,0 +1,31 @@
+from functools import cache
+from operator import attrgetter
+
+
+# 読み取り用レスポンスの高速なシリアライズ
+# 一覧のエンドポイントでは、DB から読んだ行ごとに Schema.model_validate(obj).model_dump() を呼んでいた。
+# DB の値は書き込み時に Create/UpdateFurniture で検証済みなのに、Decimal の範囲チェック、image_url の HttpUrl の解析、
+# 列挙型への変換をもう一度行い、さらに dict に戻している。読み取りではこれを省き、スキーマのフィールド名で
+# 属性を取り出すだけの関数をスキーマごとに一度だけ作って使う。ORM のオブジェクトにも Row にも使える。
+#
+# 出力はそれぞれの値の JSON 表現が model_dump() の結果と同じになる（列挙型はその値の文字列、image_url は保存済みの文字列）。
+# 書き込み時の検証を通っていない値（DB を直接書き換えた場合など）はそのまま出力されるので、信頼できる読み取りにだけ使うこと。
+
+
+@cache
+def trusted_serializer(schema, fields=None):
+    """
+    schema のフィールドを同じ順序で持つ dict を作る関数を返す。
+    fields (フィールド名のタプル) を指定すると、そのフィールドだけを持つ dict にする。
+    """
+    fields = fields or tuple(schema.model_fields)
+    getter = attrgetter(*fields)
+    if len(fields) == 1:
+        return lambda obj: {fields[0]: getter(obj)}
+    return lambda obj: dict(zip(fields, getter(obj)))
+
+
+def dump_trusted(schema, objects, fields=None):
+    """DB から読んだ objects を schema の形の dict のリストにする（検証しない）"""
+    serialize = trusted_serializer(schema, fields)
+    return [serialize(obj) for obj in objects]
@@ -1,4 +1,5 @@
 from flask import url_for
+from backend.benchmarks.common import QueryCounter
 from backend.models.user import User
 
 
@@ -19,6 +20,40 @@ class TestGetUser:
         assert data['user']['email'] == user.email
         assert 'password' not in data['user'] # パスワードが含まれていないことを確認
 
+    def test_get_user_not_modified(self, client, authenticated_user, db):
+        """
+        正常系: ETag が一致すれば 304、ユーザー名が変われば 200
+        """
+        user, access_token = authenticated_user
+        headers = {'Authorization': f'Bearer {access_token}'}
+
+        first = client.get(url_for('account.get_user'), headers=headers)
+        etag = first.headers['ETag']
+        assert 'Authorization' in first.headers['Vary']
+
+        second = client.get(url_for('account.get_user'), headers={**headers, 'If-None-Match': etag})
+        assert second.status_code == 304
+
+        client.patch(url_for('account.username_change'), headers=headers, json={'username': 'renamed_user'})
+        third = client.get(url_for('account.get_user'), headers={**headers, 'If-None-Match': etag})
+        assert third.status_code == 200
+        assert third.get_json()['user']['username'] == 'renamed_user'
+
+    def test_get_user_is_served_from_identity_cache(self, client, authenticated_user, db):
+        """
+        正常系: 2回目以降のリクエストでは users テーブルを SELECT しない
+        """
+        user, access_token = authenticated_user
+        headers = {'Authorization': f'Bearer {access_token}'}
+        assert client.get(url_for('account.get_user'), headers=headers).status_code == 200
+
+        with QueryCounter(db.engine) as counter:
+            response = client.get(url_for('account.get_user'), headers=headers)
+
+        assert response.status_code == 200
+        assert response.get_json()['user']['username'] == user.username
+        assert not any('FROM users' in statement for statement in counter.statements)
+
     def test_get_user_unauthorized(self, client):
         """
         異常系: 認証なしでアクセスした場合、401エラーが返る
@@ -137,6 +172,28 @@ class TestUpdatePassword:
         assert user.check_password_match('NewPassword456!')
         assert not user.check_password_match('Password123!') # 古いパスワードでは認証できない
 
+    def test_update_password_revokes_existing_tokens(self, client, authenticated_user):
+        """
+        正常系: パスワード変更後は、変更前に発行されたトークンが使えなくなる
+        """
+        user, access_token = authenticated_user
+        headers = {'Authorization': f'Bearer {access_token}'}
+        # 世代番号をキャッシュに載せた状態でパスワードを変更する
+        assert client.get(url_for('account.get_user'), headers=headers).status_code == 200
+        payload = {'old_password': 'Password123!', 'new_password': 'NewPassword456!'}
+
+        response = client.patch(url_for('account.password_update'), headers=headers, json=payload)
+        assert response.status_code == 200
+
+        response = client.get(url_for('account.get_user'), headers=headers)
+        assert response.status_code == 401
+        assert response.get_json()['error_code'] == 'TOKEN_REVOKED'
+
+        # 新しいパスワードでログインし直せば使える
+        login = client.post(url_for('auth.login'), json={'email': user.email, 'password': 'NewPassword456!'})
+        new_headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        assert client.get(url_for('account.get_user'), headers=new_headers).status_code == 200
+
     def test_update_password_wrong_old_password(self, client, authenticated_user):
         """
         異常系: 古いパスワードが間違っている場合、401エラー
@@ -1,6 +1,18 @@
+import csv
+import gzip
+import json
 import uuid
-from flask import url_for
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from flask import url_for, current_app
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.orm.exc import StaleDataError
+from flask_jwt_extended import create_access_token
+from backend.benchmarks.common import QueryCounter
 from backend.models.user import User
+from backend.models.furniture import Furniture
+from backend.catalog import export
 
 # --- GET /admin/users ---
 class TestGetUserlist:
@@ -37,6 +49,97 @@ class TestGetUserlist:
         assert data['error_code'] == 'FORBIDDEN'
 
 
+
+class TestGetUserlistPagination:
+    def _create_users(self, db):
+        # 最終ログイン日時が同じユーザー、未ログインのユーザーを混ぜる
+        base = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        for i in range(7):
+            last_login_at = None if i >= 5 else base + timedelta(hours=i // 2)
+            db.session.add(User(
+                username=f'member{i}', email=f'member{i}@example.com', password='p',
+                is_admin=(i % 3 == 0), last_login_at=last_login_at,
+            ))
+        db.session.commit()
+
+    def test_cursor_pages_cover_all_users_in_order(self, client, authenticated_admin, db):
+        """
+        正常系: カーソルをたどると、最終ログインの新しい順（未ログインは最後）に全員が重複なく返る
+        """
+        self._create_users(db)
+        _, access_token = authenticated_admin
+        headers = {'Authorization': f'Bearer {access_token}'}
+
+        expected = [u.username for u in db.session.execute(
+            select(User).order_by(User.last_login_at.desc().nulls_last(), User.id.desc())
+        ).scalars()]
+
+        usernames, cursor = [], ''
+        while True:
+            response = client.get(url_for('admin.get_userlist', cursor=cursor, per_page=2), headers=headers)
+            assert response.status_code == 200
+            data = response.get_json()
+            usernames += [u['username'] for u in data['users']]
+            if not data['has_next']:
+                break
+            cursor = data['next_cursor']
+
+        assert usernames == expected
+        assert set(usernames[-3:]) == {'member5', 'member6', 'adminuser'}
+
+    def test_prefix_search_and_is_admin_filter(self, client, authenticated_admin, db):
+        """
+        正常系: ユーザー名・メールアドレスの前方一致と is_admin で絞り込める
+        """
+        self._create_users(db)
+        _, access_token = authenticated_admin
+        headers = {'Authorization': f'Bearer {access_token}'}
+
+        response = client.get(url_for('admin.get_userlist', q='member', is_admin='true', page=1), headers=headers)
+        data = response.get_json()
+        assert response.status_code == 200
+        assert sorted(u['username'] for u in data['users']) == ['member0', 'member3', 'member6']
+        assert data['total_items'] == 3
+
+        response = client.get(url_for('admin.get_userlist', q='admin@'), headers=headers)
+        assert [u['username'] for u in response.get_json()['users']] == ['adminuser']
+
+        # 前方一致なので、途中に含まれるだけでは一致しない。LIKE のワイルドカードもエスケープされる
+        response = client.get(url_for('admin.get_userlist', q='ember'), headers=headers)
+        assert response.get_json()['users'] == []
+        response = client.get(url_for('admin.get_userlist', q='%'), headers=headers)
+        assert response.get_json()['users'] == []
+
+    def test_invalid_is_admin_returns_400(self, client, authenticated_admin):
+        _, access_token = authenticated_admin
+        headers = {'Authorization': f'Bearer {access_token}'}
+        response = client.get(url_for('admin.get_userlist', is_admin='maybe'), headers=headers)
+        assert response.status_code == 400
+
+    def test_full_list_is_streamed(self, client, authenticated_admin, db):
+        """
+        正常系: ページを指定しない場合は、全件をストリーミングで返す（JSON の形は従来通り）
+        """
+        self._create_users(db)
+        _, access_token = authenticated_admin
+        headers = {'Authorization': f'Bearer {access_token}'}
+
+        response = client.get(url_for('admin.get_userlist'), headers=headers)
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert len(response.get_json()['users']) == 8
+
+    def test_keyset_query_uses_index(self, db):
+        """
+        正常系: 一覧のクエリは last_login_at のインデックスを使い、一時的なソートをしない
+        """
+        stmt = select(User.id).order_by(User.last_login_at.desc().nulls_last(), User.id.desc()).limit(50)
+        sql = str(stmt.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        plan = ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+        assert 'ix_users_last_login_at_id' in plan
+        assert 'TEMP B-TREE' not in plan
+
+
 # --- PATCH /admin/users/<user_id>/change-role ---
 class TestChangeRole:
     def test_change_role_success(self, client, authenticated_admin, db):
@@ -61,6 +164,25 @@ class TestChangeRole:
         db.session.refresh(user_to_change)
         assert user_to_change.is_admin is True
 
+    def test_change_role_revokes_target_tokens(self, client, authenticated_admin, db):
+        """
+        正常系: 役割を変更されたユーザーの既存のトークンは失効する
+        """
+        target = User(username='target_user', email='tu@example.com', password='p')
+        db.session.add(target)
+        db.session.commit()
+        target_headers = {'Authorization': f'Bearer {create_access_token(identity=target.id)}'}
+        assert client.get(url_for('account.get_user'), headers=target_headers).status_code == 200
+
+        admin_user, access_token = authenticated_admin
+        headers = {'Authorization': f'Bearer {access_token}'}
+        response = client.patch(url_for('admin.change_role', user_id=target.id), headers=headers)
+        assert response.status_code == 200
+
+        response = client.get(url_for('account.get_user'), headers=target_headers)
+        assert response.status_code == 401
+        assert response.get_json()['error_code'] == 'TOKEN_REVOKED'
+
     def test_change_role_user_not_found(self, client, authenticated_admin):
         """
         異常系: 存在しないユーザーの役割を変更しようとすると404エラー
@@ -135,4 +257,331 @@ class TestAdminDeleteUser:
         data = response.get_json()
 
         assert response.status_code == 404
-        assert data['error_code'] == 'NOT_FOUND'
\ No newline at end of file
+        assert data['error_code'] == 'NOT_FOUND'
+
+# --- POST /admin/furnitures/import ---
+def _furniture_record(name, **overrides):
+    record = {
+        'name': name, 'description': 'Imported', 'color': 'white',
+        'price': '19.99', 'featured': False, 'stock': 3, 'image_url': None,
+    }
+    record.update(overrides)
+    return record
+
+
+class TestImportFurnitures:
+    def test_ndjson_import_upserts_and_reports_row_errors(self, client, authenticated_admin, db):
+        """
+        正常系: 正しい行は upsert され、不正な行は行番号とフィールドごとのエラーが返る
+        """
+        db.session.add(Furniture(**_furniture_record('Existing Desk', price=Decimal('5.00'), stock=1)))
+        db.session.commit()
+
+        lines = [
+            json.dumps(_furniture_record('New Chair')),
+            json.dumps(_furniture_record('Existing Desk', price='99.00', stock=7)),
+            json.dumps(_furniture_record('Bad Price', price='-1')),
+            '{not json',
+            '',
+            json.dumps(_furniture_record('Another Chair', color='purple')),
+        ]
+        _, access_token = authenticated_admin
+        response = client.post(
+            url_for('admin.import_furnitures_view'),
+            data='\n'.join(lines).encode(),
+            headers={'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/x-ndjson'},
+        )
+        data = response.get_json()
+
+        assert response.status_code == 200
+        assert data['imported'] == 2
+        assert data['failed'] == 3
+        assert sorted(e['line'] for e in data['errors']) == [3, 4, 6]
+        errors_by_line = {e['line']: e['errors'] for e in data['errors']}
+        assert 'price' in errors_by_line[3]
+        assert 'root' in errors_by_line[4]
+        assert 'color' in errors_by_line[6]
+
+        furnitures = {f.name: f for f in Furniture.query.all()}
+        assert sorted(furnitures) == ['Existing Desk', 'New Chair']
+        assert furnitures['Existing Desk'].price == Decimal('99.00')
+        assert furnitures['Existing Desk'].stock == 7
+
+    def test_csv_import_in_chunks(self, app, db, tmp_path):
+        """
+        正常系: CLI から CSV をチャンクごとに取り込める（空欄の image_url は NULL）
+        """
+        path = tmp_path / 'furnitures.csv'
+        with path.open('w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(_furniture_record('x')))
+            writer.writeheader()
+            for i in range(25):
+                writer.writerow(_furniture_record(f'Stool {i:02d}', image_url='', featured='true'))
+
+        result = app.test_cli_runner().invoke(args=['import-furnitures', str(path), '--chunk-size', '10'])
+
+        assert result.exit_code == 0, result.output
+        assert 'Imported 25 furnitures, 0 failed.' in result.output
+        assert Furniture.query.count() == 25
+        assert all(f.featured and f.image_url is None for f in Furniture.query.all())
+
+    def test_unsupported_content_type(self, client, authenticated_admin):
+        """
+        異常系: NDJSON / CSV 以外は 415
+        """
+        _, access_token = authenticated_admin
+        response = client.post(
+            url_for('admin.import_furnitures_view'),
+            json=[_furniture_record('Chair')],
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+        assert response.status_code == 415
+
+
+# --- PATCH / DELETE /admin/furnitures ---
+class TestBulkFurnitures:
+    def _create(self, db):
+        colors = ['white', 'white', 'black', 'white', 'brown']
+        for i, color in enumerate(colors):
+            db.session.add(Furniture(**_furniture_record(f'Table {i}', color=color, featured=(i % 2 == 0))))
+        db.session.commit()
+        return {f.name: f.id for f in Furniture.query.all()}
+
+    def test_bulk_update_by_filter_in_one_statement(self, client, authenticated_admin, db):
+        """
+        正常系: filter に一致する行を1つの UPDATE でまとめて更新する（行数によらず文の数は一定）
+        """
+        self._create(db)
+        _, access_token = authenticated_admin
+        headers = {'Authorization': f'Bearer {access_token}'}
+
+        with QueryCounter(db.engine) as counter:
+            response = client.patch(
+                url_for('admin.bulk_update_furnitures'),
+                json={'filter': {'color': 'white'}, 'patch': {'price': '49.00', 'stock': 0}},
+                headers=headers,
+            )
+
+        assert response.status_code == 200
+        assert response.get_json()['updated'] == 3
+        # 家具の行は読み込まず、UPDATE 1文だけで更新する（あとはカタログのバージョンの更新だけ）
+        furniture_statements = [s for s in counter.statements if 'furnitures' in s]
+        assert len(furniture_statements) == 1
+        assert furniture_statements[0].startswith('UPDATE furnitures')
+
+        db.session.expire_all()
+        prices = {f.color: f.price for f in Furniture.query.all()}
+        assert prices['white'] == Decimal('49.00')
+        assert prices['black'] == Decimal('19.99')
+
+    def test_bulk_update_by_ids_returns_ids(self, client, authenticated_admin, db):
+        ids = self._create(db)
+        _, access_token = authenticated_admin
+        target = [ids['Table 0'], ids['Table 2']]
+
+        response = client.patch(
+            url_for('admin.bulk_update_furnitures'),
+            json={'ids': target + [999999], 'patch': {'featured': True}},
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+        assert response.status_code == 200
+        assert response.get_json()['ids'] == sorted(target)
+
+    def test_bulk_update_rejects_name_and_ambiguous_selection(self, client, authenticated_admin, db):
+        """
+        異常系: name の一括更新、ids と filter の両方指定、条件のない filter は 422
+        """
+        _, access_token = authenticated_admin
+        headers = {'Authorization': f'Bearer {access_token}'}
+        for body in (
+            {'ids': [1], 'patch': {'name': 'Same Name'}},
+            {'ids': [1], 'filter': {'color': 'white'}, 'patch': {'stock': 1}},
+            {'filter': {}, 'patch': {'stock': 1}},
+        ):
+            response = client.patch(url_for('admin.bulk_update_furnitures'), json=body, headers=headers)
+            assert response.status_code == 422
+
+    def test_bulk_delete_by_filter(self, client, authenticated_admin, db):
+        ids = self._create(db)
+        _, access_token = authenticated_admin
+
+        response = client.delete(
+            url_for('admin.bulk_delete_furnitures'),
+            json={'filter': {'color': 'white', 'featured': True}},
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+        assert response.status_code == 200
+        assert response.get_json()['ids'] == sorted([ids['Table 0']])
+        assert Furniture.query.count() == 4
+
+
+# --- GET /admin/furnitures/export ---
+class TestExportFurnitures:
+    def _create(self, db, count):
+        for i in range(count):
+            db.session.add(Furniture(**_furniture_record(f'Lamp {i:03d}', color='black' if i % 2 else 'white')))
+        db.session.commit()
+
+    def test_ndjson_export_streams_filtered_rows(self, client, authenticated_admin, db, monkeypatch):
+        """
+        正常系: 一覧と同じ q で絞り込んだ行を、1行1 JSON でストリーミングする
+        """
+        monkeypatch.setattr(export, 'FLUSH_BYTES', 100)
+        self._create(db, 6)
+        _, access_token = authenticated_admin
+
+        response = client.get(
+            url_for('admin.export_furnitures', q='black'),
+            headers={'Authorization': f'Bearer {access_token}'},
+        )
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'application/x-ndjson'
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert sorted(row['name'] for row in rows) == ['Lamp 001', 'Lamp 003', 'Lamp 005']
+        assert rows[0]['price'] == '19.99'
+
+    def test_gzip_csv_export_can_be_imported_back(self, app, client, authenticated_admin, db, tmp_path):
+        """
+        正常系: gzip を受け付けるクライアントには圧縮して返し、CSV はそのままインポートで読み戻せる
+        """
+        self._create(db, 4)
+        _, access_token = authenticated_admin
+
+        response = client.get(
+            url_for('admin.export_furnitures', format='csv'),
+            headers={'Authorization': f'Bearer {access_token}', 'Accept-Encoding': 'gzip'},
+        )
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        body = gzip.decompress(response.get_data())
+
+        Furniture.query.delete()
+        db.session.commit()
+        path = tmp_path / 'export.csv'
+        path.write_bytes(body)
+        result = app.test_cli_runner().invoke(args=['import-furnitures', str(path)])
+        assert 'Imported 4 furnitures, 0 failed.' in result.output
+
+    def test_cli_export(self, app, db, tmp_path):
+        self._create(db, 3)
+        path = tmp_path / 'export.ndjson.gz'
+
+        result = app.test_cli_runner().invoke(args=['export-furnitures', str(path), '--gzip'])
+
+        assert result.exit_code == 0, result.output
+        assert len(gzip.decompress(path.read_bytes()).splitlines()) == 3
+
+
+class TestAdminFurnitureFilters:
+    def test_admin_list_and_export_apply_filters(self, client, authenticated_admin, db):
+        """
+        正常系: 管理画面の一覧とエクスポートでも、公開APIと同じ絞り込み条件が使える
+        """
+        for i in range(6):
+            db.session.add(Furniture(**_furniture_record(
+                f'Desk {i}', color='black' if i < 4 else 'white', price=Decimal('50.00') + i * 10, stock=i % 2,
+            )))
+        db.session.commit()
+        _, access_token = authenticated_admin
+        headers = {'Authorization': f'Bearer {access_token}'}
+
+        response = client.get(
+            url_for('admin.get_furnitures', color='black', min_price='60', in_stock='true'), headers=headers
+        )
+        assert response.status_code == 200
+        assert sorted(f['name'] for f in response.get_json()['furnitures']) == ['Desk 1', 'Desk 3']
+
+        response = client.get(url_for('admin.export_furnitures', max_price='60'), headers=headers)
+        assert sorted(json.loads(line)['name'] for line in response.data.splitlines()) == ['Desk 0', 'Desk 1']
+
+        response = client.get(url_for('admin.get_furnitures', featured='maybe'), headers=headers)
+        assert response.status_code == 400
+
+
+class TestFurnitureOptimisticConcurrency:
+    def _setup(self, db, authenticated_admin):
+        furniture = Furniture(**_furniture_record('Shared Sofa'))
+        db.session.add(furniture)
+        db.session.commit()
+        _, access_token = authenticated_admin
+        return furniture.id, {'Authorization': f'Bearer {access_token}'}
+
+    def test_etag_and_conditional_update(self, client, authenticated_admin, db):
+        """
+        正常系: 詳細の ETag を If-Match で送ると更新でき、新しい ETag が返る。古い ETag での更新は 412 で、上書きしない
+        """
+        id, headers = self._setup(db, authenticated_admin)
+        etag = client.get(url_for('admin.get_furniture', id=id), headers=headers).headers['ETag']
+        assert etag == '"v1"'
+
+        first = client.patch(url_for('admin.update_furniture', id=id), headers={**headers, 'If-Match': etag}, json={'stock': 7})
+        assert first.status_code == 200
+        assert first.headers['ETag'] == '"v2"'
+
+        # 同じ古い ETag で更新しようとした2人目の管理者
+        second = client.patch(url_for('admin.update_furniture', id=id), headers={**headers, 'If-Match': etag}, json={'stock': 1})
+        assert second.status_code == 412
+        assert second.get_json()['error_code'] == 'PRECONDITION_FAILED'
+        db.session.expire_all()
+        assert db.session.get(Furniture, id).stock == 7
+
+    def test_if_match_is_required(self, client, authenticated_admin, db):
+        """
+        異常系: If-Match のない更新・削除は 428。弱い ETag は一致しないので 412。存在しない家具は 404
+        """
+        id, headers = self._setup(db, authenticated_admin)
+        assert client.patch(url_for('admin.update_furniture', id=id), headers=headers, json={'stock': 1}).status_code == 428
+        assert client.delete(url_for('admin.delete_furniture', id=id), headers=headers).status_code == 428
+        weak = {**headers, 'If-Match': 'W/"v1"'}
+        assert client.patch(url_for('admin.update_furniture', id=id), headers=weak, json={'stock': 1}).status_code == 412
+        missing = {**headers, 'If-Match': '"v1"'}
+        assert client.delete(url_for('admin.delete_furniture', id=999), headers=missing).status_code == 404
+
+    def test_conditional_delete(self, client, authenticated_admin, db):
+        """
+        正常系: 古い ETag での削除は 412、現在の ETag なら削除できる
+        """
+        id, headers = self._setup(db, authenticated_admin)
+        client.patch(url_for('admin.update_furniture', id=id), headers={**headers, 'If-Match': '"v1"'}, json={'stock': 2})
+        assert client.delete(url_for('admin.delete_furniture', id=id), headers={**headers, 'If-Match': '"v1"'}).status_code == 412
+        assert client.delete(url_for('admin.delete_furniture', id=id), headers={**headers, 'If-Match': '"v2"'}).status_code == 204
+        assert db.session.scalar(select(Furniture.id).where(Furniture.id == id)) is None
+
+    def test_version_checked_inside_update(self, client, authenticated_admin, db):
+        """
+        正常系: バージョンの確認は UPDATE ... WHERE version の条件で行い、事前に SELECT しない
+        """
+        id, headers = self._setup(db, authenticated_admin)
+        with QueryCounter(db.engine) as counter:
+            response = client.patch(url_for('admin.update_furniture', id=id), headers={**headers, 'If-Match': '"v1"'}, json={'stock': 3})
+        statements = [s for s in counter.statements if 'furnitures' in s]
+        assert response.status_code == 200
+        assert len(statements) == 1
+        assert statements[0].startswith('UPDATE furnitures') and 'version IN' in statements[0] and 'RETURNING' in statements[0]
+
+    def test_other_writes_advance_version(self, client, authenticated_admin, db):
+        """
+        正常系: 一括更新でもバージョンが進むので、その前に取得した ETag では更新できない。
+        ORM で読み込んだ後に他で更新された行を flush すると StaleDataError になる
+        """
+        id, headers = self._setup(db, authenticated_admin)
+        client.patch(url_for('admin.bulk_update_furnitures'), headers=headers, json={'ids': [id], 'patch': {'stock': 9}})
+        assert client.patch(url_for('admin.update_furniture', id=id), headers={**headers, 'If-Match': '"v1"'}, json={'stock': 1}).status_code == 412
+
+        db.session.expire_all()
+        furniture = db.session.get(Furniture, id)
+        assert furniture.version == 2
+        # 別のリクエストでの更新（このセッションの furniture には反映されない）
+        db.session.execute(
+            update(Furniture).where(Furniture.id == id).values(version=Furniture.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        furniture.stock = 0
+        with pytest.raises(StaleDataError) as excinfo:
+            db.session.commit()
+
+        # ORM の flush で見つかったバージョンの不一致も、If-Match の不一致と同じ 412 になる
+        response = current_app.make_response(current_app.handle_user_exception(excinfo.value))
+        assert response.status_code == 412
+        assert response.get_json()['error_code'] == 'PRECONDITION_FAILED'
@@ -157,4 +157,75 @@ class TestTokenFlow:
         final_refresh_response = client.post(url_for('auth.refresh_tokens'))
         final_refresh_data = final_refresh_response.get_json()
         assert final_refresh_response.status_code == 401
-        assert final_refresh_data['error_code'] == 'AUTHORIZATION_HEADER_MISSING'
\ No newline at end of file
+        assert final_refresh_data['error_code'] == 'AUTHORIZATION_HEADER_MISSING'
+
+class TestRefreshRotation:
+    def _login(self, client, db):
+        email, password = 'rotate@example.com', 'Password123!'
+        u = User(username='rotateuser', email=email)
+        u.set_password_hash(password)
+        db.session.add(u)
+        db.session.commit()
+        response = client.post(url_for('auth.login'), json={'email': email, 'password': password})
+        assert response.status_code == 200
+        cookie_name = current_app.config['JWT_REFRESH_COOKIE_NAME']
+        return cookie_name, client.get_cookie(cookie_name).value
+
+    def test_concurrent_refresh_within_grace_returns_same_pair(self, client, db):
+        """
+        複数のタブから同じリフレッシュトークンで同時にリフレッシュしても、
+        2回目は猶予期間内なので最初と同じトークンのペアが返り、ログアウトされない
+        """
+        cookie_name, old_refresh = self._login(client, db)
+
+        first = client.post(url_for('auth.refresh_tokens'))
+        assert first.status_code == 200
+        assert BlockedToken.query.count() == 1
+
+        # 別のタブはまだ古いリフレッシュトークンを持っている
+        client.set_cookie(cookie_name, old_refresh)
+        second = client.post(url_for('auth.refresh_tokens'))
+        assert second.status_code == 200
+        assert second.get_json()['access_token'] == first.get_json()['access_token']
+        assert BlockedToken.query.count() == 1
+
+    def test_reuse_after_grace_revokes_family(self, client, db, monkeypatch):
+        """
+        猶予期間を過ぎてから古いリフレッシュトークンが使われたら、ファミリーごと失効させる
+        """
+        from backend.refresh_rotation import refresh_rotation
+
+        cookie_name, old_refresh = self._login(client, db)
+        assert client.post(url_for('auth.refresh_tokens')).status_code == 200
+        new_refresh = client.get_cookie(cookie_name).value
+
+        monkeypatch.setattr(refresh_rotation, 'grace_seconds', -1)
+        refresh_rotation.clear()
+
+        client.set_cookie(cookie_name, old_refresh)
+        reuse = client.post(url_for('auth.refresh_tokens'))
+        assert reuse.status_code == 401
+        assert reuse.get_json()['error_code'] == 'TOKEN_REVOKED'
+
+        # 正規のクライアントが持っている新しいリフレッシュトークンも使えなくなる
+        client.set_cookie(cookie_name, new_refresh)
+        response = client.post(url_for('auth.refresh_tokens'))
+        assert response.status_code == 401
+        assert response.get_json()['error_code'] == 'TOKEN_REVOKED'
+
+    def test_refresh_after_user_deleted_on_another_worker(self, client, db):
+        """
+        他のワーカーでユーザーが削除され、このワーカーの identity_cache にスナップショットが残っていても、
+        リフレッシュは 500 ではなく 401 になる
+        """
+        cookie_name, _ = self._login(client, db)
+        # 1回リフレッシュして、このワーカーのキャッシュにユーザーを載せる
+        assert client.post(url_for('auth.refresh_tokens')).status_code == 200
+
+        # 別のワーカーでの削除を再現する（このワーカーのキャッシュは invalidate されない）
+        db.session.delete(User.get_user_by_email('rotate@example.com'))
+        db.session.commit()
+
+        response = client.post(url_for('auth.refresh_tokens'))
+        assert response.status_code == 401
+        assert response.get_json()['error_code'] == 'UNAUTHORIZED'
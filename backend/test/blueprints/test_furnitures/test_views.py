@@ -0,0 +1,574 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from flask import url_for
+from backend.benchmarks.common import QueryCounter
+from backend.models.furniture import Furniture
+from backend.catalog.snapshot import catalog_snapshots
+from backend.extensions import response_cache
+
+
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def create_furnitures(db, count, **overrides):
+    """
+    テスト用の家具を count 件作成する。
+    タイムスタンプは server_default に任せず明示的に与え、並び順をテストで予測できるようにする。
+    """
+    furnitures = []
+    for i in range(count):
+        data = {
+            'name': f'Chair {i:03d}',
+            'description': f'A comfortable chair number {i}',
+            'color': 'brown',
+            # 価格を重複させて、idによるタイブレークもテストできるようにする
+            'price': Decimal('10.00') + (i // 2),
+            'featured': i % 3 == 0,
+            'stock': i,
+            'image_url': None,
+            'created_at': BASE_TIME + timedelta(minutes=i),
+            'updated_at': BASE_TIME + timedelta(minutes=i),
+        }
+        data.update(overrides)
+        furnitures.append(Furniture(**data))
+    db.session.add_all(furnitures)
+    db.session.commit()
+    return furnitures
+
+
+def walk_cursor_pages(client, **params):
+    """next_cursor を辿って全ページ分のidを集める"""
+    ids = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(url_for('furnitures.get_furnitures', cursor=cursor, **params))
+        assert response.status_code == 200
+        data = response.get_json()
+        page_ids = [item['id'] for item in data['furnitures']]
+        # 前のページの行がまた返ってきたら、カーソルが進んでいない（無限ループになる）
+        assert not set(page_ids) & set(ids)
+        ids.extend(page_ids)
+        assert data['has_next'] == (data['next_cursor'] is not None)
+        cursor = data['next_cursor']
+    return ids
+
+
+def assert_engines_match(monkeypatch, fetch):
+    """fetch() の結果が SQL とインメモリのエンジン (catalog_snapshots) で同じになることを確かめ、その結果を返す"""
+    results = {}
+    for engine in ('sql', 'memory'):
+        monkeypatch.setattr(catalog_snapshots, 'enabled', engine == 'memory')
+        response_cache.clear()
+        results[engine] = fetch()
+    assert results['memory'] == results['sql']
+    return results['sql']
+
+
+# --- GET /furnitures ---
+class TestGetFurnitures:
+    def test_page_mode_still_works(self, client, db):
+        """
+        正常系: cursor を付けない従来のページ番号方式はそのまま使える
+        """
+        create_furnitures(db, 5)
+
+        response = client.get(url_for('furnitures.get_furnitures', page=2))
+        data = response.get_json()
+
+        assert response.status_code == 200
+        assert data['total_items'] == 5
+        assert data['current_page'] == 2
+        assert len(data['furnitures']) == 2
+
+    def test_cursor_mode_walks_all_rows_in_order(self, client, db):
+        """
+        正常系: 全ての sort キーで、カーソルを辿ると重複も欠落もなく全件を正しい順で取得できる
+        """
+        furnitures = create_furnitures(db, 7)
+
+        for sort, attr in [('price', 'price'), ('created', 'created_at'), ('updated', 'updated_at')]:
+            for order in ['asc', 'desc']:
+                ids = walk_cursor_pages(client, sort=sort, order=order)
+                expected = sorted(furnitures, key=lambda f: (getattr(f, attr), f.id), reverse=order == 'desc')
+                assert ids == [f.id for f in expected]
+
+    def test_cursor_mode_default_order(self, client, db):
+        """
+        正常系: sort を指定しない場合は更新日時の降順
+        """
+        furnitures = create_furnitures(db, 5)
+
+        ids = walk_cursor_pages(client)
+
+        assert ids == [f.id for f in reversed(furnitures)]
+
+    def test_cursor_mode_with_server_default_timestamps(self, client, db):
+        """
+        正常系: created_at / updated_at を DB の既定値 (now()) に任せた行でも、カーソルで全行を1回ずつ辿れる
+        """
+        db.session.add_all(
+            Furniture(name=f'Stool {i}', description='A stool', color='black', price=Decimal('5.00'), featured=False, stock=1)
+            for i in range(7)
+        )
+        db.session.commit()
+        ids = [id for id, in db.session.execute(db.select(Furniture.id))]
+
+        for params in ({}, {'sort': 'created', 'order': 'asc'}, {'sort': 'updated', 'order': 'desc'}):
+            assert sorted(walk_cursor_pages(client, **params)) == sorted(ids)
+
+    def test_cursor_from_other_ordering_is_rejected(self, client, db):
+        """
+        異常系: 別の並び順で発行されたカーソルや壊れたカーソルは400エラー
+        """
+        create_furnitures(db, 5)
+        first = client.get(url_for('furnitures.get_furnitures', cursor='', sort='price', order='asc'))
+        cursor = first.get_json()['next_cursor']
+
+        response = client.get(url_for('furnitures.get_furnitures', cursor=cursor, sort='price', order='desc'))
+        assert response.status_code == 400
+        assert response.get_json()['error_code'] == 'BAD_REQUEST'
+
+        response = client.get(url_for('furnitures.get_furnitures', cursor='not-a-cursor'))
+        assert response.status_code == 400
+
+
+# --- GET /furnitures?q= ---
+class TestSearchFurnitures:
+    def test_search_matches_words_and_prefixes(self, client, db):
+        """
+        正常系: 名前・説明・色の単語に前方一致でヒットする
+        """
+        create_furnitures(db, 1, name='Oak Table', description='Solid dining table', color='natural')
+        create_furnitures(db, 1, name='Leather Sofa', description='Soft and wide', color='black')
+
+        for q, expected in [('table', ['Oak Table']), ('sof', ['Leather Sofa']), ('black', ['Leather Sofa']), ('desk', [])]:
+            response = client.get(url_for('furnitures.get_furnitures', q=q))
+            names = [item['name'] for item in response.get_json()['furnitures']]
+            assert response.status_code == 200
+            assert names == expected
+
+    def test_search_index_follows_updates_and_deletes(self, client, db):
+        """
+        正常系: 更新・削除した行は検索インデックスにも反映される
+        """
+        table, sofa = create_furnitures(db, 1, name='Oak Table')[0], create_furnitures(db, 1, name='Leather Sofa')[0]
+        table.name = 'Walnut Desk'
+        db.session.delete(sofa)
+        db.session.commit()
+
+        assert client.get(url_for('furnitures.get_furnitures', q='table')).get_json()['furnitures'] == []
+        assert client.get(url_for('furnitures.get_furnitures', q='sofa')).get_json()['furnitures'] == []
+        found = client.get(url_for('furnitures.get_furnitures', q='walnut')).get_json()['furnitures']
+        assert [item['name'] for item in found] == ['Walnut Desk']
+
+    def test_sort_by_relevance(self, client, db):
+        """
+        正常系: sort=relevance では検索語を多く含む行が先に来る
+        """
+        create_furnitures(db, 1, name='Plain Stool', description='A stool with a chair-like back')
+        create_furnitures(db, 1, name='Chair Deluxe', description='The chair of chairs, a reading chair')
+
+        response = client.get(url_for('furnitures.get_furnitures', q='chair', sort='relevance', order='desc'))
+        names = [item['name'] for item in response.get_json()['furnitures']]
+
+        assert names == ['Chair Deluxe', 'Plain Stool']
+
+
+# --- レスポンスキャッシュ ---
+class TestResponseCache:
+    def test_repeated_request_is_served_from_cache(self, client, db):
+        """
+        正常系: パラメータの順番が違っても同じリクエストなら2回目はキャッシュから返る
+        """
+        create_furnitures(db, 3)
+
+        first = client.get('/api/v1/furnitures?sort=price&order=asc&page=1')
+        second = client.get('/api/v1/furnitures?page=1&order=asc&sort=price')
+
+        assert first.headers['X-Cache'] == 'MISS'
+        assert second.headers['X-Cache'] == 'HIT'
+        assert first.get_data() == second.get_data()
+
+    def test_admin_write_invalidates_cache(self, client, db, authenticated_admin):
+        """
+        正常系: 管理者が家具を更新した直後のリクエストから新しいデータが返る
+        """
+        furniture = create_furnitures(db, 1)[0]
+        admin_user, access_token = authenticated_admin
+        headers = {'Authorization': f'Bearer {access_token}'}
+        detail_url = url_for('furnitures.get_furniture', id=furniture.id)
+
+        assert client.get(detail_url).get_json()['price'] == '10.00'
+        assert client.get(detail_url).headers['X-Cache'] == 'HIT'
+
+        response = client.patch(
+            url_for('admin.update_furniture', id=furniture.id), headers={**headers, 'If-Match': '*'}, json={'price': '99.50'}
+        )
+        assert response.status_code == 200
+
+        response = client.get(detail_url)
+        assert response.headers['X-Cache'] == 'MISS'
+        assert response.get_json()['price'] == '99.50'
+
+    def test_not_found_is_not_cached(self, client, db):
+        """
+        正常系: 404 はキャッシュしない
+        """
+        response = client.get(url_for('furnitures.get_furniture', id=999))
+
+        assert response.status_code == 404
+        assert 'X-Cache' not in response.headers
+
+
+# --- 条件付き GET ---
+class TestConditionalGet:
+    def test_list_returns_304_for_matching_etag(self, client, db):
+        """
+        正常系: 一覧の ETag を If-None-Match で送ると 304 が返り、ボディは空
+        """
+        create_furnitures(db, 3)
+
+        first = client.get(url_for('furnitures.get_furnitures', sort='price', order='asc'))
+        etag = first.headers['ETag']
+        assert first.status_code == 200
+
+        second = client.get(url_for('furnitures.get_furnitures', sort='price', order='asc'), headers={'If-None-Match': etag})
+        assert second.status_code == 304
+        assert second.get_data() == b''
+        assert second.headers['ETag'] == etag
+
+        # パラメータが違えば ETag も違う
+        other = client.get(url_for('furnitures.get_furnitures', sort='price', order='desc'), headers={'If-None-Match': etag})
+        assert other.status_code == 200
+
+    def test_etag_changes_after_admin_write(self, client, db, authenticated_admin):
+        """
+        正常系: 管理者が家具を削除すると、一覧・詳細の ETag が変わり 200 が返る
+        """
+        furnitures = create_furnitures(db, 2)
+        admin_user, access_token = authenticated_admin
+        list_etag = client.get(url_for('furnitures.get_furnitures')).headers['ETag']
+        detail_url = url_for('furnitures.get_furniture', id=furnitures[0].id)
+        detail_etag = client.get(detail_url).headers['ETag']
+
+        response = client.delete(
+            url_for('admin.delete_furniture', id=furnitures[1].id),
+            headers={'Authorization': f'Bearer {access_token}', 'If-Match': '*'},
+        )
+        assert response.status_code == 204
+
+        response = client.get(url_for('furnitures.get_furnitures'), headers={'If-None-Match': list_etag})
+        assert response.status_code == 200
+        # カタログのバージョンが更新された日時が Last-Modified になる
+        assert 'Last-Modified' in response.headers
+        assert len(response.get_json()['furnitures']) == 1
+        assert client.get(detail_url, headers={'If-None-Match': detail_etag}).status_code == 200
+
+
+class TestFieldSelection:
+    def test_summary_view_selects_only_summary_columns(self, client, db):
+        """
+        正常系: view=summary では description などを SELECT せず、レスポンスにも含めない
+        """
+        create_furnitures(db, 3)
+        db.session.expire_all()
+
+        with QueryCounter(db.engine) as counter:
+            response = client.get(url_for('furnitures.get_furnitures', view='summary'))
+
+        assert response.status_code == 200
+        items = response.get_json()['furnitures']
+        assert set(items[0]) == {'id', 'name', 'price', 'color', 'image_url', 'featured'}
+        # db.paginate の COUNT(*) のサブクエリは、DB がその中で使われないカラムを読まないので対象外
+        selects = [s for s in counter.statements if s.startswith('SELECT furnitures.')]
+        assert len(selects) == 1
+        assert 'description' not in selects[0]
+
+    def test_fields_in_cursor_mode(self, client, db):
+        """
+        正常系: fields= はキーセット方式でも使え、id は常に含まれる
+        """
+        create_furnitures(db, 5)
+
+        response = client.get(url_for('furnitures.get_furnitures', fields='name,price', cursor='', sort='price', order='asc'))
+        data = response.get_json()
+        assert response.status_code == 200
+        assert all(set(item) == {'id', 'name', 'price'} for item in data['furnitures'])
+
+        next_page = client.get(url_for(
+            'furnitures.get_furnitures', fields='name,price', cursor=data['next_cursor'], sort='price', order='asc'
+        ))
+        assert next_page.status_code == 200
+        assert next_page.get_json()['furnitures'][0]['name'] == 'Chair 002'
+
+    def test_unknown_field_returns_400(self, client, db):
+        response = client.get(url_for('furnitures.get_furnitures', fields='name,password'))
+        assert response.status_code == 400
+
+
+class TestCatalogSnapshotEngine:
+    QUERIES = [
+        {'cursor': '', 'sort': 'price', 'order': 'asc'},
+        {'cursor': '', 'sort': 'price', 'order': 'desc'},
+        {'cursor': '', 'sort': 'created', 'order': 'desc', 'q': 'comfortable'},
+        {'cursor': ''},
+        {'sort': 'created', 'order': 'asc', 'page': 3},
+        {'sort': 'created', 'order': 'desc', 'view': 'summary'},
+        {'q': 'number 1'},
+        {'page': 99},
+    ]
+
+    def _get_all(self, client):
+        results = []
+        for params in self.QUERIES:
+            if 'cursor' in params:
+                rest = {k: v for k, v in params.items() if k != 'cursor'}
+                results.append(walk_cursor_pages(client, **rest))
+            else:
+                response = client.get(url_for('furnitures.get_furnitures', **params))
+                results.append((response.status_code, response.get_json()))
+        return results
+
+    def test_memory_engine_matches_sql(self, client, db, monkeypatch):
+        """
+        正常系: インメモリのエンジンでも、絞り込み・並び替え・ページングの結果は SQL と同じ
+        """
+        create_furnitures(db, 11)
+        assert_engines_match(monkeypatch, lambda: self._get_all(client))
+
+    def test_memory_engine_serves_without_furnitures_queries(self, client, db, monkeypatch):
+        """
+        正常系: スナップショットができた後は、furnitures テーブルに問い合わせない
+        """
+        monkeypatch.setattr(catalog_snapshots, 'enabled', True)
+        furniture_id = create_furnitures(db, 5)[0].id
+        client.get(url_for('furnitures.get_furnitures'))
+
+        with QueryCounter(db.engine) as counter:
+            response_cache.clear()
+            assert client.get(url_for('furnitures.get_furnitures', sort='price', order='desc')).status_code == 200
+            assert client.get(url_for('furnitures.get_furniture', id=furniture_id)).status_code == 200
+        assert not [s for s in counter.statements if 'FROM furnitures' in s]
+
+    def test_snapshot_picks_up_admin_writes(self, client, db, authenticated_admin, monkeypatch):
+        """
+        正常系: 管理者の更新・削除でカタログのバージョンが進むと、変更された行だけを読み直して反映する
+        """
+        monkeypatch.setattr(catalog_snapshots, 'enabled', True)
+        ids = [furniture.id for furniture in create_furnitures(db, 4)]
+        _, access_token = authenticated_admin
+        headers = {'Authorization': f'Bearer {access_token}'}
+        assert len(walk_cursor_pages(client)) == 4
+
+        client.patch(url_for('admin.update_furniture', id=ids[0]), headers={**headers, 'If-Match': '*'}, json={'price': '99.50'})
+        client.delete(url_for('admin.delete_furniture', id=ids[1]), headers={**headers, 'If-Match': '*'})
+
+        with QueryCounter(db.engine) as counter:
+            response = client.get(url_for('furnitures.get_furnitures', cursor='', sort='price', order='desc'))
+
+        assert response.get_json()['furnitures'][0]['price'] == '99.50'
+        assert ids[1] not in walk_cursor_pages(client)
+        full_reads = [s for s in counter.statements if s.startswith('SELECT furnitures.id, furnitures.name')]
+        assert len(full_reads) == 1 and 'IN' in full_reads[0]
+
+
+class TestFacets:
+    def _create_catalog(self, db):
+        create_furnitures(db, 6)  # すべて brown で 10.00 〜 12.00。おすすめは 2件
+        db.session.add_all([
+            Furniture(name='White Sofa', description='A large sofa', color='white', price=Decimal('250.00'),
+                      featured=True, stock=1, created_at=BASE_TIME, updated_at=BASE_TIME),
+            Furniture(name='Black Table', description='A solid table', color='black', price=Decimal('1000.00'),
+                      featured=False, stock=1, created_at=BASE_TIME, updated_at=BASE_TIME),
+        ])
+        db.session.commit()
+
+    def test_counts_all_facets(self, client, db):
+        """
+        正常系: 色・おすすめ・価格帯ごとの件数を返す。該当のない色や価格帯は 0
+        """
+        self._create_catalog(db)
+        response = client.get(url_for('furnitures.get_furniture_facets'))
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['total'] == 8
+        assert data['colors'] == {'natural': 0, 'brown': 6, 'white': 1, 'black': 1, 'gray': 0}
+        assert data['featured'] == {'true': 3, 'false': 5}
+        assert [bucket['count'] for bucket in data['price']] == [6, 0, 0, 1, 0, 1]
+        assert data['price'][0] == {'min': '0', 'max': '50', 'count': 6}
+        assert data['price'][-1] == {'min': '1000', 'max': None, 'count': 1}
+
+    def test_counts_within_search_results(self, client, db):
+        """
+        正常系: q を指定すると、検索結果の中での件数になる
+        """
+        self._create_catalog(db)
+        data = client.get(url_for('furnitures.get_furniture_facets', q='sofa')).get_json()
+        assert data['total'] == 1
+        assert data['colors']['white'] == 1 and data['colors']['brown'] == 0
+        assert [bucket['count'] for bucket in data['price']] == [0, 0, 0, 1, 0, 0]
+
+    def test_single_aggregate_query(self, client, db):
+        """
+        正常系: すべての件数を furnitures への1回の問い合わせで数える
+        """
+        self._create_catalog(db)
+        with QueryCounter(db.engine) as counter:
+            assert client.get(url_for('furnitures.get_furniture_facets', q='chair')).status_code == 200
+        facet_queries = [s for s in counter.statements if 'FROM furnitures' in s]
+        assert len(facet_queries) == 1
+        assert 'FILTER (WHERE' in facet_queries[0]
+
+    def test_cached_per_catalog_version(self, client, db, authenticated_admin):
+        """
+        正常系: 同じバージョンの間はキャッシュを返し、管理者の更新後は数え直す
+        """
+        self._create_catalog(db)
+        first = client.get(url_for('furnitures.get_furniture_facets'))
+        revalidated = client.get(url_for('furnitures.get_furniture_facets'), headers={'If-None-Match': first.headers['ETag']})
+        assert revalidated.status_code == 304
+
+        _, access_token = authenticated_admin
+        furniture = db.session.scalars(db.select(Furniture).filter_by(name='White Sofa')).one()
+        client.delete(
+            url_for('admin.delete_furniture', id=furniture.id),
+            headers={'Authorization': f'Bearer {access_token}', 'If-Match': '*'},
+        )
+
+        data = client.get(url_for('furnitures.get_furniture_facets')).get_json()
+        assert data['total'] == 7 and data['colors']['white'] == 0
+
+    def test_memory_engine_matches_sql(self, client, db, monkeypatch):
+        """
+        正常系: インメモリのエンジンでも SQL と同じ件数になる
+        """
+        self._create_catalog(db)
+        assert_engines_match(monkeypatch, lambda: [
+            client.get(url_for('furnitures.get_furniture_facets', **params)).get_json()
+            for params in ({}, {'q': 'chair'}, {'q': 'table'})
+        ])
+
+
+class TestListFilters:
+    def _create_catalog(self, db):
+        # brown: 10.00 〜 14.00 の 10件（stock は 0 〜 9）, white: 100.00 の 3件（在庫なし、すべておすすめ）
+        create_furnitures(db, 10)
+        for i in range(3):
+            db.session.add(Furniture(
+                name=f'White Shelf {i}', description='A tall shelf', color='white', price=Decimal('100.00'),
+                featured=True, stock=0, created_at=BASE_TIME + timedelta(hours=1, minutes=i),
+                updated_at=BASE_TIME + timedelta(hours=1, minutes=i),
+            ))
+        db.session.commit()
+
+    def _list(self, client, **params):
+        response = client.get(url_for('furnitures.get_furnitures', **params))
+        assert response.status_code == 200
+        return response.get_json()
+
+    def test_filters_in_page_and_cursor_mode(self, client, db):
+        """
+        正常系: 価格帯・色・おすすめ・在庫の条件を組み合わせて絞り込める。ページ番号方式でもカーソル方式でも同じ
+        """
+        self._create_catalog(db)
+        params = {'min_price': '11', 'max_price': '13.00', 'color': 'brown', 'sort': 'price', 'order': 'asc'}
+        data = self._list(client, **params)
+        assert data['total_items'] == 6
+        ids = walk_cursor_pages(client, **params)
+        assert len(ids) == 6
+        prices = [Decimal(db.session.get(Furniture, id).price) for id in ids]
+        assert prices == sorted(prices) and min(prices) == Decimal('11.00') and max(prices) == Decimal('13.00')
+
+        assert self._list(client, featured='true', in_stock='false')['total_items'] == 4
+        assert self._list(client, in_stock='true', color='white')['total_items'] == 0
+        assert self._list(client, featured='false', in_stock='true')['total_items'] == 6
+
+    def test_invalid_filters(self, client, db):
+        """
+        異常系: 不正な値や min_price > max_price は 400
+        """
+        for params in (
+            {'min_price': 'cheap'}, {'max_price': '-1'}, {'min_price': 'NaN'}, {'color': 'purple'},
+            {'featured': 'yes'}, {'in_stock': '1'}, {'min_price': '20', 'max_price': '10'},
+        ):
+            assert client.get(url_for('furnitures.get_furnitures', **params)).status_code == 400
+
+    def test_memory_engine_matches_sql(self, client, db, monkeypatch):
+        """
+        正常系: インメモリのエンジンでも SQL と同じ結果になる
+        """
+        self._create_catalog(db)
+        queries = [
+            {'min_price': '11', 'max_price': '100', 'cursor': '', 'sort': 'price', 'order': 'desc'},
+            {'color': 'white', 'cursor': ''},
+            {'featured': 'true', 'in_stock': 'true', 'cursor': '', 'sort': 'created', 'order': 'asc'},
+            {'max_price': '12', 'q': 'comfortable', 'cursor': ''},
+        ]
+        results = assert_engines_match(monkeypatch, lambda: [
+            walk_cursor_pages(client, **{k: v for k, v in q.items() if k != 'cursor'}) for q in queries
+        ])
+        assert all(results)
+
+    def _query_plan(self, client, db, **params):
+        """一覧が発行した furnitures の SELECT の実行計画"""
+        with QueryCounter(db.engine) as counter:
+            self._list(client, **params)
+        statement, parameters = [
+            (s, p) for s, p in zip(counter.statements, counter.parameters) if s.startswith('SELECT furnitures.')
+        ][-1]
+        rows = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return ' '.join(row[-1] for row in rows)
+
+    def test_filtered_pages_use_composite_indexes(self, client, db):
+        """
+        正常系: 色やおすすめで絞り込んだ並び替えは、複合インデックスの範囲スキャンだけで済む（一時的なソートをしない）
+        """
+        self._create_catalog(db)
+        plan = self._query_plan(client, db, color='brown', min_price='11', sort='price', order='asc', cursor='')
+        assert 'ix_furnitures_color_price_id' in plan and 'TEMP B-TREE' not in plan
+
+        plan = self._query_plan(client, db, featured='true', cursor='')
+        assert 'ix_furnitures_featured_updated_at_id' in plan and 'TEMP B-TREE' not in plan
+
+
+class TestBatchFetch:
+    def test_returns_requested_order_and_missing_ids(self, client, db):
+        """
+        正常系: ?ids= で指定した順に返し、存在しない id は missing に入れる。重複は1件にまとめる
+        """
+        ids = [furniture.id for furniture in create_furnitures(db, 5)]
+        requested = [ids[3], 999, ids[0], ids[3], ids[4]]
+        response = client.get(url_for('furnitures.get_furnitures', ids=','.join(map(str, requested))))
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [item['id'] for item in data['furnitures']] == [ids[3], ids[0], ids[4]]
+        assert data['missing'] == [999]
+        detail = client.get(url_for('furnitures.get_furniture', id=ids[3])).get_json()
+        assert data['furnitures'][0] == detail
+
+    def test_single_in_query(self, client, db):
+        """
+        正常系: 件数によらず furnitures への問い合わせは WHERE id IN (...) の1回だけ
+        """
+        ids = [furniture.id for furniture in create_furnitures(db, 20)]
+        with QueryCounter(db.engine) as counter:
+            response = client.get(url_for('furnitures.get_furnitures', ids=','.join(map(str, ids)), view='summary'))
+        assert len(response.get_json()['furnitures']) == 20
+        queries = [s for s in counter.statements if 'FROM furnitures' in s]
+        assert len(queries) == 1 and 'IN' in queries[0] and 'description' not in queries[0]
+
+    def test_invalid_ids(self, client, db, app):
+        """
+        異常系: 数字でない id、空の指定、上限を超える件数は 400
+        """
+        limit = app.config['FURNITURE_BATCH_MAX_IDS']
+        for raw in ('1,abc', '', ',', '-1', ','.join(str(i) for i in range(1, limit + 2))):
+            assert client.get(url_for('furnitures.get_furnitures', ids=raw)).status_code == 400
+
+    def test_memory_engine_matches_sql(self, client, db, monkeypatch):
+        """
+        正常系: インメモリのエンジンでも SQL と同じ結果になる
+        """
+        ids = [furniture.id for furniture in create_furnitures(db, 4)]
+        raw = f'{ids[2]},{ids[0]},12345'
+        assert_engines_match(monkeypatch, lambda: client.get(url_for('furnitures.get_furnitures', ids=raw)).get_json())
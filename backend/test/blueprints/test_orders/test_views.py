@@ -0,0 +1,167 @@
+import threading
+from decimal import Decimal
+from flask import url_for
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select, func
+from backend.app import create_app
+from backend.benchmarks.common import QueryCounter
+from backend.config import TestingConfig
+from backend.extensions import db as _db
+from backend.models.furniture import Furniture
+from backend.models.order import Order, OrderItem
+from backend.models.user import User
+from backend.catalog.version import get_catalog_version
+
+
+def _create_furniture(db, name, stock, price='100.00'):
+    furniture = Furniture(
+        name=name, description='For sale', color='white', price=Decimal(price), featured=False, stock=stock,
+    )
+    db.session.add(furniture)
+    db.session.commit()
+    return furniture.id
+
+
+# --- POST /orders ---
+class TestCreateOrder:
+    def test_create_order(self, client, db, authenticated_user):
+        """
+        正常系: 在庫を減らして注文と明細を作り、注文時点の単価と合計を返す
+        """
+        chair = _create_furniture(db, 'Chair', stock=5, price='25.50')
+        table = _create_furniture(db, 'Table', stock=2, price='120.00')
+        user, access_token = authenticated_user
+        version = get_catalog_version()
+
+        response = client.post(
+            url_for('orders.create_order'), headers={'Authorization': f'Bearer {access_token}'},
+            json={'items': [{'furniture_id': table, 'quantity': 2}, {'furniture_id': chair, 'quantity': 3}]},
+        )
+        assert response.status_code == 201
+        order = response.get_json()['order']
+        assert order['total'] == '316.50'
+        assert {item['furniture_id']: item['quantity'] for item in order['items']} == {chair: 3, table: 2}
+        assert {item['name']: item['unit_price'] for item in order['items']} == {'Chair': '25.50', 'Table': '120.00'}
+
+        assert db.session.get(Furniture, chair).stock == 2
+        assert db.session.get(Furniture, table).stock == 0
+        # 在庫の引き当ても行の書き換えなので、管理画面の ETag (version) が進む
+        assert db.session.get(Furniture, chair).version == 2
+        saved = db.session.get(Order, order['id'])
+        assert saved.user_id == user.id
+        assert db.session.scalar(select(func.count()).select_from(OrderItem)) == 2
+        # 在庫数は公開APIに出るので、カタログのバージョンが進む
+        assert get_catalog_version() > version
+
+    def test_out_of_stock_rolls_back_everything(self, client, db, authenticated_user):
+        """
+        異常系: 1つでも在庫が足りなければ 409。先に引き当てた家具の在庫も元に戻り、注文は作られない
+        """
+        chair = _create_furniture(db, 'Chair', stock=5)
+        table = _create_furniture(db, 'Table', stock=1)
+        _, access_token = authenticated_user
+
+        response = client.post(
+            url_for('orders.create_order'), headers={'Authorization': f'Bearer {access_token}'},
+            json={'items': [{'furniture_id': chair, 'quantity': 2}, {'furniture_id': table, 'quantity': 3}]},
+        )
+        assert response.status_code == 409
+        data = response.get_json()
+        assert data['error_code'] == 'OUT_OF_STOCK'
+        assert data['items'] == [{'furniture_id': table, 'requested': 3, 'available': 1}]
+
+        db.session.expire_all()
+        assert db.session.get(Furniture, chair).stock == 5
+        assert db.session.get(Furniture, table).stock == 1
+        assert db.session.scalar(select(func.count()).select_from(Order)) == 0
+
+    def test_unknown_furniture_and_invalid_payload(self, client, db, authenticated_user):
+        """
+        異常系: 存在しない家具は 404、数量 0・明細なし・同じ家具の重複は 422、未ログインは 401
+        """
+        chair = _create_furniture(db, 'Chair', stock=5)
+        _, access_token = authenticated_user
+        headers = {'Authorization': f'Bearer {access_token}'}
+
+        response = client.post(url_for('orders.create_order'), headers=headers, json={'items': [{'furniture_id': 999, 'quantity': 1}]})
+        assert response.status_code == 404
+        for payload in (
+            {'items': [{'furniture_id': chair, 'quantity': 0}]},
+            {'items': []},
+            {'items': [{'furniture_id': chair, 'quantity': 1}, {'furniture_id': chair, 'quantity': 2}]},
+        ):
+            assert client.post(url_for('orders.create_order'), headers=headers, json=payload).status_code == 422
+        assert client.post(url_for('orders.create_order'), json={'items': [{'furniture_id': chair, 'quantity': 1}]}).status_code == 401
+
+    def test_stock_updates_in_id_order(self, client, db, authenticated_user):
+        """
+        正常系: 在庫の UPDATE は条件付きで、リクエストの順序によらず id の昇順に発行する（デッドロックの防止）
+        """
+        ids = [_create_furniture(db, f'Item {i}', stock=10) for i in range(3)]
+        _, access_token = authenticated_user
+
+        with QueryCounter(db.engine) as counter:
+            client.post(
+                url_for('orders.create_order'), headers={'Authorization': f'Bearer {access_token}'},
+                json={'items': [{'furniture_id': id, 'quantity': 1} for id in reversed(ids)]},
+            )
+        statements = [(s, p) for s, p in zip(counter.statements, counter.parameters) if s.startswith('UPDATE furnitures')]
+
+        assert len(statements) == 3
+        assert all('stock >=' in statement and 'RETURNING' in statement for statement, _ in statements)
+        assert [parameters[-2] for _, parameters in statements] == ids
+
+
+class TestOrderConcurrency:
+    THREADS = 8
+    ORDERS_PER_THREAD = 10
+    STOCK = 50
+
+    def test_no_oversell_under_concurrent_orders(self, tmp_path):
+        """
+        正常系: 多数のスレッドが同じ家具を同時に注文しても、在庫は負にならず、売れた数は在庫数ちょうどになる。
+        インメモリの SQLite は1つの接続を共有するので、ファイルの DB を使う別のアプリで確かめる
+        """
+        config = type('StressConfig', (TestingConfig,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "orders.db"}'})
+        app = create_app(config_override=config)
+        with app.app_context():
+            _db.create_all()
+            furniture_id = _create_furniture(_db, 'Limited Chair', stock=self.STOCK)
+            other_id = _create_furniture(_db, 'Plenty Table', stock=10_000)
+            user = User(username='buyer', email='buyer@example.com')
+            user.set_password_hash('Password123!')
+            _db.session.add(user)
+            _db.session.commit()
+            token = create_access_token(identity=user.id)
+
+        results = []
+        lock = threading.Lock()
+
+        def buy():
+            client = app.test_client()
+            for _ in range(self.ORDERS_PER_THREAD):
+                response = client.post(
+                    '/api/v1/orders', headers={'Authorization': f'Bearer {token}'},
+                    json={'items': [{'furniture_id': other_id, 'quantity': 1}, {'furniture_id': furniture_id, 'quantity': 1}]},
+                )
+                with lock:
+                    results.append(response.status_code)
+
+        threads = [threading.Thread(target=buy) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with app.app_context():
+            try:
+                assert set(results) <= {201, 409}
+                assert results.count(201) == self.STOCK
+                assert _db.session.get(Furniture, furniture_id).stock == 0
+                # 在庫切れの注文では、先に引き当てたもう一方の家具の在庫も戻っている
+                assert _db.session.get(Furniture, other_id).stock == 10_000 - self.STOCK
+                sold = _db.session.scalar(select(func.sum(OrderItem.quantity)).where(OrderItem.furniture_id == furniture_id))
+                assert sold == self.STOCK
+            finally:
+                _db.session.remove()
+                _db.drop_all()
@@ -15,6 +15,13 @@ from backend.app import create_app
 from backend.config import TestingConfig
 
 from backend.extensions import db as _db  # 関数名のdbと名前の衝突が起こらないようにするため
+from backend.extensions import response_cache
+from backend.blocklist import token_blocklist
+from backend.token_epochs import token_epochs
+from backend.identity_cache import identity_cache
+from backend.refresh_rotation import refresh_rotation
+from backend.last_seen import last_seen
+from backend.catalog.snapshot import catalog_snapshots
 from backend.models.user import User
 
 
@@ -49,6 +56,14 @@ def db(app):
         yield _db
         _db.session.remove()
         _db.drop_all() # 全テーブルを削除
+        # テーブルを作り直すとバージョン番号も0に戻るので、プロセス内のキャッシュも空にしておく
+        response_cache.clear()
+        token_blocklist.clear()
+        token_epochs.clear()
+        identity_cache.clear()
+        refresh_rotation.clear()
+        last_seen.clear()
+        catalog_snapshots.clear()
 
 
 @pytest.fixture(scope='function')
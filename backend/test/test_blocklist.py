@@ -0,0 +1,113 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import url_for
+from flask_jwt_extended import decode_token
+
+from backend.benchmarks.common import QueryCounter
+from backend.blocklist import BloomFilter, token_blocklist
+from backend.models.blocked_token import BlockedToken
+from backend.models.user import User
+
+
+class TestBloomFilter:
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        """
+        正常系: 追加した要素は必ず含まれ、追加していない要素の偽陽性率は設定値の数倍以内
+        """
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        added = [str(uuid.uuid4()) for _ in range(2000)]
+        for jti in added:
+            bloom.add(jti)
+
+        assert all(jti in bloom for jti in added)
+        false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(5000))
+        assert false_positives < 5000 * 0.03
+
+
+class TestTokenBlocklist:
+    def test_access_token_check_skips_blocked_tokens_query(self, client, authenticated_user, db):
+        """
+        正常系: ブロックされていないアクセストークンの確認では blocked_tokens を SELECT しない
+        """
+        user, access_token = authenticated_user
+        headers = {'Authorization': f'Bearer {access_token}'}
+        client.get(url_for('account.get_user'), headers=headers)  # フィルタの初期構築
+
+        with QueryCounter(db.engine) as counter:
+            response = client.get(url_for('account.get_user'), headers=headers)
+
+        assert response.status_code == 200
+        assert not any('blocked_tokens' in statement for statement in counter.statements)
+
+    def test_token_blocked_by_another_worker_is_picked_up_on_sync(self, client, authenticated_user, db, monkeypatch):
+        """
+        正常系: 他のワーカーが blocked_tokens に追加した jti も、同期のタイミングでフィルタに取り込まれる
+        """
+        user, access_token = authenticated_user
+        headers = {'Authorization': f'Bearer {access_token}'}
+        assert client.get(url_for('account.get_user'), headers=headers).status_code == 200
+
+        # 別ワーカーでのブロックを再現するため、このプロセスの token_blocklist.add() を通さずに直接 INSERT する
+        db.session.add(BlockedToken(jti=decode_token(access_token)['jti']))
+        db.session.commit()
+        monkeypatch.setattr(token_blocklist, 'sync_interval', 0)
+
+        response = client.get(url_for('account.get_user'), headers=headers)
+        assert response.status_code == 401
+        assert response.get_json()['error_code'] == 'TOKEN_REVOKED'
+
+    def test_row_committed_out_of_id_order_is_picked_up(self, client, authenticated_user, db, monkeypatch):
+        """
+        正常系: 大きい id の行が先にコミットされ、前回見た id が追い越した後でコミットされた行も取りこぼさない
+        """
+        user, access_token = authenticated_user
+        headers = {'Authorization': f'Bearer {access_token}'}
+        monkeypatch.setattr(token_blocklist, 'sync_interval', 0)
+
+        # id 11 が先にコミットされ、同期で前回見た id が 11 まで進む
+        db.session.add(BlockedToken(id=11, jti=str(uuid.uuid4())))
+        db.session.commit()
+        assert client.get(url_for('account.get_user'), headers=headers).status_code == 200
+
+        # 先に採番されていた id 10 が後からコミットされる
+        db.session.add(BlockedToken(id=10, jti=decode_token(access_token)['jti']))
+        db.session.commit()
+
+        response = client.get(url_for('account.get_user'), headers=headers)
+        assert response.status_code == 401
+        assert response.get_json()['error_code'] == 'TOKEN_REVOKED'
+
+
+class TestPruneBlockedTokens:
+    def test_cli_prunes_only_expired_rows_in_batches(self, app, db):
+        """
+        正常系: 期限切れの行だけが削除され、期限が NULL の古い行と有効な行は残る
+        """
+        now = datetime.now(timezone.utc)
+        db.session.add_all(BlockedToken(jti=f'expired-{i}', expires_at=now - timedelta(minutes=1)) for i in range(5))
+        db.session.add(BlockedToken(jti='alive', expires_at=now + timedelta(hours=1)))
+        db.session.add(BlockedToken(jti='legacy', expires_at=None))
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['prune-blocked-tokens', '--batch-size', '2'])
+
+        assert result.exit_code == 0
+        assert 'Deleted 5 expired blocked tokens.' in result.output
+        assert sorted(token.jti for token in BlockedToken.query.all()) == ['alive', 'legacy']
+
+    def test_logout_stores_token_expiry(self, client, db):
+        """
+        正常系: ログアウトでブロックされる行にはリフレッシュトークンの exp が保存される
+        """
+        user = User(username='expiry', email='expiry@example.com')
+        user.set_password_hash('Password123!')
+        db.session.add(user)
+        db.session.commit()
+        client.post(url_for('auth.login'), json={'email': 'expiry@example.com', 'password': 'Password123!'})
+
+        assert client.post(url_for('auth.logout')).status_code == 200
+
+        blocked = BlockedToken.query.one()
+        expires_at = blocked.expires_at.replace(tzinfo=timezone.utc)
+        assert timedelta(minutes=50) < expires_at - datetime.now(timezone.utc) <= timedelta(hours=1)
@@ -0,0 +1,59 @@
+import pytest
+
+from backend.app import create_app
+from backend.config import TestingConfig
+from backend.fault_injection import resolve_fault_settings
+
+
+class FaultInjectionConfig(TestingConfig):
+    FAULT_INJECTION_ENABLED = True
+    FAULT_INJECTION_DEFAULT = {'delay': 0.0}
+    FAULT_INJECTION_RULES = {
+        'furnitures': {'error_rate': 1.0},
+        'furnitures.get_furniture': {'error_rate': 0.0, 'delay': 0.01},
+    }
+
+
+class TestResolveFaultSettings:
+    def test_endpoint_rule_overrides_blueprint_rule(self):
+        """
+        正常系: デフォルト → blueprint → endpoint の順に設定が上書きされる
+        """
+        config = {
+            'FAULT_INJECTION_DEFAULT': {'delay': 0.5},
+            'FAULT_INJECTION_RULES': FaultInjectionConfig.FAULT_INJECTION_RULES,
+        }
+
+        assert resolve_fault_settings(config, 'auth.login') == {'delay': 0.5, 'jitter': 0.0, 'error_rate': 0.0}
+        assert resolve_fault_settings(config, 'furnitures.get_furnitures')['error_rate'] == 1.0
+        assert resolve_fault_settings(config, 'furnitures.get_furniture') == {'delay': 0.01, 'jitter': 0.0, 'error_rate': 0.0}
+
+    def test_unknown_setting_is_rejected(self):
+        """
+        異常系: 設定名のタイプミスはエラーにする
+        """
+        with pytest.raises(ValueError):
+            resolve_fault_settings({'FAULT_INJECTION_DEFAULT': {'dealy': 1}}, 'auth.login')
+
+
+class TestFaultInjectionHook:
+    def test_injected_error_returns_503(self):
+        """
+        正常系: error_rate=1.0 の endpoint は必ず 503 を返し、それ以外は通常通り動く
+        """
+        app = create_app(config_override=FaultInjectionConfig)
+        client = app.test_client()
+
+        response = client.get('/api/v1/furnitures')
+        assert response.status_code == 503
+        assert response.get_json()['error_code'] == 'SERVICE_UNAVAILABLE'
+
+        # 認証が必要な endpoint には注入の設定がないので、通常通り 401 が返る
+        assert client.get('/api/v1/account').status_code == 401
+
+    def test_disabled_by_default_in_testing(self, app):
+        """
+        正常系: TestingConfig では before_request フックが登録されない
+        """
+        assert app.config['FAULT_INJECTION_ENABLED'] is False
+        assert not any(f.__name__ == 'inject_fault' for f in app.before_request_funcs.get(None, []))
@@ -0,0 +1,53 @@
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from backend import json_provider
+from backend.schemas.furniture import FurnitureColor
+
+
+PAYLOAD = {
+    'furnitures': [
+        {
+            'id': 1, 'name': 'Chair', 'price': Decimal('19.90'), 'color': FurnitureColor.WHITE,
+            'featured': True, 'image_url': None,
+            'updated_at': datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            'created_at': datetime(2025, 1, 2, 3, 4, 5),
+        },
+    ],
+    'user_id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'has_next': False,
+    'next_cursor': None,
+}
+
+
+class TestOrjsonProvider:
+    def test_response_matches_default_provider(self, app):
+        """
+        正常系: Decimal・datetime・UUID・Enum を含むレスポンスが、標準のプロバイダーとバイト単位で同じ
+        """
+        with app.test_request_context():
+            fast = json_provider.OrjsonProvider(app).response(PAYLOAD)
+            default = DefaultJSONProvider(app).response(PAYLOAD)
+        assert fast.get_data() == default.get_data()
+        assert b'"price":"19.90"' in fast.get_data()
+        assert b'"updated_at":"Thu, 02 Jan 2025 03:04:05 GMT"' in fast.get_data()
+
+    def test_dumps_and_loads_round_trip(self, app):
+        provider = json_provider.OrjsonProvider(app)
+        assert provider.loads(provider.dumps(PAYLOAD)) == DefaultJSONProvider(app).loads(
+            DefaultJSONProvider(app).dumps(PAYLOAD)
+        )
+
+    def test_falls_back_to_stdlib(self, app, monkeypatch):
+        """
+        正常系: orjson が扱えない値や、orjson がない環境では標準の json で同じ結果を返す
+        """
+        provider = json_provider.OrjsonProvider(app)
+        assert provider.dumps({'big': 2 ** 70}) == '{"big": 1180591620717411303424}'
+
+        monkeypatch.setattr(json_provider, 'orjson', None)
+        with app.test_request_context():
+            assert provider.response(PAYLOAD).get_data() == DefaultJSONProvider(app).response(PAYLOAD).get_data()
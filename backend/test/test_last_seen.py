@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import url_for
+from sqlalchemy.exc import OperationalError
+
+from backend import commands
+from backend.app import create_app
+from backend.benchmarks.common import QueryCounter
+from backend.config import TestingConfig
+from backend.last_seen import last_seen
+from backend.models.user import User
+
+
+def _create_users(db, count):
+    users = []
+    for i in range(count):
+        u = User(username=f'seen{i}', email=f'seen{i}@example.com', password='x')
+        db.session.add(u)
+        users.append(u)
+    db.session.commit()
+    return users
+
+
+class TestLastSeenBuffer:
+    def test_flushes_once_size_threshold_is_reached(self, db, monkeypatch):
+        """
+        正常系: しきい値に達するまでは書き込まず、達したら1回の executemany でまとめて書き込む
+        """
+        monkeypatch.setattr(last_seen, 'flush_size', 3)
+        users = _create_users(db, 3)
+        seen_at = datetime(2030, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+        def updates(counter):
+            return [p for s, p in zip(counter.statements, counter.parameters) if s.lstrip().upper().startswith('UPDATE')]
+
+        with QueryCounter(db.engine) as counter:
+            last_seen.record(users[0].id, seen_at)
+            last_seen.record(users[1].id, seen_at)
+            assert updates(counter) == []
+            last_seen.record(users[2].id, seen_at)
+
+        # executemany の parameters は3行分のリストになる
+        assert [len(parameters) for parameters in updates(counter)] == [3]
+        db.session.expire_all()
+        assert all(u.last_login_at.replace(tzinfo=None) == seen_at.replace(tzinfo=None) for u in users)
+
+    def test_does_not_overwrite_newer_value(self, db):
+        """
+        正常系: 古い値が後から書き込まれても、新しい最終ログイン日時は巻き戻らない
+        """
+        (user,) = _create_users(db, 1)
+        newer = datetime(2030, 1, 2, tzinfo=timezone.utc)
+        last_seen.record(user.id, newer)
+        last_seen.record(user.id, newer - timedelta(days=1))
+
+        db.session.expire_all()
+        assert user.last_login_at.replace(tzinfo=None) == newer.replace(tzinfo=None)
+
+    def test_admin_user_list_flushes_pending_values(self, client, authenticated_admin, db, monkeypatch):
+        """
+        正常系: 管理画面のユーザー一覧は、このワーカーに溜まっている値を書き込んでから返す
+        """
+        monkeypatch.setattr(last_seen, 'flush_size', 100)
+        (user,) = _create_users(db, 1)
+        last_seen.record(user.id, datetime(2030, 1, 1, tzinfo=timezone.utc))
+
+        _, access_token = authenticated_admin
+        response = client.get(url_for('admin.get_userlist'), headers={'Authorization': f'Bearer {access_token}'})
+        assert response.status_code == 200
+        users = response.get_json()['users']
+        assert users[0]['username'] == 'seen0'
+        assert users[0]['last_login_at'] is not None
+
+    def test_failed_flush_does_not_fail_login(self, client, db, monkeypatch):
+        """
+        異常系: ログインの中での書き込みが失敗してもログインは成功し、値はバッファに戻って次回に再試行される。
+        明示的な flush() では例外になる
+        """
+        (user,) = _create_users(db, 1)
+        user.set_password_hash('Password123!')
+        db.session.commit()
+
+        def fail(pending):
+            raise OperationalError('UPDATE users', {}, Exception('database is locked'))
+        monkeypatch.setattr(User, 'bulk_update_last_login_at', fail)
+
+        response = client.post(url_for('auth.login'), json={'email': 'seen0@example.com', 'password': 'Password123!'})
+        assert response.status_code == 200
+        assert user.id in last_seen._pending
+
+        with pytest.raises(OperationalError):
+            last_seen.flush()
+        assert user.id in last_seen._pending
+
+
+class TestBackgroundTasks:
+    def test_started_on_first_request_not_in_create_app(self, monkeypatch):
+        """
+        正常系: flask db upgrade などの CLI でも create_app は呼ばれるので、定期実行のスレッドは
+        create_app では起動せず、最初のリクエストで1回だけ起動する
+        """
+        started = []
+        monkeypatch.setattr(commands, 'start_periodic_task', lambda app, name, interval, func: started.append(name))
+        config = type('ServingConfig', (TestingConfig,), {'LAST_SEEN_FLUSH_INTERVAL': 5})
+
+        app = create_app(config_override=config)
+        assert started == []
+
+        client = app.test_client()
+        client.get('/api/v1/not-found')
+        client.get('/api/v1/not-found')
+        assert started == ['flush-last-seen']
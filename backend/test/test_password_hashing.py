@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from flask import url_for
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash
+
+from backend.models.user import User
+from backend.password_hashing import PasswordHasher, password_hasher
+
+
+class TestPasswordHasher:
+    def test_hash_and_verify_in_process_pool(self, app):
+        """
+        正常系: プロセスプールで計算しても、同じ形式のハッシュが作られ検証できる
+        """
+        hasher = PasswordHasher()
+        hasher.init_app(app)
+        hasher.workers = 1
+
+        hashed = hasher.hash('Password123!')
+
+        assert hashed.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verify(hashed, 'Password123!')
+        assert not hasher.verify(hashed, 'wrong')
+
+    def test_needs_rehash_compares_normalized_method(self, app):
+        """
+        正常系: 設定と異なるアルゴリズムやコストのハッシュだけが作り直しの対象になる
+        """
+        assert not password_hasher.needs_rehash(generate_password_hash('x', 'pbkdf2:sha256:1000'))
+        assert password_hasher.needs_rehash(generate_password_hash('x', 'pbkdf2:sha256:500'))
+        assert password_hasher.needs_rehash(generate_password_hash('x', 'scrypt'))
+
+    def test_slot_is_held_until_timed_out_work_finishes(self, app):
+        """
+        異常系: タイムアウトしても計算はプールの中で続いているので、終わるまで枠は返らず、次の計算は受け付けない
+        """
+        hasher = PasswordHasher()
+        hasher.init_app(app)
+        hasher.workers = 1
+        hasher.max_pending = 1
+        hasher._slots = threading.BoundedSemaphore(1)
+        hasher.timeout = 0.05
+
+        with pytest.raises(ServiceUnavailable, match='timed out'):
+            hasher._run(time.sleep, 0.5)
+        with pytest.raises(ServiceUnavailable, match='Too many'):
+            hasher._run(time.sleep, 0)
+
+        time.sleep(1)
+        assert hasher._run(time.sleep, 0) is None
+
+
+class TestLoginWithHasher:
+    def test_login_rehashes_outdated_hash(self, client, db):
+        """
+        正常系: 古いコストで保存されたハッシュは、ログイン成功時に現在の設定で作り直される
+        """
+        user = User(username='legacy', email='legacy@example.com', password=generate_password_hash('Password123!', 'pbkdf2:sha256:500'))
+        db.session.add(user)
+        db.session.commit()
+
+        response = client.post(url_for('auth.login'), json={'email': 'legacy@example.com', 'password': 'Password123!'})
+
+        assert response.status_code == 200
+        db.session.refresh(user)
+        assert user.password.startswith('pbkdf2:sha256:1000$')
+        assert user.check_password_match('Password123!')
+
+    def test_login_is_shed_with_503_when_queue_is_full(self, client, db, monkeypatch):
+        """
+        異常系: 受付上限に達している間は、ハッシュを計算せずに 503 と Retry-After を返す
+        """
+        user = User(username='busy', email='busy@example.com')
+        user.set_password_hash('Password123!')
+        db.session.add(user)
+        db.session.commit()
+        monkeypatch.setattr(password_hasher, '_slots', threading.BoundedSemaphore(1))
+        password_hasher._slots.acquire()  # 他のリクエストが計算中の状態を再現する
+
+        response = client.post(url_for('auth.login'), json={'email': 'busy@example.com', 'password': 'Password123!'})
+
+        assert response.status_code == 503
+        assert response.get_json()['error_code'] == 'SERVICE_UNAVAILABLE'
+        assert response.headers['Retry-After'] == '1'
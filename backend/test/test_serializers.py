@@ -0,0 +1,30 @@
+from flask import current_app
+
+from backend.models.furniture import Furniture
+from backend.models.user import User
+from backend.schemas.furniture import PublicFurniture, ReadFurniture
+from backend.schemas.user import ReadUser
+from backend.serializers import dump_trusted
+from backend.test.blueprints.test_furnitures.test_views import create_furnitures
+
+
+class TestTrustedSerializer:
+    def test_json_matches_validated_path(self, db):
+        """
+        正常系: 検証を省いた経路でも、JSON にしたときの結果は model_validate().model_dump() と同じ
+        """
+        create_furnitures(db, 5, image_url='https://example.com/chair.png', color='white')
+        create_furnitures(db, 1, name='No Image Chair', image_url=None)
+        db.session.add(User(username='reader', email='reader@example.com', password='x'))
+        db.session.commit()
+        db.session.expire_all()
+
+        dumps = current_app.json.dumps
+        furnitures = Furniture.query.order_by(Furniture.id).all()
+        for schema in (PublicFurniture, ReadFurniture):
+            expected = [schema.model_validate(f).model_dump() for f in furnitures]
+            assert dumps(dump_trusted(schema, furnitures)) == dumps(expected)
+
+        users = User.query.all()
+        expected = [ReadUser.model_validate(u).model_dump() for u in users]
+        assert dumps(dump_trusted(ReadUser, users)) == dumps(expected)
@@ -0,0 +1,66 @@
+from uuid import UUID
+
+from sqlalchemy import select
+
+from backend.extensions import db
+from backend.models.user import User
+from backend.response_cache import LRUCacheBackend
+
+
+# トークンの世代 (User.token_epoch) による一括失効
+# パスワード変更や権限変更のときに世代を進めると、それ以前に発行されたトークンは全て失効する。
+# 毎リクエスト users を SELECT しないよう、ユーザーごとの世代番号を TTL 付きでプロセス内にキャッシュする。
+#   - 世代を進めたワーカーでは invalidate() により次のリクエストから即座に反映される。
+#   - 他のワーカーでは最大 JWT_TOKEN_EPOCH_CACHE_TTL 秒だけ古い世代のアクセストークンが通りうる。
+#     リフレッシュトークンはキャッシュを使わず常に DB で確認するので、古い世代のまま延命はできない。
+
+EPOCH_CLAIM = 'epoch'
+
+
+class TokenEpochCache:
+
+    def __init__(self):
+        self._cache = LRUCacheBackend()
+
+    def init_app(self, app):
+        self._cache = LRUCacheBackend(
+            max_entries=app.config.get('JWT_TOKEN_EPOCH_CACHE_SIZE', 10_000),
+            default_ttl=app.config.get('JWT_TOKEN_EPOCH_CACHE_TTL', 30),
+        )
+        app.extensions['token_epochs'] = self
+
+    def clear(self):
+        self._cache.clear()
+
+    def invalidate(self, user_id):
+        self._cache.delete(str(user_id))
+
+    def current(self, user_id, use_cache=True):
+        """ユーザーの現在の世代。ユーザーが存在しなければ None"""
+        key = str(user_id)
+        if use_cache:
+            epoch = self._cache.get(key)
+            if epoch is not None:
+                return epoch
+
+        stmt = select(User.token_epoch).where(User.id == UUID(key))
+        epoch = db.session.execute(stmt).scalar_one_or_none()
+        if epoch is not None:
+            self._cache.set(key, epoch)
+        return epoch
+
+    def is_stale(self, jwt_payload):
+        """トークンの世代がユーザーの現在の世代より古ければ True。世代のクレームがない古いトークンは 0 世代とみなす"""
+        current = self.current(jwt_payload['sub'], use_cache=jwt_payload.get('type') != 'refresh')
+        if current is None:
+            # ユーザーが存在しない場合の判定は user_lookup_loader に任せる
+            return False
+        return jwt_payload.get(EPOCH_CLAIM, 0) < current
+
+
+def epoch_claims(user):
+    """トークン発行時に additional_claims として渡す"""
+    return {EPOCH_CLAIM: user.token_epoch}
+
+
+token_epochs = TokenEpochCache()